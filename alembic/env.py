@@ -6,7 +6,7 @@ from sqlalchemy.ext.asyncio import AsyncEngine
 
 # Import your models here
 from app.db.base import Base
-from app.models import CV, JD
+from app.models import CV, JD, EmbeddingCacheEntry, ParseCacheEntry, IngestionJob, IngestionJobChunk, CVJDMatch, EmbeddingModelState
 from app.core.config import settings
 
 # this is the Alembic Config object
@@ -0,0 +1,32 @@
+"""Embedding cache table
+
+Revision ID: 002_embedding_cache
+Revises: 001_initial_tables
+Create Date: 2026-10-17
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from pgvector.sqlalchemy import Vector
+
+# revision identifiers, used by Alembic.
+revision = '002_embedding_cache'
+down_revision = '001_initial_tables'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'embedding_cache',
+        sa.Column('key', sa.String(64), primary_key=True),
+        sa.Column('model_name', sa.String(255), nullable=False),
+        sa.Column('embedding', Vector(384), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=False, server_default=sa.text('NOW()')),
+    )
+    op.create_index('ix_embedding_cache_model_name', 'embedding_cache', ['model_name'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_embedding_cache_model_name')
+    op.drop_table('embedding_cache')
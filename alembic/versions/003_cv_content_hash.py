@@ -0,0 +1,28 @@
+"""Add content hash to CV for upload deduplication
+
+Revision ID: 003_cv_content_hash
+Revises: 002_embedding_cache
+Create Date: 2026-10-17
+
+Only the extracted text is stored for existing rows, not the uploaded
+bytes, so their hashes cannot be reconstructed and are left NULL. The
+unique index ignores NULLs, and new uploads are deduplicated from now on.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '003_cv_content_hash'
+down_revision = '002_embedding_cache'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('cv', sa.Column('content_hash', sa.String(64), nullable=True))
+    op.create_index('ux_cv_content_hash', 'cv', ['content_hash'], unique=True)
+
+
+def downgrade() -> None:
+    op.drop_index('ux_cv_content_hash')
+    op.drop_column('cv', 'content_hash')
@@ -0,0 +1,34 @@
+"""LLM parse result cache table
+
+Revision ID: 004_llm_parse_cache
+Revises: 003_cv_content_hash
+Create Date: 2026-10-17
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = '004_llm_parse_cache'
+down_revision = '003_cv_content_hash'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'llm_parse_cache',
+        sa.Column('key', sa.String(64), primary_key=True),
+        sa.Column('model_name', sa.String(255), nullable=False),
+        sa.Column('prompt_version', sa.String(50), nullable=False),
+        sa.Column('result', postgresql.JSON(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=False, server_default=sa.text('NOW()')),
+        sa.Column('last_used_at', sa.DateTime(), nullable=False, server_default=sa.text('NOW()')),
+    )
+    op.create_index('ix_llm_parse_cache_last_used_at', 'llm_parse_cache', ['last_used_at'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_llm_parse_cache_last_used_at')
+    op.drop_table('llm_parse_cache')
@@ -0,0 +1,44 @@
+"""Ingestion job queue table
+
+Revision ID: 005_ingestion_job
+Revises: 004_llm_parse_cache
+Create Date: 2026-10-17
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = '005_ingestion_job'
+down_revision = '004_llm_parse_cache'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'ingestion_job',
+        sa.Column('id', postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column('status', sa.String(20), nullable=False, server_default='queued'),
+        sa.Column('content', sa.LargeBinary(), nullable=True),
+        sa.Column('content_type', sa.String(255), nullable=True),
+        sa.Column('content_hash', sa.String(64), nullable=False),
+        sa.Column('stages', postgresql.JSON(), nullable=False, server_default='{}'),
+        sa.Column('error', sa.Text(), nullable=True),
+        sa.Column('error_status_code', sa.Integer(), nullable=True),
+        sa.Column('cv_id', postgresql.UUID(as_uuid=True), nullable=True),
+        sa.Column('attempts', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('locked_at', sa.DateTime(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=False, server_default=sa.text('NOW()')),
+        sa.Column('started_at', sa.DateTime(), nullable=True),
+        sa.Column('finished_at', sa.DateTime(), nullable=True),
+    )
+    op.create_index('ix_ingestion_job_status_created_at', 'ingestion_job', ['status', 'created_at'])
+    op.create_index('ix_ingestion_job_content_hash', 'ingestion_job', ['content_hash'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_ingestion_job_content_hash')
+    op.drop_index('ix_ingestion_job_status_created_at')
+    op.drop_table('ingestion_job')
@@ -0,0 +1,23 @@
+"""Record whether CV text extraction was truncated by the budget
+
+Revision ID: 006_cv_text_truncated
+Revises: 005_ingestion_job
+Create Date: 2026-10-17
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '006_cv_text_truncated'
+down_revision = '005_ingestion_job'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('cv', sa.Column('text_truncated', sa.Boolean(), nullable=False, server_default='false'))
+
+
+def downgrade() -> None:
+    op.drop_column('cv', 'text_truncated')
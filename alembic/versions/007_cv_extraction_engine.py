@@ -0,0 +1,27 @@
+"""Record which extraction engine produced each CV's text
+
+Revision ID: 007_cv_extraction_engine
+Revises: 006_cv_text_truncated
+Create Date: 2026-10-17
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '007_cv_extraction_engine'
+down_revision = '006_cv_text_truncated'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Existing rows were extracted with pdfplumber / python-docx
+    op.add_column('cv', sa.Column('extraction_engine', sa.String(length=50), nullable=True))
+    op.execute(
+        "UPDATE cv SET extraction_engine = CASE WHEN file_type = 'docx' THEN 'python-docx' ELSE 'pdfplumber' END"
+    )
+
+
+def downgrade() -> None:
+    op.drop_column('cv', 'extraction_engine')
@@ -0,0 +1,40 @@
+"""Replace the IVFFlat embedding indexes with HNSW
+
+The original IVFFlat indexes were built on empty tables, so their centroids
+carry no information. HNSW needs no training data and keeps recall as rows
+are added. Indexes are built concurrently and swapped in under the same
+name, so the tables stay readable and writable during the upgrade.
+
+Revision ID: 008_hnsw_vector_indexes
+Revises: 007_cv_extraction_engine
+Create Date: 2026-10-17
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '008_hnsw_vector_indexes'
+down_revision = '007_cv_extraction_engine'
+branch_labels = None
+depends_on = None
+
+INDEXES = {'cv': 'idx_cv_embedding', 'jd': 'idx_jd_embedding'}
+
+
+def _swap(table: str, name: str, using: str) -> None:
+    op.execute(f'DROP INDEX CONCURRENTLY IF EXISTS {name}_new')
+    op.execute(f'CREATE INDEX CONCURRENTLY {name}_new ON {table} USING {using}')
+    op.execute(f'DROP INDEX CONCURRENTLY IF EXISTS {name}')
+    op.execute(f'ALTER INDEX {name}_new RENAME TO {name}')
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        for table, name in INDEXES.items():
+            _swap(table, name, 'hnsw (embedding vector_cosine_ops) WITH (m = 16, ef_construction = 64)')
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for table, name in INDEXES.items():
+            _swap(table, name, 'ivfflat (embedding vector_cosine_ops) WITH (lists = 100)')
@@ -0,0 +1,37 @@
+"""Make the JD embedding index partial on active JDs
+
+Reverse matching (CV -> JDs) only ever ranks active JDs, so the index no
+longer carries inactive postings and the filter does not discard index
+results. Built concurrently and swapped in under the same name.
+
+Revision ID: 009_jd_active_embedding_index
+Revises: 008_hnsw_vector_indexes
+Create Date: 2026-10-17
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '009_jd_active_embedding_index'
+down_revision = '008_hnsw_vector_indexes'
+branch_labels = None
+depends_on = None
+
+HNSW = 'hnsw (embedding vector_cosine_ops) WITH (m = 16, ef_construction = 64)'
+
+
+def _swap(definition: str) -> None:
+    op.execute('DROP INDEX CONCURRENTLY IF EXISTS idx_jd_embedding_new')
+    op.execute(f'CREATE INDEX CONCURRENTLY idx_jd_embedding_new ON jd USING {definition}')
+    op.execute('DROP INDEX CONCURRENTLY IF EXISTS idx_jd_embedding')
+    op.execute('ALTER INDEX idx_jd_embedding_new RENAME TO idx_jd_embedding')
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        _swap(f'{HNSW} WHERE is_active = true')
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        _swap(HNSW)
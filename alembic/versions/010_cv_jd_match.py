@@ -0,0 +1,38 @@
+"""Materialized top-N CV matches per JD
+
+Revision ID: 010_cv_jd_match
+Revises: 009_jd_active_embedding_index
+Create Date: 2026-10-17
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = '010_cv_jd_match'
+down_revision = '009_jd_active_embedding_index'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'cv_jd_match',
+        sa.Column('jd_id', postgresql.UUID(as_uuid=True), sa.ForeignKey('jd.id', ondelete='CASCADE'), primary_key=True),
+        sa.Column('cv_id', postgresql.UUID(as_uuid=True), sa.ForeignKey('cv.id', ondelete='CASCADE'), primary_key=True),
+        sa.Column('score', sa.Float(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=False, server_default=sa.text('NOW()')),
+    )
+    op.create_index('ix_cv_jd_match_jd_score', 'cv_jd_match', ['jd_id', 'score'])
+    op.create_index('ix_cv_jd_match_cv_id', 'cv_jd_match', ['cv_id'])
+
+    # Existing JDs are served live until python -m app.cli.match_table rebuild
+    op.add_column('jd', sa.Column('matches_computed_at', sa.DateTime(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('jd', 'matches_computed_at')
+    op.drop_index('ix_cv_jd_match_cv_id')
+    op.drop_index('ix_cv_jd_match_jd_score')
+    op.drop_table('cv_jd_match')
@@ -0,0 +1,49 @@
+"""Generation counter for match result cache invalidation
+
+Revision ID: 011_match_generation
+Revises: 010_cv_jd_match
+Create Date: 2026-10-17
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '011_match_generation'
+down_revision = '010_cv_jd_match'
+branch_labels = None
+depends_on = None
+
+TABLES = ('cv', 'jd', 'cv_jd_match')
+
+
+def upgrade() -> None:
+    op.create_table(
+        'match_generation',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('generation', sa.BigInteger(), nullable=False, server_default='0'),
+    )
+    op.execute('INSERT INTO match_generation (id, generation) VALUES (1, 0)')
+
+    # Statement-level, so a multi-row insert bumps the counter once
+    op.execute("""
+        CREATE FUNCTION bump_match_generation() RETURNS trigger AS $$
+        BEGIN
+            UPDATE match_generation SET generation = generation + 1 WHERE id = 1;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+    for table in TABLES:
+        op.execute(f"""
+            CREATE TRIGGER {table}_bump_match_generation
+            AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON {table}
+            FOR EACH STATEMENT EXECUTE FUNCTION bump_match_generation()
+        """)
+
+
+def downgrade() -> None:
+    for table in TABLES:
+        op.execute(f'DROP TRIGGER IF EXISTS {table}_bump_match_generation ON {table}')
+    op.execute('DROP FUNCTION IF EXISTS bump_match_generation()')
+    op.drop_table('match_generation')
@@ -0,0 +1,40 @@
+"""Keyset pagination and search indexes for CV and JD listings
+
+Revision ID: 012_list_search_indexes
+Revises: 011_match_generation
+Create Date: 2026-10-17
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '012_list_search_indexes'
+down_revision = '011_match_generation'
+branch_labels = None
+depends_on = None
+
+INDEXES = {
+    # (created_at, id) keyset pagination, scanned backwards for newest first
+    'ix_cv_created_at_id': 'cv (created_at, id)',
+    'ix_jd_created_at_id': 'jd (created_at, id)',
+    'ix_jd_active_created_at_id': 'jd (created_at, id) WHERE is_active = true',
+    # ILIKE '%term%' search
+    'ix_cv_candidate_name_trgm': 'cv USING gin (candidate_name gin_trgm_ops)',
+    'ix_cv_email_trgm': 'cv USING gin (email gin_trgm_ops)',
+    'ix_jd_title_trgm': 'jd USING gin (title gin_trgm_ops)',
+    # Full-text search over the unbounded requirements text
+    'ix_jd_requirements_fts': "jd USING gin (to_tsvector('english', requirements))",
+}
+
+
+def upgrade() -> None:
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    with op.get_context().autocommit_block():
+        for name, definition in INDEXES.items():
+            op.execute(f'CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} ON {definition}')
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name in INDEXES:
+            op.execute(f'DROP INDEX CONCURRENTLY IF EXISTS {name}')
@@ -0,0 +1,42 @@
+"""Normalized, GIN-indexed CV skill keys for must-have skill filters
+
+Revision ID: 013_cv_skill_keys
+Revises: 012_list_search_indexes
+Create Date: 2026-10-17
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = '013_cv_skill_keys'
+down_revision = '012_list_search_indexes'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('cv', sa.Column('skill_keys', postgresql.JSONB(), nullable=True))
+
+    # Same normalization as app.services.matching.normalize_skills
+    op.execute(r"""
+        UPDATE cv SET skill_keys = COALESCE((
+            SELECT jsonb_agg(DISTINCT key)
+            FROM (
+                SELECT lower(regexp_replace(btrim(skill), '\s+', ' ', 'g')) AS key
+                FROM json_array_elements_text(cv.skills) AS skill
+            ) keys
+            WHERE key <> ''
+        ), '[]'::jsonb)
+        WHERE json_typeof(cv.skills) = 'array'
+    """)
+
+    with op.get_context().autocommit_block():
+        op.execute('CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_cv_skill_keys ON cv USING gin (skill_keys jsonb_path_ops)')
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.execute('DROP INDEX CONCURRENTLY IF EXISTS ix_cv_skill_keys')
+    op.drop_column('cv', 'skill_keys')
@@ -0,0 +1,51 @@
+"""Embedding model versioning and dual embedding columns for model swaps
+
+Revision ID: 014_embedding_model_versioning
+Revises: 013_cv_skill_keys
+Create Date: 2026-10-17
+
+"""
+import os
+from alembic import op
+import sqlalchemy as sa
+from pgvector.sqlalchemy import Vector
+
+# revision identifiers, used by Alembic.
+revision = '014_embedding_model_versioning'
+down_revision = '013_cv_skill_keys'
+branch_labels = None
+depends_on = None
+
+TABLES = ('cv', 'jd')
+
+
+def upgrade() -> None:
+    # Every vector so far came from the configured model
+    model = os.environ.get('EMBEDDING_MODEL_NAME', 'all-MiniLM-L6-v2')
+
+    for table in TABLES:
+        op.add_column(table, sa.Column('embedding_model', sa.String(255), nullable=True))
+        op.add_column(table, sa.Column('embedding_next', Vector(384), nullable=True))
+        op.add_column(table, sa.Column('embedding_next_model', sa.String(255), nullable=True))
+        op.execute(
+            sa.text(f"UPDATE {table} SET embedding_model = :model WHERE embedding IS NOT NULL").bindparams(model=model)
+        )
+
+    op.create_table(
+        'embedding_model_state',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('active_model', sa.String(255), nullable=False),
+        sa.Column('next_model', sa.String(255), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=False, server_default=sa.text('NOW()')),
+    )
+    op.execute(
+        sa.text("INSERT INTO embedding_model_state (id, active_model) VALUES (1, :model)").bindparams(model=model)
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('embedding_model_state')
+    for table in TABLES:
+        op.drop_column(table, 'embedding_next_model')
+        op.drop_column(table, 'embedding_next')
+        op.drop_column(table, 'embedding_model')
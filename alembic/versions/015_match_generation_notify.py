@@ -0,0 +1,54 @@
+"""Signal match result invalidation with NOTIFY instead of a counter row
+
+The counter row was updated by every write statement on cv, jd and
+cv_jd_match, and its row lock was held until commit, serialising all
+concurrent writers. NOTIFY is delivered at commit, takes no row lock and
+collapses duplicates within a transaction; each API worker counts the
+notifications itself.
+
+Revision ID: 015_match_generation_notify
+Revises: 014_embedding_model_versioning
+Create Date: 2026-10-17
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '015_match_generation_notify'
+down_revision = '014_embedding_model_versioning'
+branch_labels = None
+depends_on = None
+
+# Channel listened on by app.services.result_cache
+CHANNEL = 'match_generation'
+
+
+def upgrade() -> None:
+    # The triggers from 011 keep calling this function
+    op.execute(f"""
+        CREATE OR REPLACE FUNCTION bump_match_generation() RETURNS trigger AS $$
+        BEGIN
+            PERFORM pg_notify('{CHANNEL}', '');
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+    op.drop_table('match_generation')
+
+
+def downgrade() -> None:
+    op.create_table(
+        'match_generation',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('generation', sa.BigInteger(), nullable=False, server_default='0'),
+    )
+    op.execute('INSERT INTO match_generation (id, generation) VALUES (1, 0)')
+    op.execute("""
+        CREATE OR REPLACE FUNCTION bump_match_generation() RETURNS trigger AS $$
+        BEGIN
+            UPDATE match_generation SET generation = generation + 1 WHERE id = 1;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
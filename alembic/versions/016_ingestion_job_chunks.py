@@ -0,0 +1,50 @@
+"""Store queued uploads in chunks and schedule job retries
+
+Uploads were stored in a single bytea column, so the API worker had to hold
+the whole file in memory to enqueue it. They are now written and read back
+in fixed-size chunks. Failed attempts are retried after ``retry_at``.
+
+Revision ID: 016_ingestion_job_chunks
+Revises: 015_match_generation_notify
+Create Date: 2026-10-17
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = '016_ingestion_job_chunks'
+down_revision = '015_match_generation_notify'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'ingestion_job_chunk',
+        sa.Column('job_id', postgresql.UUID(as_uuid=True),
+                  sa.ForeignKey('ingestion_job.id', ondelete='CASCADE'), primary_key=True),
+        sa.Column('seq', sa.Integer(), primary_key=True),
+        sa.Column('data', sa.LargeBinary(), nullable=False),
+    )
+    # Jobs still waiting keep their file as a single chunk
+    op.execute("""
+        INSERT INTO ingestion_job_chunk (job_id, seq, data)
+        SELECT id, 0, content FROM ingestion_job WHERE content IS NOT NULL
+    """)
+    op.drop_column('ingestion_job', 'content')
+    op.add_column('ingestion_job', sa.Column('retry_at', sa.DateTime(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('ingestion_job', 'retry_at')
+    op.add_column('ingestion_job', sa.Column('content', sa.LargeBinary(), nullable=True))
+    op.execute("""
+        UPDATE ingestion_job j
+        SET content = (
+            SELECT string_agg(c.data, ''::bytea ORDER BY c.seq)
+            FROM ingestion_job_chunk c WHERE c.job_id = j.id
+        )
+    """)
+    op.drop_table('ingestion_job_chunk')
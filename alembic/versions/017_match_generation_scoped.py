@@ -0,0 +1,136 @@
+"""Scope match result invalidation to the CV pool or to the changed JDs
+
+Every write to cv, jd or cv_jd_match used to send the same notification,
+so each CV upload cleared every worker's whole result cache. Notifications
+now say what changed:
+
+- "cv": CVs were added or removed, or their embedding or skills changed
+- "jd:<id>,...": the match lists of those JDs changed
+- "*": anything else (new or deactivated JDs, truncation, too many ids)
+
+Revision ID: 017_match_generation_scoped
+Revises: 016_ingestion_job_chunks
+Create Date: 2026-10-17
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '017_match_generation_scoped'
+down_revision = '016_ingestion_job_chunks'
+branch_labels = None
+depends_on = None
+
+# Channel listened on by app.services.result_cache
+CHANNEL = 'match_generation'
+TABLES = ('cv', 'jd', 'cv_jd_match')
+# NOTIFY payloads must stay under 8000 bytes
+MAX_PAYLOAD = 7900
+
+TRIGGERS = [
+    # (table, trigger, definition)
+    ('cv', 'cv_notify_match_pool', 'AFTER INSERT OR DELETE ON cv FOR EACH STATEMENT EXECUTE FUNCTION notify_match_pool()'),
+    ('cv', 'cv_notify_match_pool_update',
+     'AFTER UPDATE OF embedding, skill_keys ON cv FOR EACH STATEMENT EXECUTE FUNCTION notify_match_pool()'),
+    ('cv', 'cv_notify_match_all', 'AFTER TRUNCATE ON cv FOR EACH STATEMENT EXECUTE FUNCTION notify_match_all()'),
+    ('jd', 'jd_notify_match_all',
+     'AFTER INSERT OR DELETE OR TRUNCATE ON jd FOR EACH STATEMENT EXECUTE FUNCTION notify_match_all()'),
+    ('jd', 'jd_notify_match_update',
+     'AFTER UPDATE ON jd REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows '
+     'FOR EACH STATEMENT EXECUTE FUNCTION notify_match_jd_update()'),
+    ('cv_jd_match', 'cv_jd_match_notify_insert',
+     'AFTER INSERT ON cv_jd_match REFERENCING NEW TABLE AS changed_rows '
+     'FOR EACH STATEMENT EXECUTE FUNCTION notify_match_jds()'),
+    ('cv_jd_match', 'cv_jd_match_notify_update',
+     'AFTER UPDATE ON cv_jd_match REFERENCING NEW TABLE AS changed_rows '
+     'FOR EACH STATEMENT EXECUTE FUNCTION notify_match_jds()'),
+    ('cv_jd_match', 'cv_jd_match_notify_delete',
+     'AFTER DELETE ON cv_jd_match REFERENCING OLD TABLE AS changed_rows '
+     'FOR EACH STATEMENT EXECUTE FUNCTION notify_match_jds()'),
+    ('cv_jd_match', 'cv_jd_match_notify_truncate',
+     'AFTER TRUNCATE ON cv_jd_match FOR EACH STATEMENT EXECUTE FUNCTION notify_match_all()'),
+]
+
+
+def upgrade() -> None:
+    for table in TABLES:
+        op.execute(f'DROP TRIGGER IF EXISTS {table}_bump_match_generation ON {table}')
+    op.execute('DROP FUNCTION IF EXISTS bump_match_generation()')
+
+    op.execute(f"""
+        CREATE FUNCTION notify_match_pool() RETURNS trigger AS $$
+        BEGIN
+            PERFORM pg_notify('{CHANNEL}', 'cv');
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+    op.execute(f"""
+        CREATE FUNCTION notify_match_all() RETURNS trigger AS $$
+        BEGIN
+            PERFORM pg_notify('{CHANNEL}', '*');
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+    # Statement-level with transition tables: one notification per statement
+    op.execute(f"""
+        CREATE FUNCTION notify_match_jds() RETURNS trigger AS $$
+        DECLARE
+            ids text;
+        BEGIN
+            SELECT string_agg(DISTINCT jd_id::text, ',') INTO ids FROM changed_rows;
+            IF ids IS NULL THEN
+                RETURN NULL;
+            END IF;
+            PERFORM pg_notify('{CHANNEL}', CASE WHEN length(ids) > {MAX_PAYLOAD} THEN '*' ELSE 'jd:' || ids END);
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+    # A changed title or active flag can change which JD a title resolves to
+    op.execute(f"""
+        CREATE FUNCTION notify_match_jd_update() RETURNS trigger AS $$
+        DECLARE
+            ids text;
+        BEGIN
+            IF EXISTS (
+                SELECT 1 FROM old_rows o JOIN new_rows n ON n.id = o.id
+                WHERE o.title IS DISTINCT FROM n.title OR o.is_active IS DISTINCT FROM n.is_active
+            ) THEN
+                PERFORM pg_notify('{CHANNEL}', '*');
+                RETURN NULL;
+            END IF;
+            SELECT string_agg(id::text, ',') INTO ids FROM new_rows;
+            IF ids IS NULL THEN
+                RETURN NULL;
+            END IF;
+            PERFORM pg_notify('{CHANNEL}', CASE WHEN length(ids) > {MAX_PAYLOAD} THEN '*' ELSE 'jd:' || ids END);
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+    for _, trigger, definition in TRIGGERS:
+        op.execute(f'CREATE TRIGGER {trigger} {definition}')
+
+
+def downgrade() -> None:
+    for table, trigger, _ in TRIGGERS:
+        op.execute(f'DROP TRIGGER IF EXISTS {trigger} ON {table}')
+    for function in ('notify_match_pool', 'notify_match_all', 'notify_match_jds', 'notify_match_jd_update'):
+        op.execute(f'DROP FUNCTION IF EXISTS {function}()')
+
+    op.execute(f"""
+        CREATE FUNCTION bump_match_generation() RETURNS trigger AS $$
+        BEGIN
+            PERFORM pg_notify('{CHANNEL}', '');
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+    for table in TABLES:
+        op.execute(f"""
+            CREATE TRIGGER {table}_bump_match_generation
+            AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON {table}
+            FOR EACH STATEMENT EXECUTE FUNCTION bump_match_generation()
+        """)
@@ -0,0 +1,20 @@
+from fastapi import APIRouter, Depends
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.session import get_db
+from app.schemas.admin import VectorIndexResponse
+from app.services.vector_index import describe_indexes
+from app.core.auth import verify_secret_key
+
+router = APIRouter()
+
+
+@router.get("/indexes", response_model=list[VectorIndexResponse], dependencies=[Depends(verify_secret_key)])
+async def list_vector_indexes(db: AsyncSession = Depends(get_db)):
+    """
+    Report pgvector indexes: type, options, size and build state
+    State is "building" while a CONCURRENTLY build runs, "invalid" after a
+    failed build, otherwise "ready". Rebuild with python -m app.cli.vector_index
+    Requires: X-Secret-Key header
+    """
+    return await describe_indexes(db)
@@ -1,53 +1,86 @@
-from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
-from datetime import datetime
+from sqlalchemy.orm import undefer
 import logging
-from io import BytesIO
+import time
+import uuid
+import zipfile
 
 from app.db.session import get_db
 from app.models.cv import CV
-from app.schemas.cv import CVResponse
-from app.services.cv_processor import CVProcessor
-from app.services.embedding import embedding_service
+from app.models.ingestion_job import IngestionJob
+from app.schemas.cv import CVResponse, CVSummary, CVView, CV_VIEWS, FindBestJDsRequest, IngestionJobAccepted, IngestionJobResponse, BulkImportReport
+from app.schemas.jd import JDMatch, JDResponse
+from app.services.bulk_import import bulk_import, iter_zip
+from app.services.ingestion import ingest_cv, filename_for, find_cv_by_hash
+from app.services.upload import SpooledUpload, receive_upload
+from app.services.job_queue import ingestion_queue
+from app.services.matching import search_jds
+from app.services.pagination import NEXT_CURSOR_HEADER, paginate
 from app.core.auth import verify_secret_key
+from app.core.config import settings
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
+BINARY_UPLOAD_BODY = {
+    "requestBody": {
+        "required": True,
+        "content": {
+            "application/pdf": {
+                "schema": {
+                    "type": "string",
+                    "format": "binary"
+                }
+            },
+            "application/vnd.openxmlformats-officedocument.wordprocessingml.document": {
+                "schema": {
+                    "type": "string",
+                    "format": "binary"
+                }
+            },
+            "application/octet-stream": {
+                "schema": {
+                    "type": "string",
+                    "format": "binary"
+                }
+            }
+        }
+    }
+}
+
+
+async def _receive_cv_upload(request: Request, db: AsyncSession) -> tuple[SpooledUpload, str]:
+    """Stream the upload body to a spooled file and reject byte-identical re-uploads"""
+    # Get content type from headers
+    content_type = request.headers.get("content-type", "")
+    logger.info(f"Content-Type: {content_type}")
+
+    upload = await receive_upload(request, settings.UPLOAD_MAX_BYTES)
+    logger.info(f"File size: {upload.size} bytes ({'on disk' if upload.path else 'in memory'})")
+
+    # Short-circuit byte-identical re-uploads before any extraction/LLM work
+    existing_id = await find_cv_by_hash(db, upload.content_hash)
+    # Don't sit in a transaction holding a lock on cv through the extraction and LLM work
+    await db.rollback()
+    if existing_id:
+        upload.close()
+        logger.warning(f"Duplicate upload detected, matches CV {existing_id}")
+        raise HTTPException(status_code=409, detail=f"This file has already been uploaded as CV {existing_id}")
+
+    return upload, content_type
+
 
 @router.post(
     "/upload",
     response_model=CVResponse,
     dependencies=[Depends(verify_secret_key)],
-    openapi_extra={
-        "requestBody": {
-            "required": True,
-            "content": {
-                "application/pdf": {
-                    "schema": {
-                        "type": "string",
-                        "format": "binary"
-                    }
-                },
-                "application/vnd.openxmlformats-officedocument.wordprocessingml.document": {
-                    "schema": {
-                        "type": "string",
-                        "format": "binary"
-                    }
-                },
-                "application/octet-stream": {
-                    "schema": {
-                        "type": "string",
-                        "format": "binary"
-                    }
-                }
-            }
-        }
-    }
+    openapi_extra=BINARY_UPLOAD_BODY
 )
 async def upload_cv(
     request: Request,
+    full_text: bool = False,
     db: AsyncSession = Depends(get_db)
 ):
     """
@@ -56,6 +89,9 @@ async def upload_cv(
     Upload raw binary CV file (PDF or DOCX).
     Automatically extracts: name, email, phone, skills, summary
 
+    Text extraction stops once enough text is collected for parsing and
+    matching; pass `?full_text=true` to store the complete document text.
+
     **Request Format:**
     - Send raw binary file content in request body
     - Set Content-Type header to: application/pdf or application/vnd.openxmlformats-officedocument.wordprocessingml.document
@@ -83,124 +119,159 @@ async def upload_cv(
     ```
     """
     logger.info("=== CV Upload Request Started ===")
+    deadline = time.monotonic() + settings.CV_UPLOAD_BUDGET_SECONDS
 
-    # Get content type from headers
-    content_type = request.headers.get("content-type", "")
-    logger.info(f"Content-Type: {content_type}")
-
-    # Read binary content
-    file_content = await request.body()
-    file_size = len(file_content)
-    logger.info(f"File size: {file_size} bytes")
+    upload, content_type = await _receive_cv_upload(request, db)
 
-    if not file_content:
-        raise HTTPException(status_code=400, detail="No file content provided")
+    try:
+        cv = await ingest_cv(
+            db,
+            upload.source(),
+            content_type,
+            content_hash=upload.content_hash,
+            filename=filename_for(content_type),
+            deadline=deadline,
+            full_text=full_text
+        )
+    except Exception as e:
+        logger.error(f"CV ingestion failed: {str(e)}", exc_info=not isinstance(e, HTTPException))
+        raise
+    finally:
+        upload.close()
 
-    # Determine filename from content type
-    if "pdf" in content_type.lower():
-        filename = "uploaded_cv.pdf"
-    elif "word" in content_type.lower() or "document" in content_type.lower():
-        filename = "uploaded_cv.docx"
-    else:
-        filename = "uploaded_cv"
+    logger.info(f"=== CV Upload Successful === ID: {cv.id}, Name: {cv.candidate_name}, Email: {cv.email}")
+    return cv
 
-    # Create mock UploadFile object for CVProcessor
-    class MockUploadFile:
-        def __init__(self, content: bytes, filename: str, content_type: str):
-            self.file = BytesIO(content)
-            self.filename = filename
-            self.content_type = content_type
 
-        async def read(self):
-            return self.file.getvalue()
+@router.post(
+    "/upload/async",
+    response_model=IngestionJobAccepted,
+    status_code=202,
+    dependencies=[Depends(verify_secret_key)],
+    openapi_extra=BINARY_UPLOAD_BODY
+)
+async def upload_cv_async(
+    request: Request,
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Upload CV for background processing
 
-    mock_file = MockUploadFile(file_content, filename, content_type)
+    Same request format as `/upload`, but the file is persisted to the
+    ingestion queue and acknowledged immediately with `202 Accepted`.
+    Poll `GET /api/cv/jobs/{job_id}` for per-stage status and the CV id.
+    Requires: X-Secret-Key header
+    """
+    upload, content_type = await _receive_cv_upload(request, db)
 
-    # Extract and parse CV
-    logger.info("Starting CV extraction and parsing")
     try:
-        cv_data = await CVProcessor.extract_and_parse(mock_file)
-        logger.info(f"CV extraction successful. Extracted data keys: {list(cv_data.keys())}")
-    except Exception as e:
-        logger.error(f"CV extraction failed: {str(e)}", exc_info=True)
-        raise
+        job = await ingestion_queue.find_pending(db, upload.content_hash)
+        if job is None:
+            job = await ingestion_queue.enqueue(db, upload, content_type)
+            logger.info(f"Queued ingestion job {job.id} ({upload.size} bytes)")
+    finally:
+        upload.close()
 
-    # Validate required fields
-    logger.info("Validating required fields")
-    if not cv_data.get("email"):
-        raise HTTPException(
-            status_code=400,
-            detail="Could not extract email from CV. Please ensure CV contains email address."
-        )
+    return IngestionJobAccepted(job_id=job.id, status=job.status, status_url=f"/api/cv/jobs/{job.id}")
+
+
+@router.post(
+    "/bulk-import",
+    response_model=BulkImportReport,
+    dependencies=[Depends(verify_secret_key)],
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {
+                "application/zip": {
+                    "schema": {
+                        "type": "string",
+                        "format": "binary"
+                    }
+                }
+            }
+        }
+    }
+)
+async def bulk_import_cvs(
+    request: Request,
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Bulk import CVs from a ZIP archive
 
-    if not cv_data.get("candidate_name"):
-        raise HTTPException(status_code=400, detail="Could not extract name from CV. Please ensure CV contains candidate name.")
-
-    logger.info(f"Extracted candidate: {cv_data['candidate_name']}, email: {cv_data['email']}")
-
-    # Check if email already exists
-    logger.info(f"Checking if email already exists: {cv_data['email']}")
-    result = await db.execute(select(CV).where(CV.email == cv_data["email"]))
-    if result.scalar_one_or_none():
-        logger.warning(f"CV with email {cv_data['email']} already exists")
-        raise HTTPException(status_code=400, detail=f"CV with email {cv_data['email']} already exists")
-
-    # Create CV
-    logger.info("Creating CV record in database")
-    cv = CV(
-        candidate_name=cv_data["candidate_name"],
-        email=cv_data["email"],
-        phone=cv_data.get("phone"),
-        raw_text=cv_data["raw_text"],
-        summary=cv_data.get("summary"),
-        skills=cv_data.get("skills"),
-        file_name=filename,
-        file_type=cv_data["file_type"]
+    Send a ZIP of PDF/DOCX files as the raw request body
+    (Content-Type: application/zip). Returns a per-file report of created CVs,
+    duplicates and failures.
+    Requires: X-Secret-Key header
+
+    For very large imports prefer the CLI: `python -m app.cli.bulk_import <dir-or-zip>`
+    """
+    archive = await receive_upload(
+        request,
+        settings.BULK_IMPORT_MAX_ARCHIVE_BYTES,
+        allowed_types=("zip",),
+        description="ZIP archives"
     )
 
-    # Generate embedding
-    logger.info("Generating embedding for CV text")
+    logger.info(f"Bulk import started ({archive.size} bytes)")
     try:
-        text_length = len(cv_data["raw_text"])
-        logger.info(f"Text length for embedding: {text_length} characters")
-        embedding = embedding_service.generate(cv_data["raw_text"])
-        cv.embedding = embedding
-        cv.embedding_generated = True
-        cv.embedding_generated_at = datetime.utcnow()
-        logger.info(f"Embedding generated successfully. Dimension: {len(embedding)}")
-    except Exception as e:
-        logger.error(f"Embedding generation failed: {str(e)}", exc_info=True)
-        cv.embedding_generated = False
+        report = await bulk_import(db, iter_zip(archive.source()))
+    except zipfile.BadZipFile:
+        raise HTTPException(status_code=400, detail="Request body is not a valid ZIP archive")
+    finally:
+        archive.close()
 
-    logger.info("Saving CV to database")
-    db.add(cv)
-    await db.commit()
-    await db.refresh(cv)
+    logger.info(
+        f"Bulk import finished: {report['created']} created, "
+        f"{report['duplicates']} duplicates, {report['failed']} failed"
+    )
+    return report
 
-    logger.info(f"=== CV Upload Successful === ID: {cv.id}, Name: {cv.candidate_name}, Email: {cv.email}")
-    return cv
+
+@router.get("/jobs/{job_id}", response_model=IngestionJobResponse, dependencies=[Depends(verify_secret_key)])
+async def get_ingestion_job(
+    job_id: uuid.UUID,
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Get status of a background CV ingestion job
+    Requires: X-Secret-Key header
+    """
+    job = await db.get(IngestionJob, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail=f"Ingestion job '{job_id}' not found")
+    return job
 
 
-@router.get("/list", response_model=list[CVResponse], dependencies=[Depends(verify_secret_key)])
+@router.get("/list", response_model=list[CVResponse | CVSummary], dependencies=[Depends(verify_secret_key)])
 async def list_cvs(
-    skip: int = 0,
-    limit: int = 100,
+    response: Response,
+    cursor: str = None,
+    skip: int = Query(default=0, ge=0, deprecated=True),
+    limit: int = Query(default=100, ge=1, le=1000),
     search: str = None,
+    view: CVView = "full",
     db: AsyncSession = Depends(get_db)
 ):
     """
-    Get list of all CVs with optional search
+    Get list of all CVs with optional search, newest first
     Requires: X-Secret-Key header
     Query params:
-    - skip: Number of records to skip (default: 0)
+    - cursor: Value of the X-Next-Cursor header from the previous page (optional)
+    - skip: Number of records to skip (deprecated, use cursor)
     - limit: Maximum number of records to return (default: 100)
     - search: Search by candidate name or email (optional)
+    - view: "summary" omits raw_text, which is then never read from the database (default: full)
+    The X-Next-Cursor response header is set while more records follow
     """
-    logger.info(f"List CVs request - skip: {skip}, limit: {limit}, search: {search}")
+    logger.info(f"List CVs request - cursor: {cursor}, skip: {skip}, limit: {limit}, search: {search}, view: {view}")
 
     query = select(CV)
+    if view == "full":
+        query = query.options(undefer(CV.raw_text))
 
-    # Add search filter if provided
+    # Add search filter if provided (served by the pg_trgm indexes)
     if search:
         search_term = f"%{search}%"
         query = query.where(
@@ -209,9 +280,38 @@ async def list_cvs(
         )
         logger.info(f"Applying search filter: {search_term}")
 
-    query = query.offset(skip).limit(limit).order_by(CV.created_at.desc())
-    result = await db.execute(query)
-    cvs = result.scalars().all()
+    cvs, next_cursor = await paginate(db, query, CV, limit, cursor=cursor, skip=skip)
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
 
     logger.info(f"Returning {len(cvs)} CV records")
-    return cvs
+    schema = CV_VIEWS[view]
+    return [schema.model_validate(cv) for cv in cvs]
+
+
+@router.post("/{cv_id}/find-best-jds", response_model=list[JDMatch], dependencies=[Depends(verify_secret_key)])
+async def find_best_jds(
+    cv_id: uuid.UUID,
+    request: FindBestJDsRequest | None = None,
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Find best matching active JDs for a CV
+    Accepts optional JSON with top_k (default: 5); scores match find-best-cvs
+    Requires: X-Secret-Key header
+    """
+    request = request or FindBestJDsRequest()
+
+    result = await db.execute(select(CV.embedding_generated, CV.embedding).where(CV.id == cv_id))
+    cv = result.one_or_none()
+    if not cv:
+        raise HTTPException(status_code=404, detail=f"CV '{cv_id}' not found")
+
+    if not cv.embedding_generated or cv.embedding is None or len(cv.embedding) == 0:
+        raise HTTPException(status_code=400, detail="CV embedding not available")
+
+    results = await search_jds(db, cv.embedding, request.top_k, ef_search=request.ef_search, probes=request.probes)
+    return [
+        JDMatch(jd=JDResponse.model_validate(dict(row)), similarity_score=score)
+        for row, score in results
+    ]
@@ -1,19 +1,30 @@
-from fastapi import APIRouter, Depends, HTTPException
+import logging
+import uuid
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, text
-from datetime import datetime
+from sqlalchemy import select, or_, func, literal_column
 
 from app.db.session import get_db
 from app.models.jd import JD
 from app.models.cv import CV
-from app.schemas.jd import JDCreate, JDResponse, FindBestCVsRequest, ContactCandidateRequest
-from app.schemas.cv import CVMatch, CVResponse
-from app.services.embedding import embedding_service
+from app.schemas.jd import JDCreate, JDResponse, FindBestCVsRequest, FindBestCVsBatchRequest, ContactCandidateRequest
+from app.schemas.cv import CVMatch, CV_VIEWS, BatchMatchResult
+from app.services.embedding_models import embedding_values, pin_embedding_columns
 from app.services.email import EmailService
+from app.services import match_table
+from app.core.config import settings
+from app.services.matching import CV_VIEW_COLUMNS, blend_scores, hydrate_cvs, normalize_skills, search_cvs, search_cvs_batch
+from app.services.pagination import NEXT_CURSOR_HEADER, paginate
+from app.services.result_cache import result_cache
 from app.core.auth import verify_secret_key
 
+logger = logging.getLogger(__name__)
+
 router = APIRouter()
 
+# Must match the expression of the ix_jd_requirements_fts index
+REQUIREMENTS_TSVECTOR = func.to_tsvector(literal_column("'english'"), JD.requirements)
+
 
 @router.post("/create", response_model=JDResponse, dependencies=[Depends(verify_secret_key)])
 async def create_jd(
@@ -38,22 +49,31 @@ async def create_jd(
         description=jd_data.requirements,
         requirements=jd_data.requirements,
         responsibilities=None,
+        required_skills=jd_data.required_skills,
+        preferred_skills=jd_data.preferred_skills,
         employment_type=None,
         experience_level=None
     )
 
-    # Generate embedding
-    try:
-        embedding = embedding_service.generate(jd_text)
-        jd.embedding = embedding
-        jd.embedding_generated = True
-        jd.embedding_generated_at = datetime.utcnow()
-    except Exception as e:
-        print(f"Embedding generation failed: {e}")
-        jd.embedding_generated = False
+    # Generate embedding (a failure leaves embedding_generated false for the backfill);
+    # columns are pinned in the INSERT's transaction so a cutover cannot mix models
+    values = await embedding_values([jd_text])
+    for column, value in (await pin_embedding_columns(db, values))[0].items():
+        setattr(jd, column, value)
 
     db.add(jd)
     await db.commit()
+    # A new JD can change which JD a cached title resolves to
+    result_cache.invalidate_all()
+    await db.refresh(jd)
+
+    try:
+        await match_table.compute_for_jd(db, jd)
+    except Exception as e:
+        # find-best-cvs falls back to a live search until the list exists;
+        # log before the rollback expires the JD's attributes
+        logger.error(f"Could not compute the match list for JD {jd.id}: {e}", exc_info=True)
+        await db.rollback()
     await db.refresh(jd)
 
     return jd
@@ -61,20 +81,24 @@ async def create_jd(
 
 @router.get("/list", response_model=list[JDResponse], dependencies=[Depends(verify_secret_key)])
 async def list_jds(
-    skip: int = 0,
-    limit: int = 100,
+    response: Response,
+    cursor: str = None,
+    skip: int = Query(default=0, ge=0, deprecated=True),
+    limit: int = Query(default=100, ge=1, le=1000),
     active_only: bool = True,
     search: str = None,
     db: AsyncSession = Depends(get_db)
 ):
     """
-    Get list of all job descriptions with optional search
+    Get list of all job descriptions with optional search, newest first
     Requires: X-Secret-Key header
     Query params:
-    - skip: Number of records to skip (default: 0)
+    - cursor: Value of the X-Next-Cursor header from the previous page (optional)
+    - skip: Number of records to skip (deprecated, use cursor)
     - limit: Maximum number of records to return (default: 100)
     - active_only: Only return active job descriptions (default: true)
-    - search: Search by job title or requirements (optional)
+    - search: Search by job title (substring) or requirements (full-text words) (optional)
+    The X-Next-Cursor response header is set while more records follow
     """
     query = select(JD)
 
@@ -82,18 +106,19 @@ async def list_jds(
     if active_only:
         query = query.where(JD.is_active == True)
 
-    # Add search filter if provided
+    # Add search filter if provided; the title trigram index and the
+    # requirements full-text index are combined with a bitmap OR
     if search:
         search_term = f"%{search}%"
         query = query.where(
             (JD.title.ilike(search_term)) |
-            (JD.requirements.ilike(search_term))
+            (REQUIREMENTS_TSVECTOR.bool_op("@@")(func.plainto_tsquery(literal_column("'english'"), search)))
         )
 
-    query = query.offset(skip).limit(limit).order_by(JD.created_at.desc())
-
-    result = await db.execute(query)
-    return result.scalars().all()
+    jds, next_cursor = await paginate(db, query, JD, limit, cursor=cursor, skip=skip)
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    return jds
 
 
 @router.post("/find-best-cvs", response_model=list[CVMatch], dependencies=[Depends(verify_secret_key)])
@@ -104,8 +129,41 @@ async def find_best_cvs(
     """
     API 3: Find best matching CVs for a JD
     Accepts JSON with job_title and optional top_k (default: 5)
+    and view ("summary" omits raw_text; default: full)
+    must_have_skills filters CVs; the score blends vector similarity with
+    overlap against the JD's skills, preferred_skills and must_have_skills
     Requires: X-Secret-Key header
     """
+    generation = result_cache.current_generation()
+    if generation is None:
+        results, _, _ = await _find_best_cvs(request, db)
+    else:
+        # Keyed by title: new JDs, which can change what a title resolves to, invalidate everything
+        key = (
+            "find-best-cvs", request.job_title, request.top_k, request.ef_search, request.probes, request.view,
+            tuple(sorted(normalize_skills(request.must_have_skills))),
+            tuple(sorted(normalize_skills(request.preferred_skills))),
+        )
+        cached = result_cache.get(key)
+        if cached is not None:
+            results = await hydrate_cvs(db, cached, CV_VIEW_COLUMNS[request.view])
+        else:
+            results = await result_cache.compute(key, generation, lambda: _find_best_cvs(request, db))
+
+    schema = CV_VIEWS[request.view]
+    matches = [
+        CVMatch(cv=schema.model_validate(dict(row)), similarity_score=score)
+        for row, score in results
+    ]
+
+    return matches
+
+
+async def _find_best_cvs(
+    request: FindBestCVsRequest,
+    db: AsyncSession
+) -> tuple[list[tuple[dict, float]], uuid.UUID, bool]:
+    """Matches, plus the JD they were ranked for and whether a live search (not the match table) produced them"""
     # Get JD by title (most recent active one)
     result = await db.execute(
         select(JD)
@@ -122,45 +180,78 @@ async def find_best_cvs(
     if not jd.embedding_generated or jd.embedding is None or len(jd.embedding) == 0:
         raise HTTPException(status_code=400, detail="JD embedding not available")
 
-    # Find matching CVs using vector similarity
-    embedding_str = f"[{','.join(map(str, jd.embedding))}]"
-
-    query = text("""
-        SELECT
-            id, candidate_name, email, phone, raw_text, summary,
-            skills, experience, education, file_name, file_type,
-            embedding_generated, embedding_generated_at, created_at, updated_at,
-            (1 - (embedding <=> CAST(:jd_embedding AS vector))) as similarity_score
-        FROM cv
-        WHERE embedding IS NOT NULL
-        ORDER BY embedding <=> CAST(:jd_embedding AS vector)
-        LIMIT :limit
-    """)
-
-    result = await db.execute(query, {"jd_embedding": embedding_str, "limit": request.top_k})
-    rows = result.fetchall()
-
-    matches = []
-    for row in rows:
-        cv_data = {
-            "id": row.id,
-            "candidate_name": row.candidate_name,
-            "email": row.email,
-            "phone": row.phone,
-            "raw_text": row.raw_text,
-            "summary": row.summary,
-            "skills": row.skills,
-            "experience": row.experience,
-            "education": row.education,
-            "file_name": row.file_name,
-            "file_type": row.file_type,
-            "embedding_generated": row.embedding_generated,
-            "created_at": row.created_at,
-            "updated_at": row.updated_at,
-        }
-        matches.append(CVMatch(cv=CVResponse(**cv_data), similarity_score=float(row.similarity_score)))
+    must_have = normalize_skills(request.must_have_skills)
+    wanted = normalize_skills(must_have + request.preferred_skills + (jd.required_skills or []) + (jd.preferred_skills or []))
+    # Over-fetch vector candidates when skill overlap will re-rank them
+    candidates = request.top_k * settings.SKILL_RERANK_FACTOR if wanted and settings.SKILL_SCORE_WEIGHT else request.top_k
+
+    # Serve from the materialized match table when it covers the candidates
+    # (it cannot apply filters), otherwise find matching CVs using vector similarity
+    columns = CV_VIEW_COLUMNS[request.view]
+    results = None if must_have else await match_table.served_matches(db, jd, candidates, columns)
+    live_search = results is None
+    if live_search:
+        results = await search_cvs(
+            db, jd.embedding, candidates, ef_search=request.ef_search, probes=request.probes,
+            columns=columns, must_have=must_have
+        )
+    return blend_scores(results, wanted, request.top_k), jd.id, live_search
 
-    return matches
+
+@router.post("/find-best-cvs/batch", response_model=list[BatchMatchResult], dependencies=[Depends(verify_secret_key)])
+async def find_best_cvs_batch(
+    request: FindBestCVsBatchRequest,
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Find best matching CVs for many JDs in one call
+    Accepts JSON with items (each a job_title or jd_id, plus optional top_k)
+    and view ("summary" omits raw_text; default: full)
+    Results are returned in request order; an unknown JD yields an error
+    entry instead of failing the whole batch
+    Requires: X-Secret-Key header
+    """
+    jd_ids = list({item.jd_id for item in request.items if item.jd_id})
+    titles = list({item.job_title for item in request.items if item.job_title})
+
+    # Resolve every JD with one query; the most recent active JD wins per title
+    result = await db.execute(
+        select(JD.id, JD.title, JD.embedding, JD.embedding_generated)
+        .where(JD.is_active == True)
+        .where(or_(JD.id.in_(jd_ids), JD.title.in_(titles)))
+        .order_by(JD.created_at.desc())
+    )
+    by_id, by_title = {}, {}
+    for jd in result.all():
+        by_id[jd.id] = jd
+        by_title.setdefault(jd.title, jd)
+
+    results = []
+    queries = []  # (result index, (jd_id, embedding, top_k))
+    for item in request.items:
+        jd = by_id.get(item.jd_id) if item.jd_id else by_title.get(item.job_title)
+        entry = BatchMatchResult(job_title=item.job_title, jd_id=item.jd_id)
+        if not jd:
+            entry.error = f"Active job description '{item.jd_id or item.job_title}' not found"
+        elif not jd.embedding_generated or jd.embedding is None or len(jd.embedding) == 0:
+            entry.error = "JD embedding not available"
+        else:
+            entry.jd_id, entry.job_title = jd.id, jd.title
+            queries.append((len(results), (jd.id, jd.embedding, item.top_k)))
+        results.append(entry)
+
+    groups = await search_cvs_batch(
+        db, [query for _, query in queries], ef_search=request.ef_search, probes=request.probes,
+        columns=CV_VIEW_COLUMNS[request.view]
+    )
+    schema = CV_VIEWS[request.view]
+    for (index, _), group in zip(queries, groups):
+        results[index].matches = [
+            CVMatch(cv=schema.model_validate(dict(row)), similarity_score=score)
+            for row, score in group
+        ]
+
+    return results
 
 
 @router.post("/contact-candidate", dependencies=[Depends(verify_secret_key)])
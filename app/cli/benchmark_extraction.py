@@ -0,0 +1,103 @@
+"""
+Benchmark PDF/DOCX extraction engines on a fixture corpus
+
+Every file is extracted in-process (no budget) by each engine, repeated
+``--repeat`` times. Reports latency per engine and how closely each engine's
+words agree with pdfplumber, the layout-aware reference.
+
+Usage:
+    python -m app.cli.benchmark_extraction /path/to/fixtures [--repeat 3] [--engines pdfium pdfplumber auto]
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+from app.services.extraction_engines import PDF_ENGINES, extract_document
+
+FILE_TYPES = {".pdf": "pdf", ".docx": "docx"}
+
+
+def corpus(path: str) -> list[tuple[str, str, bytes]]:
+    files = []
+    for root, _, names in os.walk(path):
+        for name in sorted(names):
+            file_type = FILE_TYPES.get(os.path.splitext(name)[1].lower())
+            if file_type is None:
+                continue
+            full_path = os.path.join(root, name)
+            with open(full_path, "rb") as f:
+                files.append((os.path.relpath(full_path, path), file_type, f.read()))
+    return files
+
+
+def word_agreement(text: str, reference: str) -> float:
+    """Jaccard similarity of the word sets of two extractions"""
+    words, reference_words = set(text.split()), set(reference.split())
+    if not words and not reference_words:
+        return 1.0
+    return len(words & reference_words) / len(words | reference_words)
+
+
+def run(files: list[tuple[str, str, bytes]], engines: list[str], repeat: int) -> dict:
+    results = {engine: {"times": [], "chars": 0, "agreement": [], "engines_used": {}, "errors": 0} for engine in engines}
+    for name, file_type, content in files:
+        try:
+            reference, _, _ = extract_document(content, file_type, "pdfplumber")
+        except Exception as e:
+            print(f"  [skipped] {name}: {e}", file=sys.stderr)
+            continue
+        for engine in engines:
+            result = results[engine]
+            try:
+                for _ in range(repeat):
+                    started = time.perf_counter()
+                    text, _, used = extract_document(content, file_type, engine)
+                    result["times"].append((time.perf_counter() - started) * 1000)
+            except Exception as e:
+                result["errors"] += 1
+                print(f"  [{engine}] {name}: {e}", file=sys.stderr)
+                continue
+            result["chars"] += len(text)
+            result["agreement"].append(word_agreement(text, reference))
+            result["engines_used"][used] = result["engines_used"].get(used, 0) + 1
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark extraction engines on a fixture corpus")
+    parser.add_argument("path", help="Directory of PDF/DOCX fixture files")
+    parser.add_argument("--repeat", type=int, default=3, help="Extractions per file and engine (default: 3)")
+    parser.add_argument("--engines", nargs="+", default=list(PDF_ENGINES), choices=PDF_ENGINES)
+    args = parser.parse_args()
+
+    if not os.path.isdir(args.path):
+        print(f"Directory not found: {args.path}", file=sys.stderr)
+        sys.exit(1)
+
+    files = corpus(args.path)
+    if not files:
+        print(f"No PDF/DOCX files under {args.path}", file=sys.stderr)
+        sys.exit(1)
+
+    print(f"Benchmarking {len(files)} files x {args.repeat} runs")
+    results = run(files, args.engines, args.repeat)
+
+    print(f"{'engine':<12} {'mean ms':>9} {'p95 ms':>9} {'total s':>9} {'chars':>10} {'agreement':>10}  used")
+    for engine, result in results.items():
+        times = sorted(result["times"])
+        if not times:
+            print(f"{engine:<12} no successful runs ({result['errors']} errors)")
+            continue
+        p95 = times[min(len(times) - 1, int(len(times) * 0.95))]
+        agreement = statistics.mean(result["agreement"])
+        used = ", ".join(f"{name}={count}" for name, count in sorted(result["engines_used"].items()))
+        print(
+            f"{engine:<12} {statistics.mean(times):>9.1f} {p95:>9.1f} {sum(times) / 1000:>9.2f} "
+            f"{result['chars']:>10} {agreement:>10.3f}  {used}"
+        )
+
+
+if __name__ == "__main__":
+    main()
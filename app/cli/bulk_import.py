@@ -0,0 +1,65 @@
+"""
+Bulk import CVs from a directory or ZIP archive
+
+Usage:
+    python -m app.cli.bulk_import /path/to/cvs [--workers 8] [--chunk-size 64] [--report report.json]
+    python -m app.cli.bulk_import /path/to/cvs.zip
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import sys
+
+from app.db.session import AsyncSessionLocal
+from app.services.bulk_import import bulk_import, iter_directory, iter_zip
+from app.services.extraction import extraction_executor
+from app.services.llm import llm_client
+
+
+async def run(path: str, chunk_size: int | None) -> dict:
+    entries = iter_directory(path) if os.path.isdir(path) else iter_zip(path)
+    try:
+        async with AsyncSessionLocal() as db:
+            return await bulk_import(db, entries, chunk_size=chunk_size)
+    finally:
+        extraction_executor.shutdown()
+        await llm_client.aclose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk import CVs from a directory or ZIP archive")
+    parser.add_argument("path", help="Directory of PDF/DOCX files, or a ZIP archive")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="Extraction worker processes (default: CPU count)")
+    parser.add_argument("--chunk-size", type=int, default=None, help="Files per batch (default: BULK_IMPORT_CHUNK_SIZE)")
+    parser.add_argument("--report", help="Write the per-file report as JSON to this path")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+
+    if not os.path.exists(args.path):
+        print(f"Path not found: {args.path}", file=sys.stderr)
+        sys.exit(1)
+
+    # Size the extraction pool for this run before it is first used
+    extraction_executor.workers = args.workers
+
+    report = asyncio.run(run(args.path, args.chunk_size))
+
+    print(
+        f"Processed {report['total']} files: {report['created']} created, "
+        f"{report['duplicates']} duplicates, {report['failed']} failed"
+    )
+    for item in report["results"]:
+        if item["status"] != "created":
+            print(f"  [{item['status']}] {item['file']}: {item.get('detail')}")
+
+    if args.report:
+        with open(args.report, "w") as f:
+            json.dump(report, f, indent=2, default=str)
+        print(f"Report written to {args.report}")
+
+
+if __name__ == "__main__":
+    main()
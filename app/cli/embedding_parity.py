@@ -0,0 +1,145 @@
+"""
+Check that an embedding backend scores like the reference backend
+
+Usage:
+    python -m app.cli.embedding_parity check --backend onnx-int8 [--reference torch] [--samples 500] [--tolerance 0.02]
+    python -m app.cli.embedding_parity check --backend onnx --texts texts.txt
+    python -m app.cli.embedding_parity export [--model MODEL_NAME]
+
+Stored vectors were written by the reference backend, so what matters is
+how a query embedded by the candidate backend scores against them. The
+sample texts are re-encoded with the reference backend to stand in for the
+stored vectors (the check does not read vectors from the database), and for
+every pair of sample texts the drift is
+|cos(candidate(q), reference(d)) - cos(reference(q), reference(d))|.
+The check exits 1 if the maximum drift exceeds the tolerance; within it,
+switching EMBEDDING_BACKEND needs no re-embedding.
+"""
+import argparse
+import asyncio
+import logging
+import sys
+import time
+
+import numpy as np
+from sqlalchemy import func, select
+
+from app.core.config import settings
+from app.db.session import AsyncSessionLocal, engine
+from app.models.cv import CV
+from app.models.jd import JD
+from app.services.embedding_backends import BACKENDS, export_onnx, load_backend
+
+
+async def sample_texts(samples: int) -> list[str]:
+    """Random CV texts and JD title + requirements, half and half"""
+    try:
+        async with AsyncSessionLocal() as db:
+            cvs = await db.execute(
+                select(CV.raw_text).where(CV.raw_text != "").order_by(func.random()).limit(samples - samples // 2)
+            )
+            jds = await db.execute(
+                select(JD.title + " " + JD.requirements).order_by(func.random()).limit(samples // 2)
+            )
+            return list(cvs.scalars()) + list(jds.scalars())
+    finally:
+        await engine.dispose()
+
+
+def timed_encode(backend, texts: list[str], batch_size: int) -> tuple[np.ndarray, float]:
+    # Warm up so one-off graph optimisation is not counted
+    backend.encode(texts[:batch_size], batch_size)
+    started = time.perf_counter()
+    embeddings = backend.encode(texts, batch_size)
+    return np.asarray(embeddings, dtype=np.float32), len(texts) / (time.perf_counter() - started)
+
+
+def compare(reference: np.ndarray, candidate: np.ndarray, top_k: int) -> dict:
+    self_cosine = (reference * candidate).sum(axis=1)
+    reference_scores = reference @ reference.T
+    candidate_scores = candidate @ reference.T
+    drift = np.abs(candidate_scores - reference_scores)
+
+    k = min(top_k, len(reference) - 1)
+    overlaps = []
+    for i in range(len(reference)):
+        # Rank the other texts for text i as the query, excluding itself
+        ref_row = np.delete(reference_scores[i], i)
+        cand_row = np.delete(candidate_scores[i], i)
+        ref_top = set(np.argsort(-ref_row)[:k])
+        cand_top = set(np.argsort(-cand_row)[:k])
+        overlaps.append(len(ref_top & cand_top) / k if k else 1.0)
+
+    return {
+        "min_self_cosine": float(self_cosine.min()),
+        "mean_self_cosine": float(self_cosine.mean()),
+        "max_drift": float(drift.max()),
+        "p99_drift": float(np.percentile(drift, 99)),
+        "mean_drift": float(drift.mean()),
+        "top_k_overlap": float(np.mean(overlaps)),
+    }
+
+
+def check(args) -> bool:
+    if args.texts:
+        with open(args.texts) as f:
+            texts = [line.strip() for line in f if line.strip()]
+    else:
+        texts = asyncio.run(sample_texts(args.samples))
+    if len(texts) < 2:
+        print("Need at least two sample texts", file=sys.stderr)
+        sys.exit(1)
+
+    print(f"Model {args.model}, {len(texts)} texts, {args.threads or 'default'} threads")
+    reference_backend = load_backend(args.reference, args.model, args.threads)
+    reference, reference_rate = timed_encode(reference_backend, texts, args.batch_size)
+    del reference_backend
+    candidate_backend = load_backend(args.backend, args.model, args.threads)
+    candidate, candidate_rate = timed_encode(candidate_backend, texts, args.batch_size)
+
+    report = compare(reference, candidate, args.top_k)
+    print(f"{args.reference:>12}: {reference_rate:8.1f} texts/s")
+    print(f"{args.backend:>12}: {candidate_rate:8.1f} texts/s ({candidate_rate / reference_rate:.2f}x)")
+    print(
+        f"self cosine min {report['min_self_cosine']:.5f} mean {report['mean_self_cosine']:.5f}; "
+        f"score drift max {report['max_drift']:.5f} p99 {report['p99_drift']:.5f} mean {report['mean_drift']:.5f}; "
+        f"top-{args.top_k} overlap {report['top_k_overlap']:.3f}"
+    )
+
+    if report["max_drift"] > args.tolerance:
+        print(f"FAIL: max drift {report['max_drift']:.5f} exceeds tolerance {args.tolerance}")
+        return False
+    print(f"OK: within tolerance {args.tolerance}; {args.backend} can serve vectors stored by {args.reference}")
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare embedding backends against a reference")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    check_parser = commands.add_parser("check", help="Measure score drift and throughput of a backend")
+    check_parser.add_argument("--backend", choices=sorted(BACKENDS), default=settings.EMBEDDING_BACKEND)
+    check_parser.add_argument("--reference", choices=sorted(BACKENDS), default="torch")
+    check_parser.add_argument("--model", default=settings.EMBEDDING_MODEL_NAME)
+    check_parser.add_argument("--samples", type=int, default=500, help="Texts sampled from the database (default: 500)")
+    check_parser.add_argument("--texts", help="File with one sample text per line instead of sampling the database")
+    check_parser.add_argument("--tolerance", type=float, default=0.02, help="Maximum allowed score drift (default: 0.02)")
+    check_parser.add_argument("--top-k", type=int, default=10, help="Ranking depth for the overlap measure (default: 10)")
+    check_parser.add_argument("--batch-size", type=int, default=settings.EMBEDDING_BATCH_SIZE)
+    check_parser.add_argument("--threads", type=int, default=settings.EMBEDDING_THREADS)
+
+    export_parser = commands.add_parser("export", help="Pre-build the ONNX export (fp32 and int8)")
+    export_parser.add_argument("--model", default=settings.EMBEDDING_MODEL_NAME)
+
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+
+    if args.command == "export":
+        path = export_onnx(args.model, settings.EMBEDDING_ONNX_DIR)
+        print(f"ONNX export of {args.model} at {path}")
+    elif not check(args):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
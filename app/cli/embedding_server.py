@@ -0,0 +1,70 @@
+"""
+Run the shared embedding server for all API workers on this host
+
+Usage:
+    python -m app.cli.embedding_server [--socket data/embedding.sock] [--no-preload]
+    python -m app.cli.embedding_server stats [--socket data/embedding.sock]
+
+Start it before (or alongside) uvicorn and point the workers at it with
+EMBEDDING_SOCKET. The active model, and the next one during a model swap,
+are loaded and warmed before the socket opens, so no request pays for it.
+"""
+import argparse
+import asyncio
+import json
+import logging
+
+from app.core.config import settings
+from app.db.session import AsyncSessionLocal, engine
+from app.services.embedding import EmbeddingService
+from app.services.embedding_models import model_state
+from app.services.embedding_server import EmbeddingClient, EmbeddingServer
+
+logger = logging.getLogger(__name__)
+
+
+async def models_to_preload() -> list[str]:
+    try:
+        async with AsyncSessionLocal() as db:
+            return [model for model in await model_state(db) if model]
+    except Exception as e:
+        logger.warning(f"Could not read the embedding model state, preloading {settings.EMBEDDING_MODEL_NAME}: {e}")
+        return [settings.EMBEDDING_MODEL_NAME]
+    finally:
+        await engine.dispose()
+
+
+async def serve(socket_path: str, preload: bool):
+    service = EmbeddingService(remote=False)
+    if preload:
+        for model_name in await models_to_preload():
+            await asyncio.to_thread(service._encode_batch, ["warm up"], model_name)
+            logger.info(f"Preloaded {model_name}")
+    await EmbeddingServer(service, socket_path).serve_forever()
+
+
+async def stats(socket_path: str):
+    client = EmbeddingClient(socket_path, settings.EMBEDDING_SOCKET_TIMEOUT)
+    print(json.dumps(await client.stats(), indent=2))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Shared embedding server for the API workers")
+    parser.add_argument("command", nargs="?", choices=["serve", "stats"], default="serve")
+    parser.add_argument("--socket", default=settings.EMBEDDING_SOCKET or "data/embedding.sock",
+                        help="Unix socket path (default: EMBEDDING_SOCKET or data/embedding.sock)")
+    parser.add_argument("--no-preload", action="store_true", help="Load models on first request instead of at startup")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+
+    if args.command == "stats":
+        asyncio.run(stats(args.socket))
+        return
+    try:
+        asyncio.run(serve(args.socket, preload=not args.no_preload))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
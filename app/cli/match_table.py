@@ -0,0 +1,67 @@
+"""
+Rebuild or verify the materialized cv_jd_match table
+
+Usage:
+    python -m app.cli.match_table rebuild [--jd JD_ID ...]
+    python -m app.cli.match_table check [--jd JD_ID ...] [--limit 50] [--report report.json]
+"""
+import argparse
+import asyncio
+import json
+import logging
+import sys
+import uuid
+
+from app.db.session import AsyncSessionLocal, engine
+from app.services import match_table
+
+
+async def rebuild(jd_ids: list[uuid.UUID] | None) -> int:
+    try:
+        async with AsyncSessionLocal() as db:
+            return await match_table.rebuild(db, jd_ids)
+    finally:
+        await engine.dispose()
+
+
+async def check(jd_ids: list[uuid.UUID] | None, limit: int | None) -> list[dict]:
+    try:
+        async with AsyncSessionLocal() as db:
+            return await match_table.check_consistency(db, jd_ids, limit)
+    finally:
+        await engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rebuild or verify the materialized cv_jd_match table")
+    parser.add_argument("command", choices=["rebuild", "check"])
+    parser.add_argument("--jd", type=uuid.UUID, nargs="+", help="Only these JD ids (default: all active JDs)")
+    parser.add_argument("--limit", type=int, help="check: only the most recent N JDs")
+    parser.add_argument("--report", help="check: write the per-JD report as JSON to this path")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+
+    if args.command == "rebuild":
+        count = asyncio.run(rebuild(args.jd))
+        print(f"Rebuilt match lists for {count} JDs")
+        return
+
+    report = asyncio.run(check(args.jd, args.limit))
+    inconsistent = [item for item in report if not item["consistent"]]
+    print(f"Checked {len(report)} JDs: {len(inconsistent)} inconsistent")
+    for item in inconsistent:
+        print(
+            f"  JD {item['jd_id']}: {len(item['missing'])} missing, {len(item['unexpected'])} unexpected, "
+            f"max score drift {item['max_score_drift']:.6f}"
+        )
+    if args.report:
+        with open(args.report, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Report written to {args.report}")
+    if inconsistent:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
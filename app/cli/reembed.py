@@ -0,0 +1,119 @@
+"""
+Backfill embeddings and swap embedding models without downtime
+
+Usage:
+    python -m app.cli.reembed status
+    python -m app.cli.reembed backfill [--table cv jd] [--target active|next] [--batch-size 256] [--throttle 0.5]
+    python -m app.cli.reembed start MODEL_NAME
+    python -m app.cli.reembed cutover [--force]
+    python -m app.cli.reembed discard-next
+
+A model swap: `start` the new model (new rows get both vectors from then on),
+`backfill --target next` the existing rows, `cutover`, and once satisfied
+`discard-next`. Running `cutover` again before discarding rolls back.
+"""
+import argparse
+import asyncio
+import logging
+import sys
+
+from app.db.session import AsyncSessionLocal, engine
+from app.services import embedding_models
+
+
+async def status():
+    try:
+        async with AsyncSessionLocal() as db:
+            report = await embedding_models.coverage(db)
+    finally:
+        await engine.dispose()
+
+    print(f"Active model: {report['active_model']}")
+    print(f"Next model:   {report['next_model'] or '-'}")
+    for table, counts in report["tables"].items():
+        line = f"{table}: {counts['rows']} rows, {counts['pending_active']} pending (active)"
+        if "pending_next" in counts:
+            line += f", {counts['pending_next']} pending (next)"
+        print(line)
+
+
+async def backfill(args):
+    try:
+        for table in args.table:
+            result = await embedding_models.backfill(
+                table,
+                target=args.target,
+                batch_size=args.batch_size,
+                throttle=args.throttle,
+                checkpoint_path=args.checkpoint,
+                limit=args.limit,
+                restart=args.restart,
+            )
+            print(
+                f"{table}: embedded {result['embedded']} rows with {result['model']} ({result['target']}), "
+                f"skipped {result['skipped']} without text"
+                + ("; rebuilt the vector store" if result["vector_store_rebuilt"] else "")
+            )
+    finally:
+        await engine.dispose()
+
+
+async def run(coroutine):
+    try:
+        return await coroutine
+    finally:
+        await engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Backfill embeddings and swap embedding models")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    commands.add_parser("status", help="Show active/next model and rows pending per table")
+
+    backfill_parser = commands.add_parser("backfill", help="Embed rows missing a vector from the target model")
+    backfill_parser.add_argument("--table", nargs="+", choices=sorted(embedding_models.TABLES), default=["cv", "jd"])
+    backfill_parser.add_argument("--target", choices=embedding_models.TARGETS, default="active",
+                                 help="active: fill failed/stale live vectors; next: fill embedding_next for a swap")
+    backfill_parser.add_argument("--batch-size", type=int, default=256, help="Rows per encode batch (default: 256)")
+    backfill_parser.add_argument("--throttle", type=float, default=0.0, help="Seconds to sleep between batches")
+    backfill_parser.add_argument("--checkpoint", default="data/reembed_checkpoint.json",
+                                 help="Progress file for resuming (default: data/reembed_checkpoint.json)")
+    backfill_parser.add_argument("--limit", type=int, help="Stop after this many rows per table")
+    backfill_parser.add_argument("--restart", action="store_true", help="Ignore the checkpoint and rescan from the start")
+
+    start_parser = commands.add_parser("start", help="Begin a swap to a new model (dual writes start)")
+    start_parser.add_argument("model")
+
+    cutover_parser = commands.add_parser("cutover", help="Atomically make the next model's vectors live")
+    cutover_parser.add_argument("--force", action="store_true", help="Cut over even if rows lack next-model vectors")
+
+    commands.add_parser("discard-next", help="End the swap and free the previous model's vectors")
+
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+
+    try:
+        if args.command == "status":
+            asyncio.run(status())
+        elif args.command == "backfill":
+            asyncio.run(backfill(args))
+        elif args.command == "start":
+            asyncio.run(run(embedding_models.start_swap(args.model)))
+            print(f"Next model is {args.model}; now run: python -m app.cli.reembed backfill --target next")
+        elif args.command == "cutover":
+            result = asyncio.run(run(embedding_models.cutover(force=args.force)))
+            print(
+                f"Active model is now {result['active_model']} (was {result['previous_model']}); "
+                f"rebuilt {result['match_lists_rebuilt']} match lists"
+            )
+        else:
+            asyncio.run(run(embedding_models.discard_next()))
+            print("Discarded next-model vectors")
+    except ValueError as e:
+        print(str(e), file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
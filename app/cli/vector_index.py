@@ -0,0 +1,195 @@
+"""
+Inspect and rebuild pgvector embedding indexes without downtime
+
+Usage:
+    python -m app.cli.vector_index status
+    python -m app.cli.vector_index rebuild cv [--method hnsw] [--m 16] [--ef-construction 64]
+    python -m app.cli.vector_index rebuild cv --method ivfflat [--lists N]
+    python -m app.cli.vector_index rebuild cv --quantization binary
+    python -m app.cli.vector_index report [--queries 50] [--top-k 10] [--candidates 100,200,400] [--ef-search 40,100,200]
+"""
+import argparse
+import asyncio
+import logging
+import statistics
+import sys
+import time
+
+from sqlalchemy import func, select, text
+
+from app.db.session import AsyncSessionLocal, engine
+from app.models.cv import CV
+from app.models.jd import JD
+from app.services.matching import ann_candidates, cv_ranking_query
+from app.services.vector_index import (
+    METHODS, QUANTIZATION_MIN_VERSION, QUANTIZATIONS, VECTOR_INDEXES,
+    apply_search_settings, describe_indexes, pgvector_version, rebuild_index
+)
+
+
+async def status():
+    try:
+        async with AsyncSessionLocal() as db:
+            indexes = await describe_indexes(db)
+    finally:
+        await engine.dispose()
+
+    if not indexes:
+        print("No pgvector indexes found")
+    for index in indexes:
+        options = ", ".join(f"{k}={v}" for k, v in index["options"].items())
+        line = (
+            f"{index['table_name']}.{index['index_name']}: {index['method']}/{index['quantization']} ({options}) "
+            f"{index['size_bytes'] / (1024 * 1024):.1f} MB, ~{index['table_rows_estimate']} rows, {index['state']}"
+        )
+        if index["state"] == "building":
+            line += f" [{index['build_phase']}: {index['tuples_done']}/{index['tuples_total']} tuples]"
+        print(line)
+
+
+async def rebuild(args):
+    try:
+        for table in args.tables:
+            result = await rebuild_index(
+                table, method=args.method, m=args.m, ef_construction=args.ef_construction, lists=args.lists,
+                quantization=args.quantization
+            )
+            print(f"Rebuilt {result}")
+    finally:
+        await engine.dispose()
+
+
+async def _sample_queries(db, count: int) -> list:
+    """Random active JD embeddings, topped up with CV embeddings"""
+    queries = (await db.execute(
+        select(JD.embedding).where(JD.is_active == True).where(JD.embedding.is_not(None))
+        .order_by(func.random()).limit(count)
+    )).scalars().all()
+    if len(queries) < count:
+        queries += (await db.execute(
+            select(CV.embedding).where(CV.embedding.is_not(None)).order_by(func.random()).limit(count - len(queries))
+        )).scalars().all()
+    return list(queries)
+
+
+async def _timed_search(db, embedding, top_k: int, quantization: str, candidates: int | None, ef_search: int | None):
+    await apply_search_settings(db, ann_candidates(top_k, quantization, candidates), ef_search=ef_search)
+    started = time.perf_counter()
+    result = await db.execute(
+        cv_ranking_query((CV.id,), embedding, top_k, quantization=quantization, candidates=candidates)
+    )
+    ids = [cv_id for cv_id, _ in result.all()]
+    elapsed = (time.perf_counter() - started) * 1000
+    await db.rollback()
+    return ids, elapsed
+
+
+async def report(args):
+    """
+    Recall@k and latency of CV search per quantization, rerank pool and
+    ef_search, against exact full-precision results. Only the quantization
+    of the built cv index runs on an index; the others are measured as
+    sequential scans, which shows their recall ceiling but not their speed.
+    """
+    try:
+        async with AsyncSessionLocal() as db:
+            indexes = [i for i in await describe_indexes(db) if i["index_name"] == VECTOR_INDEXES["cv"]]
+            indexed = indexes[0]["quantization"] if indexes else None
+            queries = await _sample_queries(db, args.queries)
+            if not queries:
+                print("No embeddings to sample queries from")
+                return
+
+            truth, exact_ms = [], []
+            for embedding in queries:
+                await db.execute(text("SELECT set_config('enable_indexscan', 'off', true)"))
+                ids, elapsed = await _timed_search(db, embedding, args.top_k, "none", None, None)
+                truth.append(set(ids))
+                exact_ms.append(elapsed)
+
+            version = await pgvector_version(db)
+            supported = [q for q in QUANTIZATIONS if version >= QUANTIZATION_MIN_VERSION[q]]
+            skipped = [q for q in QUANTIZATIONS if q not in supported]
+
+            rows = [("exact", "-", "-", 1.0, exact_ms, "none")]
+            for quantization in supported:
+                uses_index = quantization == indexed
+                pools = [None] if quantization == "none" else args.candidates
+                ef_values = args.ef_search if uses_index else [None]
+                for candidates in pools:
+                    for ef_search in ef_values:
+                        recalls, latencies = [], []
+                        for embedding, expected in zip(queries, truth):
+                            ids, elapsed = await _timed_search(
+                                db, embedding, args.top_k, quantization, candidates, ef_search
+                            )
+                            recalls.append(len(expected.intersection(ids)) / len(expected) if expected else 1.0)
+                            latencies.append(elapsed)
+                        # apply_search_settings raises ef_search to the pool size
+                        effective_ef = max(ef_search, ann_candidates(args.top_k, quantization, candidates)) if ef_search else None
+                        rows.append((
+                            quantization, candidates or "-", effective_ef or "-",
+                            statistics.mean(recalls), latencies, "yes" if uses_index else "no (seq scan)"
+                        ))
+    finally:
+        await engine.dispose()
+
+    if indexes:
+        print(f"cv index: {indexes[0]['method']}/{indexed}, {indexes[0]['size_bytes'] / (1024 * 1024):.1f} MB")
+    print(f"{len(queries)} queries, recall@{args.top_k} against exact full-precision search")
+    if skipped:
+        print(f"Skipped {', '.join(skipped)}: needs pgvector 0.7+, installed {'.'.join(map(str, version))}")
+    print(f"{'quantization':<13} {'rerank':>7} {'ef':>5} {'recall':>7} {'p50 ms':>8} {'p95 ms':>8}  index")
+    for quantization, candidates, ef_search, recall, latencies, uses_index in rows:
+        latencies = sorted(latencies)
+        p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+        print(
+            f"{quantization:<13} {candidates:>7} {ef_search:>5} {recall:>7.3f} "
+            f"{statistics.median(latencies):>8.1f} {p95:>8.1f}  {uses_index}"
+        )
+
+
+def _int_list(value: str) -> list[int]:
+    return [int(part) for part in value.split(",") if part]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect and rebuild pgvector embedding indexes")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    commands.add_parser("status", help="Show index type, size and build state")
+
+    rebuild_parser = commands.add_parser("rebuild", help="Build a new index concurrently and swap it in")
+    rebuild_parser.add_argument("tables", nargs="+", choices=sorted(VECTOR_INDEXES))
+    rebuild_parser.add_argument("--method", choices=METHODS, help="Index type (default: VECTOR_INDEX_METHOD)")
+    rebuild_parser.add_argument("--m", type=int, help="HNSW graph degree (default: VECTOR_HNSW_M)")
+    rebuild_parser.add_argument("--ef-construction", type=int, help="HNSW build candidate list (default: VECTOR_HNSW_EF_CONSTRUCTION)")
+    rebuild_parser.add_argument("--lists", type=int, help="IVFFlat lists (default: derived from row count)")
+    rebuild_parser.add_argument(
+        "--quantization", choices=tuple(QUANTIZATIONS),
+        help="Index a halfvec or binary copy of cv embeddings (default: VECTOR_QUANTIZATION for cv)"
+    )
+
+    report_parser = commands.add_parser("report", help="Recall/latency of CV search per quantization and knobs")
+    report_parser.add_argument("--queries", type=int, default=50, help="Sampled query embeddings (default: 50)")
+    report_parser.add_argument("--top-k", type=int, default=10)
+    report_parser.add_argument("--candidates", type=_int_list, default=[100, 200, 400], help="Rerank pool sizes")
+    report_parser.add_argument("--ef-search", type=_int_list, default=[40, 100, 200], help="hnsw.ef_search values")
+
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+
+    if args.command == "status":
+        asyncio.run(status())
+    elif args.command == "report":
+        asyncio.run(report(args))
+    else:
+        try:
+            asyncio.run(rebuild(args))
+        except ValueError as e:
+            print(str(e), file=sys.stderr)
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
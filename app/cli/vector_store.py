@@ -0,0 +1,38 @@
+"""
+Build or inspect the in-process CV vector store (VECTOR_STORE_ENABLED)
+
+Usage:
+    python -m app.cli.vector_store rebuild
+    python -m app.cli.vector_store status
+"""
+import argparse
+import asyncio
+import logging
+
+from app.db.session import engine
+from app.services.vector_store import vector_store
+
+
+async def rebuild() -> int:
+    try:
+        return await vector_store.rebuild()
+    finally:
+        await engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build or inspect the in-process CV vector store")
+    parser.add_argument("command", choices=["rebuild", "status"])
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+
+    if args.command == "rebuild":
+        count = asyncio.run(rebuild())
+        print(f"Vector store rebuilt with {count} CVs at {vector_store.path}")
+    else:
+        print(vector_store.stats())
+
+
+if __name__ == "__main__":
+    main()
@@ -12,6 +12,43 @@ class Settings(BaseSettings):
 
     # OpenAI
     OPENAI_API_KEY: Optional[str] = None
+    OPENAI_BASE_URL: Optional[str] = None  # e.g. a local mock server for testing
+    OPENAI_MODEL: str = "gpt-4o-mini"
+    LLM_MAX_CONCURRENCY: int = 16
+    LLM_MAX_ATTEMPTS: int = 3
+    LLM_TIMEOUT: float = 30.0
+
+    # LLM parse result cache
+    PARSE_CACHE_ENABLED: bool = True
+    PARSE_CACHE_TTL_SECONDS: int = 30 * 24 * 3600
+    PARSE_CACHE_MAX_ENTRIES: int = 100000
+
+    # Tiered CV parsing: OpenAI is only asked about fields whose local
+    # confidence falls below the threshold (per-field overrides win)
+    PARSE_CONFIDENCE_THRESHOLD: float = 0.8
+    PARSE_FIELD_THRESHOLDS: dict[str, float] = {"phone": 0.5, "skills": 0.6, "summary": 0.0}
+
+    # Total time budget for a synchronous CV upload (bounds LLM retries)
+    CV_UPLOAD_BUDGET_SECONDS: float = 45.0
+
+    # Uploads are streamed to memory up to UPLOAD_SPOOL_MAX_MEMORY, then to disk
+    UPLOAD_MAX_BYTES: int = 20 * 1024 * 1024
+    UPLOAD_SPOOL_MAX_MEMORY: int = 1024 * 1024
+    UPLOAD_TEMP_DIR: Optional[str] = None
+
+    # Bulk import
+    BULK_IMPORT_CHUNK_SIZE: int = 64
+    BULK_IMPORT_MAX_ARCHIVE_BYTES: int = 2 * 1024 * 1024 * 1024
+    BULK_IMPORT_MAX_FILE_BYTES: int = 20 * 1024 * 1024
+
+    # Background ingestion queue (Postgres-backed)
+    INGESTION_WORKERS: int = 2
+    INGESTION_POLL_INTERVAL: float = 2.0
+    INGESTION_LEASE_SECONDS: float = 300.0
+    INGESTION_MAX_ATTEMPTS: int = 3
+    # Delay before retrying a transient failure, doubled on each attempt
+    INGESTION_RETRY_BACKOFF_SECONDS: float = 10.0
+    INGESTION_JOB_BUDGET_SECONDS: float = 120.0
 
     # Database
     DATABASE_URL: str = "postgresql+asyncpg://postgres:postgres@db:5432/cv_processor"
@@ -25,6 +62,70 @@ class Settings(BaseSettings):
     EMAILS_FROM_EMAIL: str = "noreply@ta-portal.com"
     EMAILS_FROM_NAME: str = "CV Processor"
 
+    # Text extraction (process pool)
+    EXTRACTION_WORKERS: int = 2
+    EXTRACTION_TASK_TIMEOUT: float = 60.0
+    EXTRACTION_MAX_TASKS_PER_CHILD: int = 100
+    # Extraction budget: stop once this much text is collected, unless full text is requested
+    EXTRACTION_MAX_CHARS: int = 20000
+    EXTRACTION_MAX_PAGES: int = 10
+    EXTRACTION_FULL_TEXT: bool = False
+    # PDF engine: auto (fast text layer, pdfplumber fallback), pdfium or pdfplumber
+    EXTRACTION_ENGINE: str = "auto"
+    # Large PDFs are split into page ranges extracted on several workers at once
+    # (full-text extraction only; budgeted extraction stops early instead)
+    EXTRACTION_PARALLEL_MIN_PAGES: int = 8
+    EXTRACTION_PARALLEL_MIN_BYTES: int = 1024 * 1024
+
+    # Embeddings; the model name seeds embedding_model_state, after which
+    # models are swapped with python -m app.cli.reembed
+    EMBEDDING_MODEL_NAME: str = "all-MiniLM-L6-v2"
+    # Inference backend: torch, torch-int8, onnx or onnx-int8 (check parity with app.cli.embedding_parity)
+    EMBEDDING_BACKEND: str = "torch"
+    EMBEDDING_THREADS: int = 0  # intra-op threads per worker; 0 = library default
+    EMBEDDING_ONNX_DIR: str = "data/onnx"
+    # Unix socket of the shared embedding server (python -m app.cli.embedding_server); empty = load the model in each worker
+    EMBEDDING_SOCKET: str = ""
+    EMBEDDING_SOCKET_TIMEOUT: float = 60.0
+    EMBEDDING_CACHE_SIZE: int = 2048
+    EMBEDDING_CACHE_PERSISTENT: bool = True
+    EMBEDDING_BATCH_SIZE: int = 32
+    EMBEDDING_BATCH_WAIT_MS: float = 10.0
+    EMBEDDING_CUTOVER_LOCK_TIMEOUT: float = 10.0  # seconds a cutover waits for the cv/jd locks
+
+    # Vector indexes (pgvector); search knobs can be overridden per request
+    VECTOR_INDEX_METHOD: str = "hnsw"
+    VECTOR_HNSW_M: int = 16
+    VECTOR_HNSW_EF_CONSTRUCTION: int = 64
+    VECTOR_HNSW_EF_SEARCH: int = 100
+    VECTOR_IVFFLAT_PROBES: int = 10
+    VECTOR_INDEX_BUILD_MEMORY: str = "512MB"
+    # Filtered ANN scans keep going until LIMIT rows pass the filter (pgvector >= 0.8; "off" for older)
+    VECTOR_ITERATIVE_SCAN: str = "relaxed_order"  # used on pgvector 0.8+ only
+    # CV index quantization: "none", "halfvec" or "binary" (must match the built index);
+    # quantized candidates are reranked on the full-precision column
+    VECTOR_QUANTIZATION: str = "none"
+    VECTOR_RERANK_CANDIDATES: int = 200
+
+    # In-process exact vector search over a memory-mapped matrix of CV embeddings
+    VECTOR_STORE_ENABLED: bool = False
+    VECTOR_STORE_PATH: str = "data/vector_store"
+    VECTOR_STORE_DTYPE: str = "float32"  # float16 halves memory but scores slower (no BLAS)
+
+    # Materialized top-N CVs per JD (cv_jd_match), served by find-best-cvs when top_k <= N
+    MATCH_TABLE_ENABLED: bool = True
+    MATCH_TABLE_TOP_N: int = 100
+
+    # find-best-cvs result cache, invalidated by match_generation notifications
+    RESULT_CACHE_ENABLED: bool = True
+    RESULT_CACHE_MAX_ENTRIES: int = 1024
+    RESULT_CACHE_TTL_SECONDS: float = 3600.0
+
+    # Hybrid ranking: score = (1 - w) * vector similarity + w * skill overlap
+    SKILL_SCORE_WEIGHT: float = 0.3
+    # Vector candidates fetched per requested result before the skill re-rank
+    SKILL_RERANK_FACTOR: int = 4
+
     class Config:
         env_file = ".env"
         case_sensitive = True
@@ -1,4 +1,9 @@
 from app.models.cv import CV
 from app.models.jd import JD
+from app.models.embedding_cache import EmbeddingCacheEntry
+from app.models.parse_cache import ParseCacheEntry
+from app.models.ingestion_job import IngestionJob, IngestionJobChunk
+from app.models.cv_jd_match import CVJDMatch
+from app.models.embedding_model_state import EmbeddingModelState
 
-__all__ = ["CV", "JD"]
+__all__ = ["CV", "JD", "EmbeddingCacheEntry", "ParseCacheEntry", "IngestionJob", "IngestionJobChunk", "CVJDMatch", "EmbeddingModelState"]
@@ -2,7 +2,7 @@ import uuid
 from datetime import datetime
 from sqlalchemy import String, Text, Boolean, DateTime, func
 from sqlalchemy.orm import Mapped, mapped_column
-from sqlalchemy.dialects.postgresql import UUID, JSON
+from sqlalchemy.dialects.postgresql import UUID, JSON, JSONB
 from pgvector.sqlalchemy import Vector
 from app.db.base import Base
 
@@ -14,14 +14,25 @@ class CV(Base):
     candidate_name: Mapped[str] = mapped_column(String(255), nullable=False)
     email: Mapped[str] = mapped_column(String(255), nullable=False, unique=True)
     phone: Mapped[str | None] = mapped_column(String(50))
-    raw_text: Mapped[str] = mapped_column(Text, nullable=False)
+    # Deferred: listings and matches rarely render the full text; load it with undefer()
+    raw_text: Mapped[str] = mapped_column(Text, nullable=False, deferred=True)
+    text_truncated: Mapped[bool] = mapped_column(Boolean, default=False)
     summary: Mapped[str | None] = mapped_column(Text)
     skills: Mapped[list | None] = mapped_column(JSON)
+    # Normalized skills (see normalize_skills), GIN-indexed for must-have filters
+    skill_keys: Mapped[list | None] = mapped_column(JSONB)
     experience: Mapped[dict | None] = mapped_column(JSON)
     education: Mapped[dict | None] = mapped_column(JSON)
     file_name: Mapped[str | None] = mapped_column(String(255))
     file_type: Mapped[str | None] = mapped_column(String(50))
+    extraction_engine: Mapped[str | None] = mapped_column(String(50))
+    content_hash: Mapped[str | None] = mapped_column(String(64), unique=True)
     embedding: Mapped[list | None] = mapped_column(Vector(384))
+    # Model that produced ``embedding``; see EmbeddingModelState
+    embedding_model: Mapped[str | None] = mapped_column(String(255))
+    # Vectors from the next model during a model swap, with their model
+    embedding_next: Mapped[list | None] = mapped_column(Vector(384), deferred=True)
+    embedding_next_model: Mapped[str | None] = mapped_column(String(255))
     embedding_generated: Mapped[bool] = mapped_column(Boolean, default=False)
     embedding_generated_at: Mapped[datetime | None] = mapped_column(DateTime)
     created_at: Mapped[datetime] = mapped_column(DateTime, server_default=func.now())
@@ -0,0 +1,20 @@
+import uuid
+from datetime import datetime
+from sqlalchemy import Float, DateTime, ForeignKey, Index, func
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy.dialects.postgresql import UUID
+from app.db.base import Base
+
+
+class CVJDMatch(Base):
+    """One of a JD's top-N CVs, kept up to date as CVs and JDs are added"""
+
+    __tablename__ = "cv_jd_match"
+    __table_args__ = (
+        Index("ix_cv_jd_match_jd_score", "jd_id", "score"),
+    )
+
+    jd_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), ForeignKey("jd.id", ondelete="CASCADE"), primary_key=True)
+    cv_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), ForeignKey("cv.id", ondelete="CASCADE"), primary_key=True, index=True)
+    score: Mapped[float] = mapped_column(Float, nullable=False)
+    created_at: Mapped[datetime] = mapped_column(DateTime, server_default=func.now())
@@ -0,0 +1,20 @@
+from datetime import datetime
+from sqlalchemy import Integer, String, DateTime, func
+from sqlalchemy.orm import Mapped, mapped_column
+from app.db.base import Base
+
+
+class EmbeddingModelState(Base):
+    """
+    Single row naming the model whose vectors are in the ``embedding``
+    columns (``active_model``) and, during a model swap, the model being
+    built alongside in ``embedding_next`` (``next_model``). Writers embed
+    with both, so the swap can be cut over atomically.
+    """
+
+    __tablename__ = "embedding_model_state"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    active_model: Mapped[str] = mapped_column(String(255), nullable=False)
+    next_model: Mapped[str | None] = mapped_column(String(255))
+    updated_at: Mapped[datetime] = mapped_column(DateTime, server_default=func.now(), onupdate=func.now())
@@ -26,7 +26,14 @@ class JD(Base):
     salary_range: Mapped[dict | None] = mapped_column(JSON)
     is_active: Mapped[bool] = mapped_column(Boolean, default=True)
     embedding: Mapped[list | None] = mapped_column(Vector(384))
+    # Model that produced ``embedding``; see EmbeddingModelState
+    embedding_model: Mapped[str | None] = mapped_column(String(255))
+    # Vectors from the next model during a model swap, with their model
+    embedding_next: Mapped[list | None] = mapped_column(Vector(384), deferred=True)
+    embedding_next_model: Mapped[str | None] = mapped_column(String(255))
     embedding_generated: Mapped[bool] = mapped_column(Boolean, default=False)
     embedding_generated_at: Mapped[datetime | None] = mapped_column(DateTime)
+    # Set once the JD's rows in cv_jd_match are complete
+    matches_computed_at: Mapped[datetime | None] = mapped_column(DateTime)
     created_at: Mapped[datetime] = mapped_column(DateTime, server_default=func.now())
     updated_at: Mapped[datetime] = mapped_column(DateTime, server_default=func.now(), onupdate=func.now())
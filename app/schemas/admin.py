@@ -0,0 +1,18 @@
+from pydantic import BaseModel
+from typing import Optional
+
+
+class VectorIndexResponse(BaseModel):
+    index_name: str
+    table_name: str
+    method: str
+    quantization: str = "none"
+    size_bytes: int
+    options: dict[str, str]
+    table_rows_estimate: int
+    state: str
+    build_phase: Optional[str] = None
+    blocks_done: Optional[int] = None
+    blocks_total: Optional[int] = None
+    tuples_done: Optional[int] = None
+    tuples_total: Optional[int] = None
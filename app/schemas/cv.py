@@ -1,21 +1,25 @@
-from pydantic import BaseModel, EmailStr
-from typing import Optional
+from pydantic import BaseModel, EmailStr, Field
+from typing import Literal, Optional
 from datetime import datetime
 import uuid
 
+# Response projection: "summary" leaves out raw_text, "full" includes it
+CVView = Literal["summary", "full"]
 
-class CVResponse(BaseModel):
+
+class CVSummary(BaseModel):
     id: uuid.UUID
     candidate_name: str
     email: str
     phone: Optional[str]
-    raw_text: str
+    text_truncated: bool = False
     summary: Optional[str]
     skills: Optional[list]
     experience: Optional[dict]
     education: Optional[dict]
     file_name: Optional[str]
     file_type: Optional[str]
+    extraction_engine: Optional[str] = None
     embedding_generated: bool
     created_at: datetime
     updated_at: datetime
@@ -23,6 +27,63 @@ class CVResponse(BaseModel):
     model_config = {"from_attributes": True}
 
 
+class CVResponse(CVSummary):
+    raw_text: str
+
+
+CV_VIEWS = {"summary": CVSummary, "full": CVResponse}
+
+
 class CVMatch(BaseModel):
-    cv: CVResponse
+    cv: CVResponse | CVSummary
     similarity_score: float
+
+
+class FindBestJDsRequest(BaseModel):
+    top_k: int = 5
+    # ANN recall/latency knobs; defaults come from VECTOR_HNSW_EF_SEARCH / VECTOR_IVFFLAT_PROBES
+    ef_search: Optional[int] = Field(default=None, ge=1, le=1000)
+    probes: Optional[int] = Field(default=None, ge=1, le=1000)
+
+
+class BatchMatchResult(BaseModel):
+    job_title: Optional[str] = None
+    jd_id: Optional[uuid.UUID] = None
+    matches: list[CVMatch] = []
+    error: Optional[str] = None
+
+
+class IngestionJobAccepted(BaseModel):
+    job_id: uuid.UUID
+    status: str
+    status_url: str
+
+
+class IngestionJobResponse(BaseModel):
+    id: uuid.UUID
+    status: str
+    stages: dict
+    error: Optional[str]
+    error_status_code: Optional[int]
+    cv_id: Optional[uuid.UUID]
+    attempts: int
+    created_at: datetime
+    started_at: Optional[datetime]
+    finished_at: Optional[datetime]
+
+    model_config = {"from_attributes": True}
+
+
+class BulkImportItem(BaseModel):
+    file: str
+    status: str
+    cv_id: Optional[uuid.UUID] = None
+    detail: Optional[str] = None
+
+
+class BulkImportReport(BaseModel):
+    total: int
+    created: int
+    duplicates: int
+    failed: int
+    results: list[BulkImportItem]
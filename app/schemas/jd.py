@@ -1,12 +1,16 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field, model_validator
 from typing import Optional
 from datetime import datetime
 import uuid
 
+from app.schemas.cv import CVView
+
 
 class JDCreate(BaseModel):
     title: str
     requirements: str
+    required_skills: Optional[list[str]] = None
+    preferred_skills: Optional[list[str]] = None
 
 
 class JDResponse(BaseModel):
@@ -35,6 +39,38 @@ class JDResponse(BaseModel):
 class FindBestCVsRequest(BaseModel):
     job_title: str
     top_k: int = 5
+    view: CVView = "full"
+    # Only CVs listing all of these skills are returned
+    must_have_skills: list[str] = Field(default=[], max_length=50)
+    # Extra skills that raise the blended score, on top of the JD's own
+    preferred_skills: list[str] = Field(default=[], max_length=50)
+    # ANN recall/latency knobs; defaults come from VECTOR_HNSW_EF_SEARCH / VECTOR_IVFFLAT_PROBES
+    ef_search: Optional[int] = Field(default=None, ge=1, le=1000)
+    probes: Optional[int] = Field(default=None, ge=1, le=1000)
+
+
+class JDMatch(BaseModel):
+    jd: JDResponse
+    similarity_score: float
+
+
+class BatchMatchItem(BaseModel):
+    job_title: Optional[str] = None
+    jd_id: Optional[uuid.UUID] = None
+    top_k: int = Field(default=5, ge=1)
+
+    @model_validator(mode="after")
+    def check_jd_reference(self):
+        if (self.job_title is None) == (self.jd_id is None):
+            raise ValueError("Provide exactly one of job_title or jd_id")
+        return self
+
+
+class FindBestCVsBatchRequest(BaseModel):
+    items: list[BatchMatchItem] = Field(min_length=1, max_length=200)
+    view: CVView = "full"
+    ef_search: Optional[int] = Field(default=None, ge=1, le=1000)
+    probes: Optional[int] = Field(default=None, ge=1, le=1000)
 
 
 class ContactCandidateRequest(BaseModel):
@@ -0,0 +1,222 @@
+import asyncio
+import logging
+import os
+import zipfile
+from io import BytesIO
+from typing import Iterable, Iterator
+from fastapi import HTTPException
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.models.cv import CV
+from app.services.cv_processor import CVProcessor
+from app.services import match_table
+from app.services.embedding_models import embedding_values, pin_embedding_columns
+from app.services.matching import normalize_skills
+from app.services.ingestion import content_hash_of
+from app.services.result_cache import result_cache
+from app.services.vector_store import vector_store
+
+logger = logging.getLogger(__name__)
+
+CONTENT_TYPES = {
+    ".pdf": "application/pdf",
+    ".docx": "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+}
+
+
+def _is_supported(name: str) -> bool:
+    base = os.path.basename(name)
+    return not base.startswith((".", "~$")) and os.path.splitext(base)[1].lower() in CONTENT_TYPES
+
+
+def iter_zip(archive: bytes | str) -> Iterator[tuple[str, bytes]]:
+    """Yield (name, content) for each PDF/DOCX entry of a ZIP archive, one at a time"""
+    with zipfile.ZipFile(BytesIO(archive) if isinstance(archive, bytes) else archive) as zf:
+        for info in zf.infolist():
+            if info.is_dir() or not _is_supported(info.filename) or "__MACOSX" in info.filename:
+                continue
+            if info.file_size > settings.BULK_IMPORT_MAX_FILE_BYTES:
+                yield info.filename, b""
+                continue
+            yield info.filename, zf.read(info)
+
+
+def iter_directory(path: str) -> Iterator[tuple[str, bytes]]:
+    """Yield (relative path, content) for each PDF/DOCX file under a directory"""
+    for root, _, files in os.walk(path):
+        for name in sorted(files):
+            full_path = os.path.join(root, name)
+            if not _is_supported(name):
+                continue
+            if os.path.getsize(full_path) > settings.BULK_IMPORT_MAX_FILE_BYTES:
+                yield os.path.relpath(full_path, path), b""
+                continue
+            with open(full_path, "rb") as f:
+                yield os.path.relpath(full_path, path), f.read()
+
+
+def _chunks(entries: Iterable[tuple[str, bytes]], size: int) -> Iterator[list[tuple[str, bytes]]]:
+    chunk = []
+    for entry in entries:
+        chunk.append(entry)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+async def _extract_and_parse(name: str, content: bytes) -> dict:
+    content_type = CONTENT_TYPES[os.path.splitext(name)[1].lower()]
+    extracted = await CVProcessor.extract_text(content, content_type)
+    cv_data = await CVProcessor.parse_text(extracted["raw_text"])
+    cv_data.update(extracted)
+    return cv_data
+
+
+async def _import_chunk(db: AsyncSession, chunk: list[tuple[str, bytes]]) -> list[dict]:
+    results: dict[int, dict] = {}
+
+    def report(i: int, status: str, **extra):
+        results[i] = {"file": chunk[i][0], "status": status, **extra}
+
+    # Hash-level dedup against the archive itself and the database
+    hashes = await asyncio.to_thread(lambda: [content_hash_of(content) if content else None for _, content in chunk])
+    pending = []  # (index, content_hash)
+    seen_hashes = set()
+    for i, content_hash in enumerate(hashes):
+        if content_hash is None:
+            report(i, "failed", detail="Empty or oversized file")
+            continue
+        if content_hash in seen_hashes:
+            report(i, "duplicate", detail="Duplicate file within import")
+            continue
+        seen_hashes.add(content_hash)
+        pending.append((i, content_hash))
+
+    if seen_hashes:
+        existing = await db.execute(
+            select(CV.content_hash, CV.id).where(CV.content_hash.in_(list(seen_hashes)))
+        )
+        existing_by_hash = dict(existing.all())
+        for i, content_hash in pending:
+            if content_hash in existing_by_hash:
+                report(i, "duplicate", cv_id=existing_by_hash[content_hash], detail="File already uploaded")
+        pending = [p for p in pending if p[0] not in results]
+        # No lock on cv while extracting and parsing (a cutover would deadlock with it)
+        await db.rollback()
+
+    # Extract (process pool) and parse (LLM semaphore) concurrently
+    parsed = await asyncio.gather(
+        *[_extract_and_parse(*chunk[i]) for i, _ in pending],
+        return_exceptions=True
+    )
+
+    rows = []  # (index, content_hash, cv_data)
+    seen_emails = set()
+    for (i, content_hash), cv_data in zip(pending, parsed):
+        if isinstance(cv_data, Exception):
+            detail = cv_data.detail if isinstance(cv_data, HTTPException) else str(cv_data)
+            report(i, "failed", detail=detail)
+            continue
+        if not cv_data.get("email") or not cv_data.get("candidate_name"):
+            report(i, "failed", detail="Could not extract name and email")
+            continue
+        if cv_data["email"] in seen_emails:
+            report(i, "duplicate", detail=f"Email {cv_data['email']} repeated within import")
+            continue
+        seen_emails.add(cv_data["email"])
+        rows.append((i, content_hash, cv_data))
+
+    if seen_emails:
+        existing = await db.execute(select(CV.email, CV.id).where(CV.email.in_(list(seen_emails))))
+        existing_by_email = dict(existing.all())
+        for i, _, cv_data in rows:
+            if cv_data["email"] in existing_by_email:
+                report(
+                    i, "duplicate", cv_id=existing_by_email[cv_data["email"]],
+                    detail=f"CV with email {cv_data['email']} already exists"
+                )
+        rows = [r for r in rows if r[0] not in results]
+        await db.rollback()
+
+    if rows:
+        # Concurrent encodes are coalesced into batches by the batcher
+        embeddings = await embedding_values([cv_data["raw_text"] for _, _, cv_data in rows])
+        # First in the INSERT's transaction, so a concurrent cutover cannot mix models
+        embeddings = await pin_embedding_columns(db, embeddings)
+
+        values = []
+        for (i, content_hash, cv_data), embedding in zip(rows, embeddings):
+            values.append({
+                "candidate_name": cv_data["candidate_name"],
+                "email": cv_data["email"],
+                "phone": cv_data.get("phone"),
+                "raw_text": cv_data["raw_text"],
+                "text_truncated": cv_data["text_truncated"],
+                "extraction_engine": cv_data["extraction_engine"],
+                "summary": cv_data.get("summary"),
+                "skills": cv_data.get("skills"),
+                "skill_keys": normalize_skills(cv_data.get("skills")),
+                "file_name": os.path.basename(chunk[i][0]),
+                "file_type": cv_data["file_type"],
+                "content_hash": content_hash,
+                **embedding,
+            })
+
+        # One multi-row INSERT per chunk; rows lost to a concurrent upload come back missing
+        inserted = await db.execute(
+            insert(CV).values(values).on_conflict_do_nothing().returning(CV.content_hash, CV.id)
+        )
+        inserted_by_hash = dict(inserted.all())
+        await db.commit()
+        result_cache.invalidate_pool()
+
+        embedded = [
+            (inserted_by_hash[value["content_hash"]], value["embedding"])
+            for value in values if value["content_hash"] in inserted_by_hash and value["embedding_generated"]
+        ]
+        vector_store.append(embedded)
+        try:
+            await match_table.merge_cvs(db, [cv_id for cv_id, _ in embedded])
+        except Exception as e:
+            await db.rollback()
+            logger.error(f"Could not merge imported CVs into the match table: {e}", exc_info=True)
+
+        for i, content_hash, _ in rows:
+            if content_hash in inserted_by_hash:
+                report(i, "created", cv_id=inserted_by_hash[content_hash])
+            else:
+                report(i, "duplicate", detail="Inserted concurrently by another upload")
+
+    return [results[i] for i in range(len(chunk))]
+
+
+async def bulk_import(db: AsyncSession, entries: Iterable[tuple[str, bytes]], chunk_size: int | None = None) -> dict:
+    """
+    Import many CV files, returning a per-file report.
+
+    Entries are consumed lazily in chunks so only one chunk of file contents is
+    held at a time. Reading them (and decompressing ZIP members) blocks, so
+    it runs on a thread rather than the event loop. Within a chunk,
+    extraction and parsing run concurrently, embeddings are batched, and rows
+    are written with a single INSERT.
+    """
+    chunk_size = chunk_size or settings.BULK_IMPORT_CHUNK_SIZE
+    chunks = _chunks(entries, chunk_size)
+    results = []
+    while (chunk := await asyncio.to_thread(next, chunks, None)) is not None:
+        chunk_results = await _import_chunk(db, chunk)
+        results.extend(chunk_results)
+        logger.info(f"Bulk import progress: {len(results)} files processed")
+
+    return {
+        "total": len(results),
+        "created": sum(1 for r in results if r["status"] == "created"),
+        "duplicates": sum(1 for r in results if r["status"] == "duplicate"),
+        "failed": sum(1 for r in results if r["status"] == "failed"),
+        "results": results,
+    }
@@ -1,41 +1,69 @@
-import pdfplumber
-import docx
-import re
+import asyncio
 import json
-from io import BytesIO
-from fastapi import UploadFile, HTTPException
-from openai import OpenAI
-import backoff
+import logging
+import os
+from fastapi import HTTPException
 from app.core.config import settings
+from app.services import local_parser
+from app.services.llm import llm_client
+from app.services.parse_cache import parse_cache, parse_cache_key
+from app.services.extraction import extraction_executor
+from app.services.extraction_engines import extract_document, pdf_page_count
+
+logger = logging.getLogger(__name__)
+
+# Bump whenever the parsing prompt or post-processing changes so cached
+# results from the old prompt are no longer reused
+PARSE_PROMPT_VERSION = "1"
 
 
 class CVProcessor:
+    # Per-tier parse counters, reported under /stats
+    _tier_counts: dict[str, int] = {}
+
     @staticmethod
-    async def extract_and_parse(file: UploadFile) -> dict:
-        """Extract text from file and parse candidate information"""
-        content = await file.read()
+    async def extract_text(
+        content: bytes | str,
+        content_type: str | None,
+        full_text: bool = False
+    ) -> dict:
+        """
+        Extract raw text from a PDF/DOCX
+
+        Returns a dict with ``raw_text``, ``file_type``, ``text_truncated`` and
+        ``extraction_engine`` (the engine that produced the text).
+
+        ``content`` is the document bytes or the path of a spooled upload.
+        Unless ``full_text`` (or EXTRACTION_FULL_TEXT) is set, extraction stops
+        at the EXTRACTION_MAX_CHARS / EXTRACTION_MAX_PAGES budget.
+        """
+        if full_text or settings.EXTRACTION_FULL_TEXT:
+            budget = (None, None)
+        else:
+            budget = (settings.EXTRACTION_MAX_CHARS, settings.EXTRACTION_MAX_PAGES)
 
         # Normalize content type
-        content_type = file.content_type.split(';')[0].strip().lower() if file.content_type else ""
+        content_type = content_type.split(';')[0].strip().lower() if content_type else ""
 
         # Extract text based on file type
         if content_type == "application/pdf":
-            raw_text = await CVProcessor._extract_from_pdf(content)
+            raw_text, truncated, engine = await CVProcessor._extract_from_pdf(content, *budget)
             file_type = "pdf"
         elif content_type in [
             "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
             "application/msword",
             "application/docx"
         ]:
-            raw_text = await CVProcessor._extract_from_docx(content)
+            raw_text, truncated, engine = await CVProcessor._extract_from_docx(content, *budget)
             file_type = "docx"
         elif content_type in ["application/octet-stream", "binary/octet-stream"]:
             # Try to detect from file signature
-            if content[:4] == b'%PDF':
-                raw_text = await CVProcessor._extract_from_pdf(content)
+            head = CVProcessor._read_head(content)
+            if head[:4] == b'%PDF':
+                raw_text, truncated, engine = await CVProcessor._extract_from_pdf(content, *budget)
                 file_type = "pdf"
-            elif content[:2] == b'PK':  # ZIP archive (DOCX is a ZIP file)
-                raw_text = await CVProcessor._extract_from_docx(content)
+            elif head[:2] == b'PK':  # ZIP archive (DOCX is a ZIP file)
+                raw_text, truncated, engine = await CVProcessor._extract_from_docx(content, *budget)
                 file_type = "docx"
             else:
                 raise HTTPException(status_code=400, detail="Cannot determine file type from binary content")
@@ -45,12 +73,27 @@ class CVProcessor:
         if not raw_text:
             raise HTTPException(status_code=400, detail="Could not extract text from file")
 
-        # Parse information from text
-        parsed_info = CVProcessor._parse_cv_info(raw_text)
-
         return {
             "raw_text": raw_text,
             "file_type": file_type,
+            "text_truncated": truncated,
+            "extraction_engine": engine,
+        }
+
+    @staticmethod
+    def _read_head(content: bytes | str) -> bytes:
+        if isinstance(content, str):
+            with open(content, "rb") as f:
+                return f.read(8)
+        return content[:8]
+
+    @staticmethod
+    async def parse_text(raw_text: str, deadline: float | None = None) -> dict:
+        """Parse candidate information from extracted CV text"""
+        parsed_info = await CVProcessor._parse_cv_info(raw_text, deadline)
+
+        return {
+            "raw_text": raw_text,
             "candidate_name": parsed_info.get("name"),
             "email": parsed_info.get("email"),
             "phone": parsed_info.get("phone"),
@@ -59,30 +102,54 @@ class CVProcessor:
         }
 
     @staticmethod
-    def _parse_cv_info(text: str) -> dict:
-        """Parse candidate information from CV text using OpenAI"""
-        # If OpenAI API key is available, use it for better extraction
-        if settings.OPENAI_API_KEY:
-            try:
-                return CVProcessor._parse_with_openai(text)
-            except Exception as e:
-                print(f"OpenAI parsing failed: {e}, falling back to regex")
-                # Fall back to regex if OpenAI fails
-
-        # Fallback: regex-based parsing
-        return CVProcessor._parse_with_regex(text)
+    async def _parse_cv_info(text: str, deadline: float | None = None) -> dict:
+        """
+        Parse candidate information from CV text in tiers
+
+        The local parser runs first; OpenAI is only called when a field is
+        missing or scores below its confidence threshold, and its answers
+        only replace those fields.
+        """
+        info, confidence = local_parser.parse(text)
+        weak_fields = [
+            field for field in local_parser.FIELDS
+            if confidence[field] < CVProcessor._threshold(field)
+        ]
+
+        if not weak_fields or not settings.OPENAI_API_KEY:
+            CVProcessor._count("local_only")
+            return info
+
+        CVProcessor._count("llm_requested")
+        for field in weak_fields:
+            CVProcessor._count(f"llm_field_{field}")
+        try:
+            llm_info = await CVProcessor._parse_with_openai(text, deadline)
+        except Exception as e:
+            CVProcessor._count("llm_failed")
+            logger.warning(f"OpenAI parsing failed: {e}, keeping local parse")
+            return info
+
+        for field in weak_fields:
+            if llm_info.get(field):
+                info[field] = llm_info[field]
+        return info
+
+    @staticmethod
+    def _threshold(field: str) -> float:
+        return settings.PARSE_FIELD_THRESHOLDS.get(field, settings.PARSE_CONFIDENCE_THRESHOLD)
+
+    @staticmethod
+    def _count(counter: str):
+        CVProcessor._tier_counts[counter] = CVProcessor._tier_counts.get(counter, 0) + 1
 
     @staticmethod
-    @backoff.on_exception(
-        backoff.expo,
-        (Exception,),
-        max_tries=3,
-        max_time=30
-    )
-    def _parse_with_openai(text: str) -> dict:
-        """Use OpenAI to extract structured data from CV with retry logic"""
-        client = OpenAI(api_key=settings.OPENAI_API_KEY)
+    def stats() -> dict:
+        return dict(CVProcessor._tier_counts)
 
+    @staticmethod
+    async def _parse_with_openai(text: str, deadline: float | None = None) -> dict:
+        """Use OpenAI to extract structured data from CV (retries handled by llm_client)"""
         prompt = f"""Extract the following information from this CV/Resume text. Return ONLY a valid JSON object with these exact fields:
 {{
     "name": "candidate full name",
@@ -97,17 +164,22 @@ If any field is not found, use null for strings or empty array for skills.
 CV Text:
 {text[:4000]}"""  # Limit to 4000 chars to avoid token limits
 
-        response = client.chat.completions.create(
-            model="gpt-4o-mini",
+        cache_key = parse_cache_key(settings.OPENAI_MODEL, PARSE_PROMPT_VERSION, prompt)
+        cached = await parse_cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+        response = await llm_client.chat(
+            model=settings.OPENAI_MODEL,
             messages=[
                 {"role": "system", "content": "You are a CV/Resume parser. Extract structured data and return only valid JSON."},
                 {"role": "user", "content": prompt}
             ],
-            temperature=0,
-            timeout=30
+            deadline=deadline,
+            temperature=0
         )
 
-        result = response.choices[0].message.content.strip()
+        result = (response or "").strip()
 
         # Robust JSON extraction (same as old TA-Portal)
         cleaned_output = result
@@ -153,78 +225,57 @@ CV Text:
             "summary": parsed.get("summary") or None
         }
 
+        await parse_cache.put(cache_key, settings.OPENAI_MODEL, PARSE_PROMPT_VERSION, info)
         return info
 
     @staticmethod
-    def _parse_with_regex(text: str) -> dict:
-        """Fallback regex-based parsing"""
-        info = {}
-
-        # Extract email
-        email_pattern = r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b'
-        emails = re.findall(email_pattern, text, re.IGNORECASE)
-        if emails:
-            info["email"] = emails[0].strip().lower()
-
-        # Extract phone
-        phone_pattern = r'[\+]?[(]?\d{1,4}[)]?[-\s\.]?\(?\d{1,3}\)?[-\s\.]?\d{1,4}[-\s\.]?\d{1,4}[-\s\.]?\d{1,9}'
-        phones = re.findall(phone_pattern, text)
-        if phones:
-            phone = phones[0].strip()
-            if len(phone) >= 10:
-                info["phone"] = phone
-
-        # Extract name (first line)
-        lines = [line.strip() for line in text.split('\n') if line.strip()]
-        if lines:
-            for line in lines[:5]:
-                if 'name' in line.lower() and ':' in line:
-                    name = line.split(':', 1)[1].strip()
-                    if name and len(name.split()) >= 2:
-                        info["name"] = name
-                        break
-
-            if "name" not in info and lines[0]:
-                first_line = lines[0]
-                if 2 <= len(first_line.split()) <= 4 and re.match(r'^[A-Za-z\s]+$', first_line):
-                    info["name"] = first_line
-
-        # Extract skills
-        skills_section = re.search(r'(?:skills?|technical skills?|competencies)[:\s]+(.*?)(?:\n\n|\n[A-Z]|$)',
-                                   text, re.IGNORECASE | re.DOTALL)
-        if skills_section:
-            skills_text = skills_section.group(1)
-            skills = re.split(r'[,;•\|\n]', skills_text)
-            skills = [s.strip() for s in skills if s.strip() and len(s.strip()) > 2 and len(s.strip()) < 50]
-            if skills:
-                info["skills"] = skills[:20]
-
-        # Extract summary
-        summary_match = re.search(r'(?:summary|objective|profile|about)[:\s]+(.*?)(?:\n\n|experience|education|skills)',
-                                 text, re.IGNORECASE | re.DOTALL)
-        if summary_match:
-            summary = summary_match.group(1).strip()
-            if len(summary) > 50 and len(summary) < 1000:
-                info["summary"] = summary
-
-        return info
-
-    @staticmethod
-    async def _extract_from_pdf(content: bytes) -> str:
+    async def _extract_from_pdf(content: bytes | str, max_chars: int | None, max_pages: int | None) -> tuple[str, bool, str]:
         try:
-            with pdfplumber.open(BytesIO(content)) as pdf:
-                text = ""
-                for page in pdf.pages:
-                    text += page.extract_text() or ""
-                return text.strip()
+            # With a character budget the sequential early stop does less work
+            # than ranges that each extract in full, so only full-text
+            # extraction is split across workers
+            if (
+                max_chars is None
+                and extraction_executor.workers > 1
+                and CVProcessor._source_size(content) >= settings.EXTRACTION_PARALLEL_MIN_BYTES
+            ):
+                page_count = await extraction_executor.run(pdf_page_count, content)
+                pages = page_count if max_pages is None else min(page_count, max_pages)
+                if pages >= settings.EXTRACTION_PARALLEL_MIN_PAGES:
+                    text, engine = await CVProcessor._extract_pdf_parallel(content, pages)
+                    return text, pages < page_count, engine
+            return await extraction_executor.run(
+                extract_document, content, "pdf", settings.EXTRACTION_ENGINE, max_chars, max_pages
+            )
         except Exception as e:
             raise HTTPException(status_code=400, detail=f"Failed to extract PDF: {str(e)}")
 
     @staticmethod
-    async def _extract_from_docx(content: bytes) -> str:
+    async def _extract_pdf_parallel(content: bytes | str, pages: int) -> tuple[str, str]:
+        """
+        Extract the full text of a large PDF as page ranges on several pool
+        workers at once. Ranges may pick different engines in auto mode.
+        """
+        step = -(-pages // extraction_executor.workers)
+        ranges = [(start, min(start + step, pages)) for start in range(0, pages, step)]
+        logger.info(f"Extracting {pages} PDF pages in {len(ranges)} parallel ranges")
+        parts = await asyncio.gather(*[
+            extraction_executor.run(
+                extract_document, content, "pdf", settings.EXTRACTION_ENGINE, None, None, page_range
+            )
+            for page_range in ranges
+        ])
+        text = "\n".join(part_text for part_text, _, _ in parts).strip()
+        engines = sorted({engine for _, _, engine in parts})
+        return text, "+".join(engines)
+
+    @staticmethod
+    def _source_size(content: bytes | str) -> int:
+        return os.path.getsize(content) if isinstance(content, str) else len(content)
+
+    @staticmethod
+    async def _extract_from_docx(content: bytes | str, max_chars: int | None, max_pages: int | None) -> tuple[str, bool, str]:
         try:
-            doc = docx.Document(BytesIO(content))
-            text = "\n".join([p.text for p in doc.paragraphs])
-            return text.strip()
+            return await extraction_executor.run(extract_document, content, "docx", "auto", max_chars, max_pages)
         except Exception as e:
             raise HTTPException(status_code=400, detail=f"Failed to extract DOCX: {str(e)}")
@@ -1,22 +1,191 @@
-from sentence_transformers import SentenceTransformer
+import asyncio
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from app.core.config import settings
+from app.services.embedding_backends import EmbeddingBackend, load_backend
+from app.services.embedding_cache import embedding_cache, normalize_text, cache_key
+from app.services.embedding_server import EmbeddingClient
+
+logger = logging.getLogger(__name__)
+
+
+class EmbeddingBatcher:
+    """
+    Gathers concurrent embedding requests into micro-batches.
+
+    Callers enqueue a text and await a future. A single collector task waits
+    up to ``max_wait_ms`` (or until ``max_batch_size`` items arrive), then
+    encodes the whole batch on a dedicated thread and resolves each future.
+    """
+
+    def __init__(self, encode_batch, max_batch_size: int, max_wait_ms: float):
+        self._encode_batch = encode_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="embedding")
+        self._queue: asyncio.Queue | None = None
+        self._worker: asyncio.Task | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._batches = 0
+        self._items = 0
+
+    def _ensure_worker(self):
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop or self._worker is None or self._worker.done():
+            self._loop = loop
+            self._queue = asyncio.Queue()
+            self._worker = loop.create_task(self._run())
+
+    async def submit(self, text: str) -> list[float]:
+        self._ensure_worker()
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((text, future))
+        return await future
+
+    async def _collect(self) -> list[tuple[str, asyncio.Future]]:
+        batch = [await self._queue.get()]
+        deadline = self._loop.time() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            timeout = deadline - self._loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self):
+        while True:
+            batch = await self._collect()
+            # Callers that gave up (cancelled) don't need encoding
+            batch = [(text, future) for text, future in batch if not future.done()]
+            if not batch:
+                continue
+            texts = [text for text, _ in batch]
+            try:
+                embeddings = await self._loop.run_in_executor(self._executor, self._encode_batch, texts)
+            except Exception as e:
+                logger.error(f"Batch embedding failed for {len(texts)} texts: {e}")
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+
+            self._batches += 1
+            self._items += len(texts)
+            for (_, future), embedding in zip(batch, embeddings):
+                if not future.done():
+                    future.set_result(embedding)
+
+    def stats(self) -> dict:
+        return {
+            "batches": self._batches,
+            "items": self._items,
+            "avg_batch_size": round(self._items / self._batches, 2) if self._batches else 0.0,
+            "queue_depth": self._queue.qsize() if self._queue is not None else 0,
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000,
+        }
 
 
 class EmbeddingService:
-    def __init__(self):
-        self.model = None
-        self.model_name = "all-MiniLM-L6-v2"
-
-    def _load_model(self):
-        if self.model is None:
-            self.model = SentenceTransformer(self.model_name)
-
-    def generate(self, text: str) -> list[float]:
-        """Generate embedding for text"""
-        self._load_model()
-        if not text or not text.strip():
-            return [0.0] * 384
-        embedding = self.model.encode(text.strip(), normalize_embeddings=True)
-        return embedding.tolist()
+    """
+    Sentence-transformer embeddings, cached and micro-batched per model.
+
+    ``model_name`` is the default model; during a model swap callers pass
+    the active or next model explicitly (see ``embedding_models``), and each
+    model gets its own lazily loaded encoder and batcher. Encoders run on
+    the EMBEDDING_BACKEND inference backend (see ``embedding_backends``).
+
+    With EMBEDDING_SOCKET set, encoding is delegated to the shared
+    embedding server (see ``embedding_server``) and no model is loaded in
+    this process; ``remote=False`` is the server's own, local service.
+    """
+
+    def __init__(self, remote: bool = True):
+        self._models: dict[str, EmbeddingBackend] = {}
+        self._batchers: dict[str, EmbeddingBatcher] = {}
+        self._model_lock = threading.Lock()
+        self.model_name = settings.EMBEDDING_MODEL_NAME
+        self.dimension = 384
+        self.cache = embedding_cache
+        self.batcher = self.batcher_for(self.model_name)
+        self.client = None
+        if remote and settings.EMBEDDING_SOCKET:
+            self.client = EmbeddingClient(settings.EMBEDDING_SOCKET, settings.EMBEDDING_SOCKET_TIMEOUT)
+
+    def batcher_for(self, model_name: str) -> EmbeddingBatcher:
+        if model_name not in self._batchers:
+            self._batchers[model_name] = EmbeddingBatcher(
+                lambda texts: self._encode_batch(texts, model_name),
+                max_batch_size=settings.EMBEDDING_BATCH_SIZE,
+                max_wait_ms=settings.EMBEDDING_BATCH_WAIT_MS,
+            )
+        return self._batchers[model_name]
+
+    def _load_model(self, model_name: str) -> EmbeddingBackend:
+        if model_name not in self._models:
+            with self._model_lock:
+                if model_name not in self._models:
+                    model = load_backend(settings.EMBEDDING_BACKEND, model_name, settings.EMBEDDING_THREADS)
+                    logger.info(f"Loaded {model_name} on the {model.name} backend")
+                    dimension = model.dimension
+                    if dimension != self.dimension:
+                        raise ValueError(f"Model '{model_name}' produces {dimension}-d vectors, columns hold {self.dimension}")
+                    self._models[model_name] = model
+        return self._models[model_name]
+
+    def loaded_models(self) -> dict[str, str]:
+        """Loaded models and the backend each runs on"""
+        return {model_name: model.name for model_name, model in self._models.items()}
+
+    def batcher_stats(self) -> dict[str, dict]:
+        return {model_name: batcher.stats() for model_name, batcher in self._batchers.items()}
+
+    def _encode_batch(self, texts: list[str], model_name: str | None = None, batch_size: int | None = None) -> list[list[float]]:
+        if self.client is not None:
+            return self.client.encode_sync(texts, model_name or self.model_name, batch_size)
+        model = self._load_model(model_name or self.model_name)
+        embeddings = model.encode(texts, batch_size=batch_size or settings.EMBEDDING_BATCH_SIZE)
+        return embeddings.tolist()
+
+    async def agenerate(self, text: str, model_name: str | None = None) -> list[float]:
+        """Generate embedding for text without blocking the event loop (cached, micro-batched)"""
+        model_name = model_name or self.model_name
+        text = normalize_text(text or "")
+        if not text:
+            return [0.0] * self.dimension
+        key = cache_key(model_name, text)
+        embedding = await self.cache.get(key)
+        if embedding is None:
+            if self.client is not None:
+                # The server batches across all workers
+                embedding = (await self.client.encode([text], model_name))[0]
+            else:
+                embedding = await self.batcher_for(model_name).submit(text)
+            await self.cache.put(key, model_name, embedding)
+        return embedding
+
+    async def aencode_many(self, texts: list[str], model_name: str, batch_size: int) -> list[list[float]]:
+        """
+        Encode a large batch in one call, bypassing the caches and the
+        micro-batcher; for backfills, where every text is new.
+        """
+        texts = [normalize_text(text or "") for text in texts]
+        if self.client is not None:
+            return await self.client.encode(texts, model_name, batch_size=batch_size, bulk=True)
+        return await asyncio.to_thread(self._encode_batch, texts, model_name, batch_size)
+
+    async def stats(self) -> dict:
+        """Batcher statistics, from the embedding server when one is used"""
+        if self.client is None:
+            return self.batcher.stats()
+        try:
+            return await self.client.stats()
+        except Exception as e:
+            return {"socket": self.client.socket_path, "error": str(e)}
 
 
 embedding_service = EmbeddingService()
@@ -0,0 +1,234 @@
+"""
+Embedding inference backends
+
+All backends produce L2-normalised sentence embeddings for the same
+sentence-transformers model, so vectors from one can be compared with
+vectors stored by another (check with ``python -m app.cli.embedding_parity``):
+
+* ``torch`` runs the stock ``SentenceTransformer`` (the reference).
+* ``torch-int8`` applies PyTorch dynamic int8 quantization to its Linear
+  layers; smaller and faster per core, no export step.
+* ``onnx`` runs the transformer exported to ONNX on ONNX Runtime, with
+  tokenization, pooling and normalisation done here. Torch is only needed
+  for the one-off export.
+* ``onnx-int8`` is the same graph with dynamically quantized int8 weights,
+  the smallest and fastest option on CPU.
+
+Exports are cached under ``EMBEDDING_ONNX_DIR``, one directory per model.
+"""
+import fcntl
+import json
+import logging
+import os
+import shutil
+from abc import ABC, abstractmethod
+
+import numpy as np
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class EmbeddingBackend(ABC):
+    name = None
+
+    def __init__(self, model_name: str, threads: int = 0):
+        self.model_name = model_name
+        self.threads = threads
+
+    @property
+    @abstractmethod
+    def dimension(self) -> int:
+        ...
+
+    @abstractmethod
+    def encode(self, texts: list[str], batch_size: int) -> np.ndarray:
+        """Normalised embeddings, one float32 row per text"""
+
+
+class TorchBackend(EmbeddingBackend):
+    name = "torch"
+
+    def __init__(self, model_name: str, threads: int = 0):
+        super().__init__(model_name, threads)
+        import torch
+        from sentence_transformers import SentenceTransformer
+
+        if threads:
+            torch.set_num_threads(threads)
+        self.model = SentenceTransformer(model_name, device="cpu")
+
+    @property
+    def dimension(self) -> int:
+        return self.model.get_sentence_embedding_dimension()
+
+    def encode(self, texts: list[str], batch_size: int) -> np.ndarray:
+        return self.model.encode(texts, batch_size=batch_size, normalize_embeddings=True)
+
+
+class TorchInt8Backend(TorchBackend):
+    name = "torch-int8"
+
+    def __init__(self, model_name: str, threads: int = 0):
+        super().__init__(model_name, threads)
+        import torch
+
+        self.model = torch.quantization.quantize_dynamic(
+            self.model, {torch.nn.Linear}, dtype=torch.qint8, inplace=True
+        )
+
+
+def onnx_export_dir(model_name: str, root: str) -> str:
+    return os.path.join(root, model_name.replace("/", "__"))
+
+
+def export_onnx(model_name: str, root: str) -> str:
+    """
+    Export a sentence-transformers model to ONNX (fp32 and int8) once.
+
+    Writes ``model.onnx``, ``model_int8.onnx``, the tokenizer files and
+    ``meta.json`` (pooling mode, max sequence length, dimension).
+
+    Exports are serialised across processes by a lock file, written to a
+    temp directory and renamed into place, so a worker never loads a
+    half-written model and a finished export is never replaced.
+    """
+    path = onnx_export_dir(model_name, root)
+    os.makedirs(root, exist_ok=True)
+    with open(f"{path}.lock", "a") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            return _export_onnx(model_name, path)
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+def _export_onnx(model_name: str, path: str) -> str:
+    # Another process may have finished the export while we waited
+    if os.path.exists(os.path.join(path, "meta.json")):
+        return path
+
+    import torch
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+    from sentence_transformers import SentenceTransformer
+    from sentence_transformers.models import Pooling
+
+    st_model = SentenceTransformer(model_name, device="cpu")
+    transformer = st_model[0].auto_model.eval()
+    tokenizer = st_model.tokenizer
+    pooling = next((module for module in st_model if isinstance(module, Pooling)), None)
+    pooling_mode = "cls" if pooling is not None and pooling.pooling_mode_cls_token else "mean"
+
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    shutil.rmtree(temp_path, ignore_errors=True)
+    os.makedirs(temp_path)
+
+    sample = tokenizer(["embedding export"], return_tensors="pt")
+    input_names = [name for name in ("input_ids", "attention_mask", "token_type_ids") if name in sample]
+    dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in input_names}
+    dynamic_axes["last_hidden_state"] = {0: "batch", 1: "sequence"}
+    with torch.no_grad():
+        torch.onnx.export(
+            transformer,
+            tuple(sample[name] for name in input_names),
+            os.path.join(temp_path, "model.onnx"),
+            input_names=input_names,
+            output_names=["last_hidden_state"],
+            dynamic_axes=dynamic_axes,
+            opset_version=14,
+        )
+    quantize_dynamic(
+        os.path.join(temp_path, "model.onnx"),
+        os.path.join(temp_path, "model_int8.onnx"),
+        weight_type=QuantType.QInt8,
+    )
+    tokenizer.save_pretrained(temp_path)
+    with open(os.path.join(temp_path, "meta.json"), "w") as f:
+        json.dump({
+            "model": model_name,
+            "pooling": pooling_mode,
+            "max_seq_length": st_model.max_seq_length,
+            "dimension": st_model.get_sentence_embedding_dimension(),
+        }, f)
+
+    # Only an incomplete export (no meta.json) can be in the way
+    shutil.rmtree(path, ignore_errors=True)
+    os.replace(temp_path, path)
+    logger.info(f"Exported {model_name} to ONNX at {path}")
+    return path
+
+
+class OnnxBackend(EmbeddingBackend):
+    name = "onnx"
+    model_file = "model.onnx"
+
+    def __init__(self, model_name: str, threads: int = 0):
+        super().__init__(model_name, threads)
+        import onnxruntime as ort
+        from transformers import AutoTokenizer
+
+        path = onnx_export_dir(model_name, settings.EMBEDDING_ONNX_DIR)
+        if not os.path.exists(os.path.join(path, "meta.json")):
+            path = export_onnx(model_name, settings.EMBEDDING_ONNX_DIR)
+        with open(os.path.join(path, "meta.json")) as f:
+            self.meta = json.load(f)
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if threads:
+            options.intra_op_num_threads = threads
+        options.inter_op_num_threads = 1
+        self.session = ort.InferenceSession(
+            os.path.join(path, self.model_file), options, providers=["CPUExecutionProvider"]
+        )
+        self.input_names = {node.name for node in self.session.get_inputs()}
+        self.tokenizer = AutoTokenizer.from_pretrained(path)
+
+    @property
+    def dimension(self) -> int:
+        return self.meta["dimension"]
+
+    def _encode_batch(self, texts: list[str]) -> np.ndarray:
+        tokens = self.tokenizer(
+            texts, padding=True, truncation=True, max_length=self.meta["max_seq_length"], return_tensors="np"
+        )
+        inputs = {name: tokens[name].astype(np.int64) for name in self.input_names}
+        hidden = self.session.run(["last_hidden_state"], inputs)[0]
+        if self.meta["pooling"] == "cls":
+            pooled = hidden[:, 0]
+        else:
+            mask = tokens["attention_mask"][..., None].astype(np.float32)
+            pooled = (hidden * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+        norms = np.linalg.norm(pooled, axis=1, keepdims=True)
+        return (pooled / np.clip(norms, 1e-12, None)).astype(np.float32)
+
+    def encode(self, texts: list[str], batch_size: int) -> np.ndarray:
+        if not texts:
+            return np.empty((0, self.dimension), dtype=np.float32)
+        # Sort by length so each batch pads to similar lengths, then restore order
+        order = np.argsort([len(text) for text in texts])
+        batches = [
+            self._encode_batch([texts[i] for i in order[start:start + batch_size]])
+            for start in range(0, len(texts), batch_size)
+        ]
+        embeddings = np.empty((len(texts), self.dimension), dtype=np.float32)
+        embeddings[order] = np.concatenate(batches)
+        return embeddings
+
+
+class OnnxInt8Backend(OnnxBackend):
+    name = "onnx-int8"
+    model_file = "model_int8.onnx"
+
+
+BACKENDS = {
+    backend.name: backend
+    for backend in (TorchBackend, TorchInt8Backend, OnnxBackend, OnnxInt8Backend)
+}
+
+
+def load_backend(name: str, model_name: str, threads: int = 0) -> EmbeddingBackend:
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown embedding backend '{name}', expected one of {tuple(BACKENDS)}")
+    return BACKENDS[name](model_name, threads)
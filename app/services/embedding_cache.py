@@ -0,0 +1,141 @@
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from sqlalchemy import select, delete
+from sqlalchemy.dialects.postgresql import insert
+
+from app.core.config import settings
+from app.db.session import AsyncSessionLocal
+from app.models.embedding_cache import EmbeddingCacheEntry
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_text(text: str) -> str:
+    """Collapse whitespace so trivially different copies share a cache entry"""
+    return " ".join(text.split())
+
+
+def model_label(model_name: str, backend: str | None = None) -> str:
+    """The model and the backend producing its vectors (quantized backends encode slightly differently)"""
+    return f"{model_name}@{backend or settings.EMBEDDING_BACKEND}"
+
+
+def cache_key(model_name: str, normalized_text: str, backend: str | None = None) -> str:
+    return hashlib.sha256(f"{model_label(model_name, backend)}\n{normalized_text}".encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    """
+    Two-tier, content-addressed embedding cache.
+
+    The memory tier is a bounded LRU local to this process; the persistent
+    tier is the ``embedding_cache`` table shared by all workers and restarts.
+    Keys include the model name and the backend, so switching either never
+    returns stale vectors, and rows for other models or backends are purged
+    on startup.
+    """
+
+    def __init__(self, max_entries: int, persistent: bool):
+        self.max_entries = max_entries
+        self.persistent = persistent
+        self._memory: OrderedDict[str, list[float]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._memory_hits = 0
+        self._db_hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    def get_memory(self, key: str) -> list[float] | None:
+        with self._lock:
+            embedding = self._memory.get(key)
+            if embedding is not None:
+                self._memory.move_to_end(key)
+                self._memory_hits += 1
+            return embedding
+
+    def put_memory(self, key: str, embedding: list[float]):
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._memory[key] = embedding
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_entries:
+                self._memory.popitem(last=False)
+                self._evictions += 1
+
+    def record_miss(self):
+        with self._lock:
+            self._misses += 1
+
+    async def get(self, key: str) -> list[float] | None:
+        embedding = self.get_memory(key)
+        if embedding is not None:
+            return embedding
+
+        if self.persistent:
+            try:
+                async with AsyncSessionLocal() as session:
+                    result = await session.execute(
+                        select(EmbeddingCacheEntry.embedding).where(EmbeddingCacheEntry.key == key)
+                    )
+                    row = result.scalar_one_or_none()
+            except Exception as e:
+                logger.warning(f"Embedding cache lookup failed: {e}")
+                row = None
+            if row is not None:
+                embedding = [float(x) for x in row]
+                with self._lock:
+                    self._db_hits += 1
+                self.put_memory(key, embedding)
+                return embedding
+
+        self.record_miss()
+        return None
+
+    async def put(self, key: str, model_name: str, embedding: list[float]):
+        self.put_memory(key, embedding)
+        if not self.persistent:
+            return
+        try:
+            async with AsyncSessionLocal() as session:
+                await session.execute(
+                    insert(EmbeddingCacheEntry)
+                    .values(key=key, model_name=model_label(model_name), embedding=embedding)
+                    .on_conflict_do_nothing(index_elements=["key"])
+                )
+                await session.commit()
+        except Exception as e:
+            logger.warning(f"Embedding cache write failed: {e}")
+
+    async def purge_other_models(self, *model_names: str) -> int:
+        """Drop persisted vectors produced by any model other than ``model_names`` on the current backend"""
+        if not self.persistent:
+            return 0
+        labels = [model_label(model_name) for model_name in model_names]
+        async with AsyncSessionLocal() as session:
+            result = await session.execute(
+                delete(EmbeddingCacheEntry).where(EmbeddingCacheEntry.model_name.not_in(labels))
+            )
+            await session.commit()
+            if result.rowcount:
+                logger.info(f"Purged {result.rowcount} cached embeddings from previous models")
+            return result.rowcount
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "memory_entries": len(self._memory),
+                "max_entries": self.max_entries,
+                "memory_hits": self._memory_hits,
+                "db_hits": self._db_hits,
+                "misses": self._misses,
+                "evictions": self._evictions,
+            }
+
+
+embedding_cache = EmbeddingCache(
+    max_entries=settings.EMBEDDING_CACHE_SIZE,
+    persistent=settings.EMBEDDING_CACHE_PERSISTENT,
+)
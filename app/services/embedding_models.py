@@ -0,0 +1,431 @@
+import asyncio
+import json
+import logging
+import os
+import uuid
+from datetime import datetime
+from sqlalchemy import select, update, func, or_, text
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.db.session import AsyncSessionLocal, engine
+from app.models.cv import CV
+from app.models.embedding_model_state import EmbeddingModelState
+from app.models.jd import JD
+from app.services import match_table
+from app.services.embedding import embedding_service
+from app.services.embedding_cache import normalize_text
+from app.services.vector_index import EMBEDDING_COLUMNS, VECTOR_INDEXES, rebuild_index
+from app.services.vector_store import vector_store
+
+logger = logging.getLogger(__name__)
+
+TABLES = {"cv": CV, "jd": JD}
+TARGETS = ("active", "next")
+LOCK_NOT_AVAILABLE = "55P03"  # SQLSTATE of a lock_timeout
+
+
+def _source_text(model):
+    """The text a row's embedding is computed from (as at insert time)"""
+    if model is CV:
+        return CV.raw_text
+    return JD.title + " " + JD.requirements
+
+
+async def model_state(db: AsyncSession, for_share: bool = False) -> tuple[str, str | None]:
+    """
+    (active model, next model); the configured model if the table is not migrated.
+
+    ``for_share`` locks the state row until the transaction ends, so a
+    cutover (which takes it FOR UPDATE) cannot flip the models under a write.
+    """
+    query = select(EmbeddingModelState.active_model, EmbeddingModelState.next_model).where(EmbeddingModelState.id == 1)
+    if for_share:
+        query = query.with_for_update(read=True)
+    result = await db.execute(query)
+    row = result.one_or_none()
+    if row is None:
+        return settings.EMBEDDING_MODEL_NAME, None
+    return row.active_model, row.next_model
+
+
+async def embedding_values(texts: list[str]) -> list[dict]:
+    """
+    Embedding column values for new rows, one dict per text.
+
+    The active model fills ``embedding``; during a model swap the next model
+    fills ``embedding_next`` too, so rows written mid-swap need no backfill.
+    A failed encode leaves that vector empty (``embedding_generated`` false
+    for the active one) for the backfill to retry.
+
+    The models are read before encoding, without a lock and in a session of
+    their own, so no transaction stays open while encoding; writers pass the
+    values through ``pin_embedding_columns`` in the INSERT's transaction.
+    """
+    async with AsyncSessionLocal() as db:
+        active, next_model = await model_state(db)
+    current = await asyncio.gather(
+        *[embedding_service.agenerate(text, active) for text in texts], return_exceptions=True
+    )
+    upcoming = [None] * len(texts)
+    if next_model:
+        upcoming = await asyncio.gather(
+            *[embedding_service.agenerate(text, next_model) for text in texts], return_exceptions=True
+        )
+
+    now = datetime.utcnow()
+    values = []
+    for embedding, next_embedding in zip(current, upcoming):
+        ok = not isinstance(embedding, Exception)
+        if not ok:
+            logger.error(f"Embedding generation failed: {embedding}")
+        if isinstance(next_embedding, Exception):
+            logger.error(f"Next-model embedding generation failed: {next_embedding}")
+            next_embedding = None
+        values.append({
+            "embedding": embedding if ok else None,
+            "embedding_model": active if ok else None,
+            "embedding_generated": ok,
+            "embedding_generated_at": now if ok else None,
+            "embedding_next": next_embedding,
+            "embedding_next_model": next_model if next_embedding is not None else None,
+        })
+    return values
+
+
+async def pin_embedding_columns(db: AsyncSession, values: list[dict]) -> list[dict]:
+    """
+    Map ``embedding_values`` output to the columns of the models live now.
+
+    Call first in the transaction that writes the rows. The model state row
+    is read FOR SHARE, so a cutover waits for the write to commit; and a
+    write that starts after a cutover committed finds its vectors by model
+    name and stores them in the renamed columns. A transaction that already
+    read ``cv`` or ``jd`` would deadlock with a cutover instead, which takes
+    the state row before locking those tables. Old-model
+    vectors never land in ``embedding``. A model with no vector (it failed,
+    or was started after encoding) leaves its column empty for the backfill.
+    """
+    active, next_model = await model_state(db, for_share=True)
+    now = datetime.utcnow()
+    pinned = []
+    for value in values:
+        vectors = {
+            value["embedding_model"]: value["embedding"],
+            value["embedding_next_model"]: value["embedding_next"],
+        }
+        vectors.pop(None, None)
+        embedding = vectors.get(active)
+        next_embedding = vectors.get(next_model) if next_model else None
+        pinned.append({
+            "embedding": embedding,
+            "embedding_model": active if embedding is not None else None,
+            "embedding_generated": embedding is not None,
+            "embedding_generated_at": (value["embedding_generated_at"] or now) if embedding is not None else None,
+            "embedding_next": next_embedding,
+            "embedding_next_model": next_model if next_embedding is not None else None,
+        })
+    return pinned
+
+
+def _pending(model, target: str, model_name: str):
+    if target == "active":
+        return or_(model.embedding.is_(None), model.embedding_model.is_distinct_from(model_name))
+    return model.embedding_next_model.is_distinct_from(model_name)
+
+
+async def coverage(db: AsyncSession) -> dict:
+    """Per table: rows, and rows still pending for the active and next model"""
+    active, next_model = await model_state(db)
+    report = {"active_model": active, "next_model": next_model, "tables": {}}
+    for table, model in TABLES.items():
+        counts = {"rows": (await db.execute(select(func.count()).select_from(model))).scalar()}
+        counts["pending_active"] = (await db.execute(
+            select(func.count()).select_from(model).where(_pending(model, "active", active))
+        )).scalar()
+        if next_model:
+            counts["pending_next"] = (await db.execute(
+                select(func.count()).select_from(model).where(_pending(model, "next", next_model))
+            )).scalar()
+        report["tables"][table] = counts
+    return report
+
+
+def _load_checkpoint(path: str | None) -> dict:
+    if not path or not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def _save_checkpoint(path: str | None, checkpoint: dict):
+    if not path:
+        return
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path + ".tmp", "w") as f:
+        json.dump(checkpoint, f)
+    os.replace(path + ".tmp", path)
+
+
+async def _after_active_backfill(
+    db: AsyncSession, table: str, rows: list[tuple[uuid.UUID, list[float]]], replaced: set[uuid.UUID]
+):
+    """
+    Bring the vector store and match table up to date with new live vectors.
+
+    Rows in ``replaced`` already had a (stale) vector, which may be in the
+    store; appending would leave both copies there and the stale one could
+    win, so they are left for the store rebuild at the end of the backfill.
+    """
+    ids = [row_id for row_id, _ in rows]
+    if table == "cv":
+        vector_store.append([(row_id, vector) for row_id, vector in rows if row_id not in replaced])
+        await match_table.merge_cvs(db, ids)
+    else:
+        jds = (await db.execute(select(JD).where(JD.id.in_(ids)).where(JD.is_active == True))).scalars().all()
+        for jd in jds:
+            await match_table.compute_for_jd(db, jd)
+
+
+async def backfill(
+    table: str,
+    target: str = "active",
+    batch_size: int = 256,
+    throttle: float = 0.0,
+    checkpoint_path: str | None = None,
+    limit: int | None = None,
+    restart: bool = False
+) -> dict:
+    """
+    Embed every row missing a vector from the target model.
+
+    ``active`` (re)fills ``embedding`` for rows whose embedding failed or
+    came from another model; ``next`` fills ``embedding_next`` ahead of a
+    cutover. Rows are walked in id order and encoded in one large batch per
+    ``batch_size`` rows; the last id done is checkpointed after every batch,
+    so an interrupted run resumes where it stopped (``restart`` starts over
+    and retries rows that failed). ``throttle`` seconds of sleep between
+    batches bound the load on the database and the encoder. If a cutover
+    changes the target's model mid-run, the backfill stops with an error.
+    """
+    if table not in TABLES:
+        raise ValueError(f"Unknown table '{table}', expected one of {tuple(TABLES)}")
+    if target not in TARGETS:
+        raise ValueError(f"Unknown target '{target}', expected one of {TARGETS}")
+    model = TABLES[table]
+
+    async with AsyncSessionLocal() as db:
+        active, next_model = await model_state(db)
+    model_name = active if target == "active" else next_model
+    if not model_name:
+        raise ValueError("No model swap in progress; start one before backfilling 'next'")
+
+    checkpoint = _load_checkpoint(checkpoint_path)
+    checkpoint_key = f"{table}:{target}:{model_name}"
+    last_id = None if restart else checkpoint.get(checkpoint_key)
+    last_id = uuid.UUID(last_id) if last_id else None
+    done = skipped = 0
+    store_stale = False
+
+    while limit is None or done + skipped < limit:
+        async with AsyncSessionLocal() as db:
+            query = (
+                select(
+                    model.id,
+                    _source_text(model).label("source_text"),
+                    model.embedding.is_not(None).label("had_embedding"),
+                )
+                .where(_pending(model, target, model_name))
+                .order_by(model.id)
+                .limit(batch_size if limit is None else min(batch_size, limit - done - skipped))
+            )
+            if last_id:
+                query = query.where(model.id > last_id)
+            rows = (await db.execute(query)).all()
+            # Don't hold the read lock on the table while encoding (see pin_embedding_columns)
+            await db.rollback()
+            if not rows:
+                break
+
+            # Empty texts have no meaningful vector; they stay pending
+            todo = [row for row in rows if normalize_text(row.source_text or "")]
+            skipped += len(rows) - len(todo)
+            if todo:
+                vectors = await embedding_service.aencode_many(
+                    [row.source_text for row in todo], model_name, batch_size
+                )
+                now = datetime.utcnow()
+                if target == "active":
+                    values = [
+                        {"id": row.id, "embedding": vector, "embedding_model": model_name,
+                         "embedding_generated": True, "embedding_generated_at": now}
+                        for row, vector in zip(todo, vectors)
+                    ]
+                else:
+                    values = [
+                        {"id": row.id, "embedding_next": vector, "embedding_next_model": model_name}
+                        for row, vector in zip(todo, vectors)
+                    ]
+                # Under the state lock, so the vectors cannot land in columns a cutover just swapped
+                state = dict(zip(TARGETS, await model_state(db, for_share=True)))
+                if state[target] != model_name:
+                    await db.rollback()
+                    raise ValueError(f"The {target} model changed to {state[target]} during the backfill; run it again")
+                await db.execute(update(model), values)
+                await db.commit()
+                done += len(todo)
+
+                if target == "active":
+                    replaced = {row.id for row in todo if row.had_embedding}
+                    store_stale = store_stale or (table == "cv" and bool(replaced))
+                    try:
+                        await _after_active_backfill(
+                            db, table, [(row.id, vector) for row, vector in zip(todo, vectors)], replaced
+                        )
+                    except Exception as e:
+                        await db.rollback()
+                        logger.error(f"Could not update match data after backfilling {table}: {e}", exc_info=True)
+
+        last_id = rows[-1].id
+        checkpoint[checkpoint_key] = str(last_id)
+        _save_checkpoint(checkpoint_path, checkpoint)
+        logger.info(f"Backfilled {done} {table} rows for {model_name} ({target}), last id {last_id}")
+        if throttle:
+            await asyncio.sleep(throttle)
+
+    # Re-embedded CVs were not appended to the store; rebuild it instead
+    store_rebuilt = store_stale and settings.VECTOR_STORE_ENABLED and vector_store.exists()
+    if store_rebuilt:
+        await vector_store.rebuild()
+
+    return {
+        "table": table, "target": target, "model": model_name, "embedded": done, "skipped": skipped,
+        "vector_store_rebuilt": store_rebuilt,
+    }
+
+
+async def start_swap(model_name: str):
+    """Make ``model_name`` the next model; writers start embedding with it too"""
+    # Fails fast on unknown models or a dimension the columns cannot hold
+    await embedding_service.aencode_many(["model check"], model_name, 1)
+    async with AsyncSessionLocal() as db:
+        active, _ = await model_state(db)
+        if model_name == active:
+            raise ValueError(f"'{model_name}' is already the active model")
+        await db.execute(update(EmbeddingModelState).where(EmbeddingModelState.id == 1).values(next_model=model_name))
+        await db.commit()
+    logger.info(f"Started swap from {active} to {model_name}")
+
+
+def _swap_sql(first: str, second: str, rename: str) -> list[str]:
+    """Three renames exchanging two names"""
+    return [
+        rename.format(old=first, new=f"{first}_swap"),
+        rename.format(old=second, new=first),
+        rename.format(old=f"{first}_swap", new=second),
+    ]
+
+
+async def cutover(force: bool = False) -> dict:
+    """
+    Switch the live vectors to the next model in one transaction.
+
+    Indexes over ``embedding_next`` are built concurrently first. Then the
+    ``embedding``/``embedding_next`` columns (and their model labels and
+    indexes) are exchanged by renames, which only touch the catalog, and
+    the model state flips; searches see either the old or the new model,
+    never a mix. The state row is taken FOR UPDATE first, which waits for
+    in-flight writes holding it FOR SHARE (see ``pin_embedding_columns``)
+    and makes later writes see the new models; if the locks are not granted
+    within ``EMBEDDING_CUTOVER_LOCK_TIMEOUT`` the cutover gives up with a
+    ValueError. The old vectors stay in ``embedding_next`` with the old
+    model as next, so running cutover again rolls back. Match lists are
+    recomputed afterwards and the vector store is rebuilt.
+    """
+    async with AsyncSessionLocal() as db:
+        active, next_model = await model_state(db)
+        if not next_model:
+            raise ValueError("No model swap in progress")
+        pending = (await coverage(db))["tables"]
+    missing = {table: counts["pending_next"] for table, counts in pending.items() if counts["pending_next"]}
+    if missing and not force:
+        raise ValueError(f"Rows without {next_model} vectors: {missing}; run the 'next' backfill first")
+
+    for table in TABLES:
+        await rebuild_index(table, column="embedding_next")
+
+    # The store holds old-model vectors; hide it until it is rebuilt
+    store_meta = os.path.join(vector_store.path, "meta.json")
+    if os.path.exists(store_meta):
+        os.remove(store_meta)
+
+    try:
+        await _swap_columns(active, next_model)
+    except DBAPIError as e:
+        if getattr(e.orig, "sqlstate", None) != LOCK_NOT_AVAILABLE:
+            raise
+        raise ValueError(
+            f"Timed out after {settings.EMBEDDING_CUTOVER_LOCK_TIMEOUT}s waiting for writes to cv/jd; run it again"
+        )
+    logger.info(f"Cut over from {active} to {next_model}")
+
+    async with AsyncSessionLocal() as db:
+        rebuilt = await match_table.rebuild(db)
+    if settings.VECTOR_STORE_ENABLED:
+        await vector_store.rebuild()
+    return {"active_model": next_model, "previous_model": active, "match_lists_rebuilt": rebuilt}
+
+
+async def _swap_columns(active: str, next_model: str):
+    async with engine.begin() as conn:
+        # Fail rather than queue every reader of cv/jd behind a long wait for the table locks
+        timeout_ms = int(settings.EMBEDDING_CUTOVER_LOCK_TIMEOUT * 1000)
+        await conn.execute(text(f"SET LOCAL lock_timeout = {timeout_ms}"))
+        state = (await conn.execute(
+            select(EmbeddingModelState.active_model, EmbeddingModelState.next_model)
+            .where(EmbeddingModelState.id == 1)
+            .with_for_update()
+        )).one()
+        if (state.active_model, state.next_model) != (active, next_model):
+            raise ValueError("The model state changed while preparing the cutover; run it again")
+        await conn.execute(text("LOCK TABLE cv, jd IN ACCESS EXCLUSIVE MODE"))
+        for table in TABLES:
+            statements = (
+                _swap_sql("embedding", "embedding_next", f"ALTER TABLE {table} RENAME COLUMN {{old}} TO {{new}}")
+                + _swap_sql("embedding_model", "embedding_next_model", f"ALTER TABLE {table} RENAME COLUMN {{old}} TO {{new}}")
+                + _swap_sql(
+                    VECTOR_INDEXES[table], VECTOR_INDEXES[table] + EMBEDDING_COLUMNS["embedding_next"],
+                    "ALTER INDEX {old} RENAME TO {new}"
+                )
+            )
+            for statement in statements:
+                await conn.execute(text(statement))
+            await conn.execute(text(
+                f"UPDATE {table} SET embedding_generated = embedding IS NOT NULL "
+                f"WHERE embedding_generated IS DISTINCT FROM (embedding IS NOT NULL)"
+            ))
+        # Stored lists were ranked with the old model; serve live until recomputed
+        await conn.execute(text("UPDATE jd SET matches_computed_at = NULL"))
+        await conn.execute(
+            update(EmbeddingModelState).where(EmbeddingModelState.id == 1)
+            .values(active_model=next_model, next_model=active, updated_at=func.now())
+        )
+
+
+async def discard_next():
+    """Finish a swap: stop dual writes and free the previous model's vectors and indexes"""
+    async with AsyncSessionLocal() as db:
+        await db.execute(update(EmbeddingModelState).where(EmbeddingModelState.id == 1).values(next_model=None))
+        await db.commit()
+
+    async with engine.connect() as conn:
+        conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+        for table in TABLES:
+            index = VECTOR_INDEXES[table] + EMBEDDING_COLUMNS["embedding_next"]
+            await conn.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {index}"))
+            await conn.execute(text(
+                f"UPDATE {table} SET embedding_next = NULL, embedding_next_model = NULL "
+                f"WHERE embedding_next IS NOT NULL OR embedding_next_model IS NOT NULL"
+            ))
+    logger.info("Discarded next-model vectors")
@@ -0,0 +1,212 @@
+"""
+Shared embedding runtime over a Unix socket
+
+One sidecar process (``python -m app.cli.embedding_server``) holds the
+embedding models; every uvicorn worker on the host sends it texts over
+``EMBEDDING_SOCKET`` instead of loading its own copy. Memory stays flat as
+workers are added, the model is loaded (and warmed) once, and concurrent
+requests from all workers are coalesced into the sidecar's micro-batches.
+
+Frames are ``[header length][payload length]`` (two big-endian uint32),
+a JSON header, then a binary payload. Requests carry no payload; encode
+responses carry the embeddings as a float32 matrix.
+"""
+import asyncio
+import json
+import logging
+import os
+import socket
+import struct
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+_FRAME = struct.Struct(">II")
+
+
+def _pack(header: dict, payload: bytes = b"") -> bytes:
+    body = json.dumps(header, separators=(",", ":")).encode()
+    return _FRAME.pack(len(body), len(payload)) + body + payload
+
+
+def _unpack_embeddings(header: dict, payload: bytes) -> list[list[float]]:
+    if "error" in header:
+        raise RuntimeError(f"Embedding server: {header['error']}")
+    matrix = np.frombuffer(payload, dtype=np.float32).reshape(header["count"], header["dimension"])
+    return matrix.tolist()
+
+
+async def _read_frame(reader: asyncio.StreamReader) -> tuple[dict, bytes]:
+    header_length, payload_length = _FRAME.unpack(await reader.readexactly(_FRAME.size))
+    header = json.loads(await reader.readexactly(header_length))
+    payload = await reader.readexactly(payload_length) if payload_length else b""
+    return header, payload
+
+
+def _recv_exactly(sock: socket.socket, size: int) -> bytes:
+    chunks = []
+    while size:
+        chunk = sock.recv(size)
+        if not chunk:
+            raise ConnectionError("Embedding server closed the connection")
+        chunks.append(chunk)
+        size -= len(chunk)
+    return b"".join(chunks)
+
+
+class EmbeddingClient:
+    """
+    Client used by the API workers. Connections are kept open and reused;
+    a connection that fails mid-request is dropped, not returned to the pool,
+    and a request that fails on a reused connection (e.g. after the server
+    restarted) is retried once on a fresh one.
+    """
+
+    def __init__(self, socket_path: str, timeout: float):
+        self.socket_path = socket_path
+        self.timeout = timeout
+        self._idle: list[tuple[asyncio.StreamReader, asyncio.StreamWriter]] = []
+        self._loop: asyncio.AbstractEventLoop | None = None
+
+    async def _connect(self) -> tuple[asyncio.StreamReader, asyncio.StreamWriter]:
+        try:
+            return await asyncio.open_unix_connection(self.socket_path)
+        except OSError as e:
+            raise ConnectionError(f"Embedding server not reachable at {self.socket_path}: {e}")
+
+    async def request(self, header: dict) -> tuple[dict, bytes]:
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            # Connections belong to the loop that opened them
+            self._loop = loop
+            self._idle = []
+
+        frame = _pack(header)
+        while True:
+            reused = bool(self._idle)
+            reader, writer = self._idle.pop() if reused else await self._connect()
+            try:
+                writer.write(frame)
+                await writer.drain()
+                response = await asyncio.wait_for(_read_frame(reader), self.timeout)
+            except (asyncio.IncompleteReadError, ConnectionError):
+                writer.close()
+                if reused:
+                    continue
+                raise ConnectionError(f"Embedding server at {self.socket_path} closed the connection")
+            except BaseException:
+                writer.close()
+                raise
+            self._idle.append((reader, writer))
+            return response
+
+    async def encode(
+        self, texts: list[str], model_name: str, batch_size: int | None = None, bulk: bool = False
+    ) -> list[list[float]]:
+        """
+        Embed ``texts``. Without ``bulk`` each text joins the server's
+        micro-batches; with it the list is encoded as one large batch.
+        """
+        header, payload = await self.request(
+            {"op": "encode", "model": model_name, "texts": texts, "batch_size": batch_size, "bulk": bulk}
+        )
+        return _unpack_embeddings(header, payload)
+
+    def encode_sync(self, texts: list[str], model_name: str, batch_size: int | None = None) -> list[list[float]]:
+        """Blocking variant on a short-lived connection, for sync callers"""
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(self.timeout)
+            try:
+                sock.connect(self.socket_path)
+            except OSError as e:
+                raise ConnectionError(f"Embedding server not reachable at {self.socket_path}: {e}")
+            sock.sendall(_pack({
+                "op": "encode", "model": model_name, "texts": texts, "batch_size": batch_size, "bulk": True
+            }))
+            header_length, payload_length = _FRAME.unpack(_recv_exactly(sock, _FRAME.size))
+            header = json.loads(_recv_exactly(sock, header_length))
+            payload = _recv_exactly(sock, payload_length) if payload_length else b""
+        return _unpack_embeddings(header, payload)
+
+    async def stats(self) -> dict:
+        header, _ = await self.request({"op": "stats"})
+        return header
+
+
+class EmbeddingServer:
+    """
+    Serves a local ``EmbeddingService`` on a Unix socket. Single texts go
+    through the service's per-model batchers, so requests from different
+    workers share batches; bulk requests are encoded directly.
+    """
+
+    def __init__(self, service, socket_path: str):
+        self.service = service
+        self.socket_path = socket_path
+        self._connections = 0
+        self._requests = 0
+
+    async def serve_forever(self):
+        directory = os.path.dirname(self.socket_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        if os.path.exists(self.socket_path):
+            # Left over from a previous run; a live server would own it
+            os.unlink(self.socket_path)
+        server = await asyncio.start_unix_server(self._handle, path=self.socket_path)
+        os.chmod(self.socket_path, 0o660)
+        logger.info(f"Embedding server listening on {self.socket_path}")
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            if os.path.exists(self.socket_path):
+                os.unlink(self.socket_path)
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self._connections += 1
+        try:
+            while True:
+                try:
+                    header, _ = await _read_frame(reader)
+                except (asyncio.IncompleteReadError, ConnectionError):
+                    break
+                self._requests += 1
+                try:
+                    response = await self._dispatch(header)
+                except Exception as e:
+                    logger.error(f"Embedding request failed: {e}")
+                    response = _pack({"error": str(e)})
+                writer.write(response)
+                await writer.drain()
+        finally:
+            self._connections -= 1
+            writer.close()
+
+    async def _dispatch(self, header: dict) -> bytes:
+        if header.get("op") == "stats":
+            return _pack(self.stats())
+        if header.get("op") != "encode":
+            raise ValueError(f"Unknown operation {header.get('op')!r}")
+
+        texts, model_name = header["texts"], header["model"]
+        if header.get("bulk"):
+            embeddings = await asyncio.to_thread(
+                self.service._encode_batch, texts, model_name, header.get("batch_size")
+            )
+        else:
+            batcher = self.service.batcher_for(model_name)
+            embeddings = await asyncio.gather(*[batcher.submit(text) for text in texts])
+        matrix = np.asarray(embeddings, dtype=np.float32).reshape(len(texts), self.service.dimension)
+        return _pack({"count": len(texts), "dimension": self.service.dimension}, matrix.tobytes())
+
+    def stats(self) -> dict:
+        return {
+            "socket": self.socket_path,
+            "pid": os.getpid(),
+            "connections": self._connections,
+            "requests": self._requests,
+            "models": self.service.loaded_models(),
+            "batchers": self.service.batcher_stats(),
+        }
@@ -0,0 +1,145 @@
+import asyncio
+import logging
+import multiprocessing
+import weakref
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class ExtractionError(Exception):
+    """Raised when a document cannot be turned into text"""
+
+
+class ExtractionTimeout(ExtractionError):
+    """Raised when extraction exceeds the per-task timeout"""
+
+
+class ExtractionExecutor:
+    """
+    Runs PDF/DOCX extraction in a process pool so the event loop stays free.
+
+    Concurrency is bounded by an asyncio semaphore sized to the worker count,
+    which lets us report how many tasks are waiting (queue depth) versus
+    running (in flight). A task exceeding the timeout gets its pool recycled
+    so a pathological file cannot keep a worker busy. Recycling kills every
+    worker, so the other tasks that were running or queued on that pool are
+    retried once on the new pool rather than failed.
+    """
+
+    def __init__(self, workers: int, task_timeout: float, max_tasks_per_child: int):
+        self.workers = workers
+        self.task_timeout = task_timeout
+        self.max_tasks_per_child = max_tasks_per_child
+        self._pool: ProcessPoolExecutor | None = None
+        self._semaphore: asyncio.Semaphore | None = None
+        self._queued = 0
+        self._in_flight = 0
+        self._completed = 0
+        self._failed = 0
+        self._timed_out = 0
+        self._pool_restarts = 0
+        self._retried = 0
+        # Pools torn down because of a timeout; their other tasks are innocent
+        self._timed_out_pools: weakref.WeakSet[ProcessPoolExecutor] = weakref.WeakSet()
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                max_tasks_per_child=self.max_tasks_per_child or None,
+            )
+        return self._pool
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.workers)
+        return self._semaphore
+
+    def _recycle_pool(self, pool: ProcessPoolExecutor):
+        """Tear down the pool, killing workers stuck on a pathological file"""
+        if pool is not self._pool:
+            # Another task already replaced it
+            return
+        self._pool = None
+        self._pool_restarts += 1
+        for process in list(getattr(pool, "_processes", {}).values()):
+            process.terminate()
+        # Queued tasks are not cancelled: they fail with BrokenProcessPool
+        # once the workers are gone, which run() knows how to retry
+        pool.shutdown(wait=False)
+
+    async def run(self, func, *args):
+        """Run ``func(*args)`` in the pool, honouring the per-task timeout"""
+        semaphore = self._get_semaphore()
+        self._queued += 1
+        try:
+            await semaphore.acquire()
+        finally:
+            self._queued -= 1
+
+        self._in_flight += 1
+        try:
+            for attempt in range(2):
+                pool = self._get_pool()
+                try:
+                    result = await self._submit(pool, func, *args)
+                except BrokenProcessPool:
+                    if attempt == 0 and pool in self._timed_out_pools:
+                        # Killed along with another task that timed out
+                        self._retried += 1
+                        logger.info(f"Retrying extraction task {func.__name__} on a fresh pool")
+                        continue
+                    self._failed += 1
+                    logger.error("Extraction pool broken (worker crashed), recycling pool")
+                    self._recycle_pool(pool)
+                    raise ExtractionError("Extraction worker crashed")
+                self._completed += 1
+                return result
+        except Exception as e:
+            if not isinstance(e, ExtractionError):
+                self._failed += 1
+            raise
+        finally:
+            self._in_flight -= 1
+            semaphore.release()
+
+    async def _submit(self, pool: ProcessPoolExecutor, func, *args):
+        future = asyncio.get_running_loop().run_in_executor(pool, func, *args)
+        try:
+            return await asyncio.wait_for(future, timeout=self.task_timeout)
+        except asyncio.TimeoutError:
+            self._timed_out += 1
+            logger.error(f"Extraction task {func.__name__} exceeded {self.task_timeout}s, recycling pool")
+            if pool is self._pool:
+                self._timed_out_pools.add(pool)
+            self._recycle_pool(pool)
+            raise ExtractionTimeout(f"Extraction timed out after {self.task_timeout}s")
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.workers,
+            "queue_depth": self._queued,
+            "in_flight": self._in_flight,
+            "completed": self._completed,
+            "failed": self._failed,
+            "timed_out": self._timed_out,
+            "pool_restarts": self._pool_restarts,
+            "retried": self._retried,
+        }
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=True, cancel_futures=True)
+            self._pool = None
+
+
+extraction_executor = ExtractionExecutor(
+    workers=settings.EXTRACTION_WORKERS,
+    task_timeout=settings.EXTRACTION_TASK_TIMEOUT,
+    max_tasks_per_child=settings.EXTRACTION_MAX_TASKS_PER_CHILD,
+)
@@ -0,0 +1,231 @@
+"""
+Document text extraction engines (run inside extraction pool workers)
+
+Engines turn a document into a lazy stream of page texts:
+
+* ``pdfium`` reads the PDF text layer directly through PDFium. It is an
+  order of magnitude faster than layout analysis and is what clean,
+  digitally produced resumes need.
+* ``pdfplumber`` reconstructs text from character positions. It is slow but
+  copes with documents whose text layer is missing spaces or garbled.
+* ``python-docx`` reads DOCX paragraphs.
+
+``EXTRACTION_ENGINE=auto`` tries pdfium first and re-extracts with
+pdfplumber only when the fast text looks unusable.
+"""
+import mmap
+from abc import ABC, abstractmethod
+from contextlib import closing, contextmanager
+from io import BytesIO
+from typing import Iterator
+
+import docx
+import pdfplumber
+import pypdfium2 as pdfium
+
+# Heuristics for rejecting a fast-path text layer in ``auto`` mode
+MIN_CHARS_PER_PAGE = 100
+MAX_BAD_CHAR_RATIO = 0.01
+MAX_AVG_WORD_LENGTH = 25
+
+
+@contextmanager
+def open_source(source: bytes | str):
+    """
+    Open extraction input as a seekable file object.
+
+    ``source`` is either the document bytes or a path to a spooled upload,
+    which is memory-mapped rather than read into another buffer.
+    """
+    if isinstance(source, (bytes, bytearray)):
+        yield BytesIO(source)
+        return
+    with open(source, "rb") as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as view:
+            yield view
+
+
+def collect_text(parts, max_chars: int | None) -> tuple[str, bool]:
+    """
+    Join text parts until ``max_chars`` is reached.
+
+    Returns ``(text, truncated)``; ``truncated`` is set only if text was cut
+    or non-empty parts were left unread. Stops pulling from ``parts`` as soon
+    as the budget is met, so lazy producers do no further work.
+    """
+    parts = iter(parts)
+    collected = []
+    length = 0
+    for part in parts:
+        # Separators only count between parts
+        length += len(part) + (1 if collected else 0)
+        collected.append(part)
+        if max_chars is not None and length >= max_chars:
+            text = "\n".join(collected).strip()
+            if len(text) > max_chars:
+                return text[:max_chars], True
+            # Exactly at the budget: truncated only if more text follows
+            return text, any(rest.strip() for rest in parts)
+    return "\n".join(collected).strip(), False
+
+
+class ExtractionEngine(ABC):
+    """Turns a document into page texts, optionally for a page range"""
+
+    name: str = ""
+
+    @abstractmethod
+    def page_count(self, source: bytes | str) -> int:
+        ...
+
+    @abstractmethod
+    def iter_pages(self, source: bytes | str, start: int = 0, stop: int | None = None) -> Iterator[str]:
+        ...
+
+
+class PdfiumEngine(ExtractionEngine):
+    """Fast path: the PDF's embedded text layer, no layout analysis"""
+
+    name = "pdfium"
+
+    def page_count(self, source: bytes | str) -> int:
+        pdf = pdfium.PdfDocument(source)
+        try:
+            return len(pdf)
+        finally:
+            pdf.close()
+
+    def iter_pages(self, source: bytes | str, start: int = 0, stop: int | None = None) -> Iterator[str]:
+        # PDFium opens paths natively, so spooled uploads are never copied
+        pdf = pdfium.PdfDocument(source)
+        try:
+            stop = len(pdf) if stop is None else min(stop, len(pdf))
+            for index in range(start, stop):
+                page = pdf[index]
+                textpage = page.get_textpage()
+                try:
+                    text = textpage.get_text_bounded()
+                finally:
+                    textpage.close()
+                    page.close()
+                yield text.replace("\r\n", "\n").replace("\r", "\n")
+        finally:
+            pdf.close()
+
+
+class PdfplumberEngine(ExtractionEngine):
+    """Layout-aware fallback built on pdfminer character positions"""
+
+    name = "pdfplumber"
+
+    def page_count(self, source: bytes | str) -> int:
+        with open_source(source) as stream, pdfplumber.open(stream) as pdf:
+            return len(pdf.pages)
+
+    def iter_pages(self, source: bytes | str, start: int = 0, stop: int | None = None) -> Iterator[str]:
+        with open_source(source) as stream, pdfplumber.open(stream) as pdf:
+            for page in pdf.pages[start:stop]:
+                try:
+                    yield page.extract_text() or ""
+                finally:
+                    # Release the page's layout cache before moving on
+                    page.close()
+
+
+class DocxEngine(ExtractionEngine):
+    """DOCX paragraphs; the whole document counts as a single page"""
+
+    name = "python-docx"
+
+    def page_count(self, source: bytes | str) -> int:
+        return 1
+
+    def iter_pages(self, source: bytes | str, start: int = 0, stop: int | None = None) -> Iterator[str]:
+        with open_source(source) as stream:
+            doc = docx.Document(stream)
+            for paragraph in doc.paragraphs:
+                yield paragraph.text
+
+
+ENGINES: dict[str, ExtractionEngine] = {
+    engine.name: engine for engine in (PdfiumEngine(), PdfplumberEngine(), DocxEngine())
+}
+PDF_ENGINES = ("auto", "pdfium", "pdfplumber")
+
+
+def text_layer_usable(text: str, pages: int) -> bool:
+    """Whether fast-path text is good enough to skip layout analysis"""
+    if pages and len(text.strip()) < MIN_CHARS_PER_PAGE * pages:
+        return False
+    if not text:
+        return True
+    bad = sum(1 for ch in text if ch == "\ufffd" or (ord(ch) < 32 and ch not in "\n\t"))
+    if bad > MAX_BAD_CHAR_RATIO * len(text):
+        return False
+    words = text.split()
+    # A text layer without explicit spaces comes back as run-together words
+    return not words or sum(len(w) for w in words) / len(words) <= MAX_AVG_WORD_LENGTH
+
+
+def _read_pages(
+    engine: ExtractionEngine,
+    source: bytes | str,
+    start: int,
+    stop: int | None,
+    max_chars: int | None
+) -> tuple[str, bool, int]:
+    """Collect page texts with ``engine``; returns (text, truncated, pages read)"""
+    pages_read = 0
+
+    def counted():
+        nonlocal pages_read
+        for text in engine.iter_pages(source, start, stop):
+            pages_read += 1
+            yield text
+
+    with closing(counted()) as pages:
+        text, truncated = collect_text(pages, max_chars)
+    return text, truncated, pages_read
+
+
+def pdf_page_count(source: bytes | str) -> int:
+    """Number of pages in a PDF (cheap: PDFium reads only the page tree)"""
+    return ENGINES["pdfium"].page_count(source)
+
+
+def extract_document(
+    source: bytes | str,
+    file_type: str,
+    engine: str = "auto",
+    max_chars: int | None = None,
+    max_pages: int | None = None,
+    page_range: tuple[int, int] | None = None
+) -> tuple[str, bool, str]:
+    """
+    Extract text from document bytes or a file path (runs inside a pool worker)
+
+    ``page_range`` restricts a PDF to pages ``[start, stop)`` so large
+    documents can be split across workers; otherwise the first
+    ``max_pages`` pages are read. Extraction stops once ``max_chars``
+    characters are collected. Returns ``(text, truncated, engine_used)``.
+    """
+    if file_type == "docx":
+        text, truncated, _ = _read_pages(ENGINES["python-docx"], source, 0, None, max_chars)
+        return text, truncated, "python-docx"
+
+    if engine not in PDF_ENGINES:
+        raise ValueError(f"Unknown PDF extraction engine: {engine}")
+
+    start, stop = page_range or (0, max_pages)
+    first = ENGINES["pdfplumber" if engine == "pdfplumber" else "pdfium"]
+    text, truncated, pages_read = _read_pages(first, source, start, stop, max_chars)
+    used = first.name
+
+    if engine == "auto" and not text_layer_usable(text, pages_read):
+        text, truncated, pages_read = _read_pages(ENGINES["pdfplumber"], source, start, stop, max_chars)
+        used = "pdfplumber"
+
+    if page_range is None and max_pages is not None and pages_read >= max_pages and not truncated:
+        # Stopped at the page budget; only truncated if more pages exist
+        truncated = pdf_page_count(source) > max_pages
+    return text, truncated, used
@@ -0,0 +1,191 @@
+import hashlib
+import logging
+import time
+from contextlib import asynccontextmanager
+from datetime import datetime
+from fastapi import HTTPException
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm.attributes import set_committed_value
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.session import AsyncSessionLocal
+from app.models.cv import CV
+from app.services.cv_processor import CVProcessor
+from app.services import match_table
+from app.services.embedding_models import embedding_values, pin_embedding_columns
+from app.services.matching import normalize_skills
+from app.services.result_cache import result_cache
+from app.services.vector_store import vector_store
+
+logger = logging.getLogger(__name__)
+
+
+class PipelineTrace:
+    """
+    Records per-stage status and timings of a CV ingestion run.
+
+    ``on_change`` (an async callable taking the trace) is awaited whenever a
+    stage starts or finishes, which is how queued jobs persist progress.
+    """
+
+    def __init__(self, on_change=None):
+        self.stages: dict[str, dict] = {}
+        self._on_change = on_change
+
+    async def _notify(self):
+        if self._on_change is not None:
+            await self._on_change(self)
+
+    @asynccontextmanager
+    async def stage(self, name: str):
+        started = time.monotonic()
+        self.stages[name] = {"status": "running", "started_at": datetime.utcnow().isoformat(), "duration_ms": None}
+        await self._notify()
+        try:
+            yield
+        except Exception:
+            self.stages[name]["status"] = "failed"
+            raise
+        else:
+            self.stages[name]["status"] = "succeeded"
+        finally:
+            self.stages[name]["duration_ms"] = round((time.monotonic() - started) * 1000, 1)
+            await self._notify()
+
+
+def content_hash_of(content: bytes | str) -> str:
+    """SHA-256 of file bytes, or of the file at a path"""
+    if isinstance(content, str):
+        digest = hashlib.sha256()
+        with open(content, "rb") as f:
+            for block in iter(lambda: f.read(1024 * 1024), b""):
+                digest.update(block)
+        return digest.hexdigest()
+    return hashlib.sha256(content).hexdigest()
+
+
+def filename_for(content_type: str) -> str:
+    """Derive a stored filename from the upload's content type"""
+    content_type = (content_type or "").lower()
+    if "pdf" in content_type:
+        return "uploaded_cv.pdf"
+    if "word" in content_type or "document" in content_type:
+        return "uploaded_cv.docx"
+    return "uploaded_cv"
+
+
+async def find_cv_by_hash(db: AsyncSession, content_hash: str):
+    result = await db.execute(select(CV.id).where(CV.content_hash == content_hash))
+    return result.scalar_one_or_none()
+
+
+async def ingest_cv(
+    db: AsyncSession,
+    content: bytes | str,
+    content_type: str,
+    content_hash: str | None = None,
+    filename: str | None = None,
+    deadline: float | None = None,
+    trace: PipelineTrace | None = None,
+    full_text: bool = False,
+) -> CV:
+    """
+    Run the full CV pipeline: extract, parse, embed and store.
+
+    ``content`` is the file bytes or the path of a spooled upload.
+    ``full_text`` disables the extraction budget (archival copies).
+
+    Raises HTTPException for invalid input (400) or duplicates (409), so the
+    same function serves the synchronous endpoint and background workers.
+    ``db`` must not be in a transaction: read locks held through extraction
+    and the LLM call would deadlock with a model cutover.
+    """
+    trace = trace or PipelineTrace()
+    content_hash = content_hash or content_hash_of(content)
+    filename = filename or filename_for(content_type)
+
+    logger.info("Starting CV extraction and parsing")
+    async with trace.stage("extract"):
+        extracted = await CVProcessor.extract_text(content, content_type, full_text=full_text)
+    raw_text = extracted["raw_text"]
+
+    async with trace.stage("parse"):
+        cv_data = await CVProcessor.parse_text(raw_text, deadline)
+    logger.info(f"CV extraction successful. Extracted data keys: {list(cv_data.keys())}")
+
+    # Validate required fields
+    logger.info("Validating required fields")
+    if not cv_data.get("email"):
+        raise HTTPException(
+            status_code=400,
+            detail="Could not extract email from CV. Please ensure CV contains email address."
+        )
+
+    if not cv_data.get("candidate_name"):
+        raise HTTPException(status_code=400, detail="Could not extract name from CV. Please ensure CV contains candidate name.")
+
+    logger.info(f"Extracted candidate: {cv_data['candidate_name']}, email: {cv_data['email']}")
+
+    # Check if email already exists
+    logger.info(f"Checking if email already exists: {cv_data['email']}")
+    result = await db.execute(select(CV.id).where(CV.email == cv_data["email"]))
+    if result.scalar_one_or_none():
+        logger.warning(f"CV with email {cv_data['email']} already exists")
+        raise HTTPException(status_code=400, detail=f"CV with email {cv_data['email']} already exists")
+    # Release the lock on cv before encoding; the INSERT's transaction pins the models first
+    await db.rollback()
+
+    cv = CV(
+        candidate_name=cv_data["candidate_name"],
+        email=cv_data["email"],
+        phone=cv_data.get("phone"),
+        raw_text=cv_data["raw_text"],
+        text_truncated=extracted["text_truncated"],
+        extraction_engine=extracted["extraction_engine"],
+        summary=cv_data.get("summary"),
+        skills=cv_data.get("skills"),
+        skill_keys=normalize_skills(cv_data.get("skills")),
+        file_name=filename,
+        file_type=extracted["file_type"],
+        content_hash=content_hash
+    )
+
+    # Generate embedding (a failure leaves embedding_generated false for the backfill)
+    logger.info("Generating embedding for CV text")
+    async with trace.stage("embed"):
+        logger.info(f"Text length for embedding: {len(raw_text)} characters")
+        values = (await embedding_values([raw_text]))[0]
+    if values["embedding_generated"]:
+        logger.info(f"Embedding generated successfully. Dimension: {len(values['embedding'])}")
+
+    logger.info("Saving CV to database")
+    async with trace.stage("store"):
+        # First in the INSERT's transaction, so a concurrent cutover cannot mix models
+        for column, value in (await pin_embedding_columns(db, [values]))[0].items():
+            setattr(cv, column, value)
+        db.add(cv)
+        try:
+            await db.commit()
+        except IntegrityError:
+            # A concurrent upload of the same file or email won the race
+            await db.rollback()
+            logger.warning(f"CV insert conflicted for hash {content_hash} / email {cv_data['email']}")
+            raise HTTPException(status_code=409, detail="This CV has already been uploaded")
+        # Live-search results of this worker are stale from now on, without
+        # waiting for the notification
+        result_cache.invalidate_pool()
+        await db.refresh(cv)
+        # raw_text is deferred, so refresh() expired it; keep the text just written
+        set_committed_value(cv, "raw_text", cv_data["raw_text"])
+
+    if cv.embedding_generated:
+        vector_store.append([(cv.id, cv.embedding)])
+        try:
+            # Separate session: a failure here must not expire the returned CV
+            async with AsyncSessionLocal() as session:
+                await match_table.merge_cvs(session, [cv.id])
+        except Exception as e:
+            # The CV is stored; the rebuild CLI can catch the match table up
+            logger.error(f"Could not merge CV {cv.id} into the match table: {e}", exc_info=True)
+    return cv
@@ -0,0 +1,275 @@
+import asyncio
+import logging
+import time
+import uuid
+from datetime import timedelta
+from fastapi import HTTPException
+from sqlalchemy import select, update, delete, insert, func, or_, and_
+
+from app.core.config import settings
+from app.db.session import AsyncSessionLocal
+from app.models.ingestion_job import IngestionJob, IngestionJobChunk
+from app.services.ingestion import PipelineTrace, find_cv_by_hash, ingest_cv
+from app.services.upload import SpooledUpload
+
+# Uploads are stored, and read back, this many bytes at a time
+CHUNK_BYTES = 1024 * 1024
+
+logger = logging.getLogger(__name__)
+
+
+class IngestionQueue:
+    """
+    Durable CV ingestion queue backed by the ``ingestion_job`` table.
+
+    Uploads are stored as ``queued`` rows; workers claim them with
+    ``SELECT ... FOR UPDATE SKIP LOCKED`` so any number of workers across
+    processes can share the queue. A claimed job holds a lease (``locked_at``)
+    refreshed at every stage; if a worker dies, the job is reclaimed once the
+    lease expires, up to ``INGESTION_MAX_ATTEMPTS`` times. Attempts that fail
+    on a transient error are retried the same number of times, with
+    exponential backoff; invalid files (4xx) fail straight away.
+
+    The uploaded file is stored in ``ingestion_job_chunk`` rows so neither
+    side ever holds more than a chunk of it in memory.
+    """
+
+    def __init__(self, workers: int, poll_interval: float, lease_seconds: float, max_attempts: int, retry_backoff: float):
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.retry_backoff = retry_backoff
+        self._tasks: list[asyncio.Task] = []
+        self._wakeup: asyncio.Event | None = None
+        self._processed = 0
+        self._failed = 0
+        self._retried = 0
+
+    async def enqueue(self, db, upload: SpooledUpload, content_type: str) -> IngestionJob:
+        job = IngestionJob(
+            status="queued",
+            content_type=content_type,
+            content_hash=upload.content_hash,
+            stages={},
+        )
+        db.add(job)
+        await db.flush()
+        for seq, data in enumerate(upload.iter_chunks(CHUNK_BYTES)):
+            await db.execute(insert(IngestionJobChunk).values(job_id=job.id, seq=seq, data=data))
+        await db.commit()
+        await db.refresh(job)
+        if self._wakeup is not None:
+            self._wakeup.set()
+        return job
+
+    async def find_pending(self, db, content_hash: str) -> IngestionJob | None:
+        """Return a queued or running job for the same file, if any"""
+        result = await db.execute(
+            select(IngestionJob)
+            .where(IngestionJob.content_hash == content_hash)
+            .where(IngestionJob.status.in_(["queued", "running"]))
+            .limit(1)
+        )
+        return result.scalar_one_or_none()
+
+    def _lease_cutoff(self):
+        return func.now() - timedelta(seconds=self.lease_seconds)
+
+    async def _claim(self) -> uuid.UUID | None:
+        async with AsyncSessionLocal() as session:
+            candidate = (
+                select(IngestionJob.id)
+                .where(or_(
+                    and_(
+                        IngestionJob.status == "queued",
+                        or_(IngestionJob.retry_at.is_(None), IngestionJob.retry_at <= func.now()),
+                    ),
+                    and_(
+                        IngestionJob.status == "running",
+                        IngestionJob.locked_at < self._lease_cutoff(),
+                        IngestionJob.attempts < self.max_attempts,
+                    ),
+                ))
+                .order_by(IngestionJob.created_at)
+                .limit(1)
+                .with_for_update(skip_locked=True)
+                .scalar_subquery()
+            )
+            result = await session.execute(
+                update(IngestionJob)
+                .where(IngestionJob.id == candidate)
+                .values(
+                    status="running",
+                    attempts=IngestionJob.attempts + 1,
+                    locked_at=func.now(),
+                    started_at=func.coalesce(IngestionJob.started_at, func.now()),
+                )
+                .returning(IngestionJob.id)
+            )
+            job_id = result.scalar_one_or_none()
+            await session.commit()
+            return job_id
+
+    async def _fail_abandoned(self):
+        """Give up on jobs whose lease expired after the last allowed attempt"""
+        async with AsyncSessionLocal() as session:
+            result = await session.execute(
+                update(IngestionJob)
+                .where(IngestionJob.status == "running")
+                .where(IngestionJob.locked_at < self._lease_cutoff())
+                .where(IngestionJob.attempts >= self.max_attempts)
+                .values(status="failed", error="Worker lease expired too many times", finished_at=func.now())
+                .returning(IngestionJob.id)
+            )
+            job_ids = list(result.scalars())
+            if job_ids:
+                await session.execute(delete(IngestionJobChunk).where(IngestionJobChunk.job_id.in_(job_ids)))
+            await session.commit()
+
+    async def _save(self, job_id: uuid.UUID, **values):
+        async with AsyncSessionLocal() as session:
+            await session.execute(
+                update(IngestionJob).where(IngestionJob.id == job_id).values(**values)
+            )
+            await session.commit()
+
+    async def _finish(self, job_id: uuid.UUID, **values):
+        """Record the outcome and drop the stored file"""
+        async with AsyncSessionLocal() as session:
+            await session.execute(
+                update(IngestionJob).where(IngestionJob.id == job_id).values(finished_at=func.now(), **values)
+            )
+            await session.execute(delete(IngestionJobChunk).where(IngestionJobChunk.job_id == job_id))
+            await session.commit()
+
+    async def _load_upload(self, session, job_id: uuid.UUID) -> SpooledUpload:
+        """Stream the stored file into a spooled upload, a chunk at a time"""
+        upload = SpooledUpload(max_memory=settings.UPLOAD_SPOOL_MAX_MEMORY)
+        try:
+            chunks = await session.stream_scalars(
+                select(IngestionJobChunk.data)
+                .where(IngestionJobChunk.job_id == job_id)
+                .order_by(IngestionJobChunk.seq)
+            )
+            async for data in chunks:
+                upload.write(data)
+        except BaseException:
+            upload.close()
+            raise
+        return upload
+
+    async def _process(self, job_id: uuid.UUID):
+        async with AsyncSessionLocal() as session:
+            result = await session.execute(
+                select(IngestionJob.content_type, IngestionJob.content_hash, IngestionJob.attempts)
+                .where(IngestionJob.id == job_id)
+            )
+            content_type, content_hash, attempts = result.one()
+            # A previous attempt may have committed the CV and died before
+            # recording success; re-ingesting would fail as a duplicate
+            cv_id = await find_cv_by_hash(session, content_hash) if attempts > 1 else None
+            if cv_id is None:
+                upload = await self._load_upload(session, job_id)
+
+        if cv_id is not None:
+            self._processed += 1
+            await self._finish(job_id, status="succeeded", cv_id=cv_id)
+            logger.info(f"Ingestion job {job_id} already ingested by an earlier attempt, CV {cv_id}")
+            return
+
+        async def persist(trace: PipelineTrace):
+            # Stage transitions double as a lease heartbeat
+            await self._save(job_id, stages=trace.stages, locked_at=func.now())
+
+        trace = PipelineTrace(on_change=persist)
+        deadline = time.monotonic() + settings.INGESTION_JOB_BUDGET_SECONDS
+        try:
+            async with AsyncSessionLocal() as db:
+                cv = await ingest_cv(
+                    db, upload.source(), content_type, content_hash=content_hash, deadline=deadline, trace=trace
+                )
+        except HTTPException as e:
+            if e.status_code >= 500:
+                await self._retry_or_fail(job_id, attempts, str(e.detail), e.status_code, trace)
+                return
+            # Invalid or duplicate file: another attempt would fail the same way
+            self._failed += 1
+            await self._finish(
+                job_id, status="failed", error=str(e.detail), error_status_code=e.status_code, stages=trace.stages
+            )
+            return
+        except Exception as e:
+            logger.error(f"Ingestion job {job_id} attempt {attempts} failed: {e}", exc_info=True)
+            await self._retry_or_fail(job_id, attempts, str(e), 500, trace)
+            return
+        finally:
+            upload.close()
+
+        self._processed += 1
+        await self._finish(job_id, status="succeeded", cv_id=cv.id, stages=trace.stages)
+        logger.info(f"Ingestion job {job_id} succeeded, CV {cv.id}")
+
+    async def _retry_or_fail(self, job_id: uuid.UUID, attempts: int, error: str, status_code: int, trace: PipelineTrace):
+        """Requeue after a transient error, or fail once the attempts are used up"""
+        if attempts >= self.max_attempts:
+            self._failed += 1
+            await self._finish(job_id, status="failed", error=error, error_status_code=status_code, stages=trace.stages)
+            return
+        self._retried += 1
+        delay = self.retry_backoff * 2 ** (attempts - 1)
+        logger.warning(f"Ingestion job {job_id} will be retried in {delay:.0f}s")
+        await self._save(
+            job_id, status="queued", error=error, error_status_code=status_code, stages=trace.stages,
+            locked_at=None, retry_at=func.now() + timedelta(seconds=delay)
+        )
+
+    async def _worker(self, index: int):
+        while True:
+            try:
+                job_id = await self._claim()
+                if job_id is None:
+                    await self._fail_abandoned()
+                    self._wakeup.clear()
+                    try:
+                        await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+                    except asyncio.TimeoutError:
+                        pass
+                    continue
+                logger.info(f"Ingestion worker {index} claimed job {job_id}")
+                await self._process(job_id)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Ingestion worker {index} error: {e}", exc_info=True)
+                await asyncio.sleep(self.poll_interval)
+
+    def start(self):
+        if self._tasks or self.workers <= 0:
+            return
+        self._wakeup = asyncio.Event()
+        self._tasks = [asyncio.create_task(self._worker(i)) for i in range(self.workers)]
+        logger.info(f"Started {self.workers} ingestion workers")
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def stats(self) -> dict:
+        return {
+            "workers": len(self._tasks),
+            "processed": self._processed,
+            "failed": self._failed,
+            "retried": self._retried,
+        }
+
+
+ingestion_queue = IngestionQueue(
+    workers=settings.INGESTION_WORKERS,
+    poll_interval=settings.INGESTION_POLL_INTERVAL,
+    lease_seconds=settings.INGESTION_LEASE_SECONDS,
+    max_attempts=settings.INGESTION_MAX_ATTEMPTS,
+    retry_backoff=settings.INGESTION_RETRY_BACKOFF_SECONDS,
+)
@@ -0,0 +1,142 @@
+import asyncio
+import logging
+import random
+import time
+import httpx
+from openai import (
+    AsyncOpenAI,
+    APIConnectionError,
+    APITimeoutError,
+    InternalServerError,
+    RateLimitError,
+)
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Errors worth retrying; auth, validation and other 4xx errors are not
+RETRYABLE_ERRORS = (APIConnectionError, APITimeoutError, RateLimitError, InternalServerError)
+
+
+class LLMDeadlineExceeded(Exception):
+    """Raised when the caller's time budget runs out before the LLM answers"""
+
+
+class LLMClient:
+    """
+    Process-wide async OpenAI client.
+
+    One ``AsyncOpenAI`` instance (and its pooled HTTP connections) is shared by
+    every request. A semaphore caps concurrent LLM calls, each call is bounded
+    by the caller's deadline, and only transient errors are retried.
+    """
+
+    def __init__(self, max_concurrency: int, max_attempts: int, timeout: float):
+        self.max_concurrency = max_concurrency
+        self.max_attempts = max_attempts
+        self.timeout = timeout
+        self._client: AsyncOpenAI | None = None
+        self._semaphore: asyncio.Semaphore | None = None
+        self._waiting = 0
+        self._in_flight = 0
+        self._calls = 0
+        self._retries = 0
+        self._failures = 0
+
+    def _get_client(self) -> AsyncOpenAI:
+        if self._client is None:
+            self._client = AsyncOpenAI(
+                api_key=settings.OPENAI_API_KEY,
+                base_url=settings.OPENAI_BASE_URL,
+                max_retries=0,  # retries are handled here, within the deadline
+                http_client=httpx.AsyncClient(
+                    limits=httpx.Limits(
+                        max_connections=self.max_concurrency,
+                        max_keepalive_connections=self.max_concurrency,
+                    ),
+                    timeout=self.timeout,
+                ),
+            )
+        return self._client
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._semaphore
+
+    def _remaining(self, deadline: float | None) -> float:
+        if deadline is None:
+            return self.timeout
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise LLMDeadlineExceeded("Request time budget exhausted before LLM call")
+        return min(self.timeout, remaining)
+
+    async def chat(self, messages: list[dict], model: str, deadline: float | None = None, **kwargs) -> str:
+        """Run a chat completion and return the message content"""
+        semaphore = self._get_semaphore()
+        attempt = 0
+        while True:
+            attempt += 1
+            try:
+                remaining = self._remaining(deadline)
+            except LLMDeadlineExceeded:
+                self._failures += 1
+                raise
+            self._waiting += 1
+            try:
+                await asyncio.wait_for(semaphore.acquire(), timeout=remaining)
+            except asyncio.TimeoutError:
+                self._failures += 1
+                raise LLMDeadlineExceeded("Timed out waiting for an LLM slot")
+            finally:
+                self._waiting -= 1
+
+            self._in_flight += 1
+            try:
+                self._calls += 1
+                response = await self._get_client().chat.completions.create(
+                    model=model,
+                    messages=messages,
+                    timeout=self._remaining(deadline),
+                    **kwargs
+                )
+                return response.choices[0].message.content
+            except RETRYABLE_ERRORS as e:
+                delay = min(8.0, 0.5 * 2 ** (attempt - 1)) * random.uniform(0.5, 1.0)
+                out_of_time = deadline is not None and time.monotonic() + delay >= deadline
+                if attempt >= self.max_attempts or out_of_time:
+                    self._failures += 1
+                    raise
+                self._retries += 1
+                logger.warning(f"LLM call failed ({type(e).__name__}), retrying in {delay:.2f}s")
+            except Exception:
+                self._failures += 1
+                raise
+            finally:
+                self._in_flight -= 1
+                semaphore.release()
+
+            await asyncio.sleep(delay)
+
+    def stats(self) -> dict:
+        return {
+            "max_concurrency": self.max_concurrency,
+            "waiting": self._waiting,
+            "in_flight": self._in_flight,
+            "calls": self._calls,
+            "retries": self._retries,
+            "failures": self._failures,
+        }
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.close()
+            self._client = None
+
+
+llm_client = LLMClient(
+    max_concurrency=settings.LLM_MAX_CONCURRENCY,
+    max_attempts=settings.LLM_MAX_ATTEMPTS,
+    timeout=settings.LLM_TIMEOUT,
+)
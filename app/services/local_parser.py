@@ -0,0 +1,194 @@
+import re
+
+# Patterns are compiled once at import time
+EMAIL_RE = re.compile(r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}\b')
+PHONE_RE = re.compile(r'[\+]?[(]?\d{1,4}[)]?[-\s\.]?\(?\d{1,3}\)?[-\s\.]?\d{1,4}[-\s\.]?\d{1,4}[-\s\.]?\d{1,9}')
+NAME_LABEL_RE = re.compile(r'^\s*(?:full\s+)?name\s*:\s*(.+)$', re.IGNORECASE)
+NAME_LINE_RE = re.compile(r'^[A-Za-z][A-Za-z\.\'\-]*(?:\s+[A-Za-z][A-Za-z\.\'\-]*){1,3}$')
+SKILL_SPLIT_RE = re.compile(r'[,;•\|\n]')
+
+# Heading text -> canonical section name
+SECTION_HEADINGS = {
+    "summary": "summary",
+    "professional summary": "summary",
+    "objective": "summary",
+    "career objective": "summary",
+    "profile": "summary",
+    "professional profile": "summary",
+    "about": "summary",
+    "about me": "summary",
+    "skills": "skills",
+    "technical skills": "skills",
+    "key skills": "skills",
+    "core skills": "skills",
+    "competencies": "skills",
+    "core competencies": "skills",
+    "experience": "experience",
+    "work experience": "experience",
+    "professional experience": "experience",
+    "employment history": "experience",
+    "education": "education",
+    "projects": "projects",
+    "certifications": "certifications",
+    "languages": "languages",
+}
+SECTION_RE = re.compile(
+    r'^\s*(' + "|".join(sorted((re.escape(h) for h in SECTION_HEADINGS), key=len, reverse=True)) + r')\s*(?::\s*(.*))?$',
+    re.IGNORECASE
+)
+
+# Words that never appear in a candidate's name but often in the lines
+# around it: document titles, section headings and job titles
+NAME_STOPWORDS = {
+    word for heading in SECTION_HEADINGS for word in heading.split()
+} | {
+    "curriculum", "vitae", "resume", "résumé", "cv", "biodata", "contact", "details", "information",
+    "personal", "page", "references", "achievements", "interests", "hobbies", "history", "qualifications",
+    "engineer", "engineering", "developer", "manager", "analyst", "consultant", "designer", "architect",
+    "scientist", "specialist", "director", "lead", "senior", "junior", "intern", "officer", "administrator",
+    "executive", "assistant", "associate", "coordinator", "technician", "accountant", "programmer",
+    "software", "data", "product", "project", "marketing", "sales", "full", "stack", "frontend", "backend",
+}
+
+FIELDS = ("name", "email", "phone", "skills", "summary")
+
+
+def segment(text: str) -> tuple[list[str], dict[str, list[str]]]:
+    """
+    Split CV text into sections in a single pass over its lines.
+
+    Returns the non-empty lines before the first heading (the header block)
+    and a mapping of canonical section name to its lines. Inline content after
+    a heading (``Skills: Python, SQL``) is kept as the section's first line.
+    """
+    header: list[str] = []
+    sections: dict[str, list[str]] = {}
+    current = None
+    for raw_line in text.splitlines():
+        line = raw_line.strip()
+        if not line:
+            continue
+        match = SECTION_RE.match(line)
+        if match:
+            current = SECTION_HEADINGS[match.group(1).lower()]
+            sections.setdefault(current, [])
+            if match.group(2):
+                sections[current].append(match.group(2).strip())
+            continue
+        if current is None:
+            header.append(line)
+        else:
+            sections[current].append(line)
+    return header, sections
+
+
+def _parse_email(text: str) -> tuple[str | None, float]:
+    emails = list(dict.fromkeys(e.lower() for e in EMAIL_RE.findall(text)))
+    if not emails:
+        return None, 0.0
+    return emails[0], 0.95 if len(emails) == 1 else 0.8
+
+
+def _parse_phone(text: str) -> tuple[str | None, float]:
+    for match in PHONE_RE.finditer(text):
+        phone = match.group(0).strip()
+        digits = sum(c.isdigit() for c in phone)
+        if len(phone) >= 10 and 10 <= digits <= 15:
+            return phone, 0.9
+        if len(phone) >= 10:
+            return phone, 0.5
+    return None, 0.0
+
+
+def _stopwords(line: str) -> list[bool]:
+    return [word.strip(".'-:").lower() in NAME_STOPWORDS for word in line.split()]
+
+
+def _looks_like_name(line: str) -> bool:
+    return bool(NAME_LINE_RE.match(line)) and not any(_stopwords(line))
+
+
+def _matches_email(name: str, email: str | None) -> bool:
+    """Whether the email's local part is built from the name (jane.doe, jdoe)"""
+    if not email:
+        return False
+    local = re.sub(r'[^a-z]', '', email.split("@")[0].lower())
+    tokens = [re.sub(r'[^a-z]', '', token.lower()) for token in name.split()]
+    first, last = tokens[0], tokens[-1]
+    if len(last) < 2:
+        return False
+    return (first in local or local.startswith(first[:1])) and last in local
+
+
+def _parse_name(header: list[str], lines: list[str], email: str | None) -> tuple[str | None, float]:
+    for line in lines[:5]:
+        match = NAME_LABEL_RE.match(line)
+        if match:
+            name = match.group(1).strip()
+            if len(name.split()) >= 2:
+                return name, 0.95
+
+    # A name guessed from the layout stays below PARSE_CONFIDENCE_THRESHOLD
+    # so the LLM confirms it, unless the email address corroborates it
+    for line in header[:3]:
+        if "@" in line or any(c.isdigit() for c in line):
+            continue
+        if all(_stopwords(line)):
+            # A title or heading above the name
+            continue
+        if not _looks_like_name(line):
+            break
+        if _matches_email(line, email):
+            return line, 0.9
+        return line, 0.7 if line == header[0] else 0.6
+
+    if lines and _looks_like_name(lines[0]):
+        return lines[0], 0.5
+    return None, 0.0
+
+
+def _parse_skills(sections: dict[str, list[str]]) -> tuple[list[str], float]:
+    body = sections.get("skills")
+    if not body:
+        return [], 0.0
+    skills = []
+    for part in SKILL_SPLIT_RE.split("\n".join(body)):
+        part = part.strip(" -*\t")
+        if 2 < len(part) < 50 and part not in skills:
+            skills.append(part)
+    skills = skills[:20]
+    if len(skills) >= 3:
+        return skills, 0.85
+    return skills, 0.5 if skills else 0.0
+
+
+def _parse_summary(sections: dict[str, list[str]]) -> tuple[str | None, float]:
+    body = sections.get("summary")
+    if not body:
+        return None, 0.0
+    summary = " ".join(body)
+    if 50 < len(summary) < 1000:
+        return summary, 0.85
+    if len(summary) >= 1000:
+        return summary[:1000], 0.4
+    return summary, 0.3
+
+
+def parse(text: str) -> tuple[dict, dict[str, float]]:
+    """
+    Extract candidate fields from CV text without any network calls.
+
+    Returns ``(info, confidence)`` where ``confidence`` maps every field in
+    ``FIELDS`` to a score between 0 (not found) and 1 (certain).
+    """
+    header, sections = segment(text)
+    lines = [line.strip() for line in text.splitlines() if line.strip()]
+
+    info = {}
+    confidence = {}
+    info["email"], confidence["email"] = _parse_email(text)
+    info["phone"], confidence["phone"] = _parse_phone(text)
+    info["name"], confidence["name"] = _parse_name(header, lines, info["email"])
+    info["skills"], confidence["skills"] = _parse_skills(sections)
+    info["summary"], confidence["summary"] = _parse_summary(sections)
+    return info, confidence
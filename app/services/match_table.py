@@ -0,0 +1,196 @@
+import logging
+import uuid
+from sqlalchemy import select, update, delete, insert, text, func
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.models.cv import CV
+from app.models.cv_jd_match import CVJDMatch
+from app.models.jd import JD
+from app.services.matching import CV_MATCH_COLUMNS
+from app.services.result_cache import result_cache
+
+logger = logging.getLogger(__name__)
+
+# Transaction-level advisory lock: taken exclusively while a JD's list is
+# computed and shared by merges, so a CV committed after the ranking is
+# merged into the finished list instead of being missed or overwritten
+MATCH_TABLE_LOCK_KEY = 0x63766A64  # "cvjd"
+
+# Score a batch of new CVs against every materialized active JD, keeping only
+# candidates that beat the JD's current N-th best (or fill a short list)
+MERGE_CVS_SQL = text("""
+    WITH candidate AS (
+        SELECT jd.id AS jd_id, cv.id AS cv_id, 1 - (jd.embedding <=> cv.embedding) AS score
+        FROM cv
+        CROSS JOIN jd
+        WHERE cv.id = ANY(:cv_ids)
+          AND cv.embedding IS NOT NULL
+          AND jd.is_active = true
+          AND jd.matches_computed_at IS NOT NULL
+          AND jd.embedding IS NOT NULL
+    ),
+    existing AS (
+        SELECT jd_id, count(*) AS n, min(score) AS min_score
+        FROM cv_jd_match
+        WHERE jd_id IN (SELECT jd_id FROM candidate)
+        GROUP BY jd_id
+    )
+    INSERT INTO cv_jd_match (jd_id, cv_id, score)
+    SELECT candidate.jd_id, candidate.cv_id, candidate.score
+    FROM candidate
+    LEFT JOIN existing ON existing.jd_id = candidate.jd_id
+    WHERE existing.n IS NULL OR existing.n < :top_n OR candidate.score > existing.min_score
+    ON CONFLICT (jd_id, cv_id) DO UPDATE SET score = EXCLUDED.score
+    RETURNING jd_id
+""")
+
+# Drop everything ranked below N for the given JDs
+TRIM_SQL = text("""
+    DELETE FROM cv_jd_match m
+    USING (
+        SELECT jd_id, cv_id, row_number() OVER (PARTITION BY jd_id ORDER BY score DESC, cv_id) AS rank
+        FROM cv_jd_match
+        WHERE jd_id = ANY(:jd_ids)
+    ) ranked
+    WHERE m.jd_id = ranked.jd_id AND m.cv_id = ranked.cv_id AND ranked.rank > :top_n
+""")
+
+
+async def _exact_top_n(db: AsyncSession, jd_id: uuid.UUID, top_n: int) -> list[tuple[uuid.UUID, float]]:
+    """
+    A JD's exact top-N CV ids and scores: a full-precision scan with index
+    scans disabled for the transaction, never the approximate (or
+    quantized) ANN index.
+    """
+    await db.execute(text("SELECT set_config('enable_indexscan', 'off', true)"))
+    jd_embedding = select(JD.embedding).where(JD.id == jd_id).scalar_subquery()
+    distance = CV.embedding.cosine_distance(jd_embedding)
+    result = await db.execute(
+        select(CV.id, 1 - distance).where(CV.embedding.is_not(None)).order_by(distance, CV.id).limit(top_n)
+    )
+    return [(cv_id, float(score)) for cv_id, score in result.all()]
+
+
+async def compute_for_jd(db: AsyncSession, jd: JD):
+    """(Re)compute a JD's top-N list and mark it as served from the table"""
+    if not settings.MATCH_TABLE_ENABLED or not jd.embedding_generated or jd.embedding is None:
+        return
+    top_n = settings.MATCH_TABLE_TOP_N
+    await db.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": MATCH_TABLE_LOCK_KEY})
+    # Marked before ranking, in the same transaction: merges waiting on the
+    # lock see the JD as materialized once this commits
+    await db.execute(update(JD).where(JD.id == jd.id).values(matches_computed_at=func.now()))
+    ranked = await _exact_top_n(db, jd.id, top_n)
+
+    await db.execute(delete(CVJDMatch).where(CVJDMatch.jd_id == jd.id))
+    if ranked:
+        await db.execute(
+            insert(CVJDMatch),
+            [{"jd_id": jd.id, "cv_id": cv_id, "score": score} for cv_id, score in ranked]
+        )
+    await db.commit()
+    result_cache.invalidate_jds([jd.id])
+    logger.info(f"Materialized {len(ranked)} matches for JD {jd.id}")
+
+
+async def merge_cvs(db: AsyncSession, cv_ids: list[uuid.UUID]):
+    """
+    Merge newly inserted CVs into every materialized JD's top-N list.
+
+    Each new CV is scored against active JDs in one statement; rows only go
+    in where they beat the JD's current N-th best, and lists pushed past N
+    are trimmed. Concurrent merges may briefly leave a list longer than N,
+    which is harmless since reads are ``ORDER BY score LIMIT k``. A merge
+    waits for any list being computed (``MATCH_TABLE_LOCK_KEY``).
+    """
+    if not settings.MATCH_TABLE_ENABLED or not cv_ids:
+        return
+    top_n = settings.MATCH_TABLE_TOP_N
+    await db.execute(text("SELECT pg_advisory_xact_lock_shared(:key)"), {"key": MATCH_TABLE_LOCK_KEY})
+    result = await db.execute(MERGE_CVS_SQL, {"cv_ids": list(cv_ids), "top_n": top_n})
+    jd_ids = list({jd_id for (jd_id,) in result.all()})
+    if jd_ids:
+        await db.execute(TRIM_SQL, {"jd_ids": jd_ids, "top_n": top_n})
+    await db.commit()
+    result_cache.invalidate_jds(jd_ids)
+
+
+async def served_matches(
+    db: AsyncSession,
+    jd: JD,
+    top_k: int,
+    columns=CV_MATCH_COLUMNS
+) -> list[tuple[dict, float]] | None:
+    """
+    A JD's top-k CVs from the table, or None when it cannot answer.
+
+    The table answers when the JD has been materialized and ``top_k`` is
+    within the stored N; the read is an index range scan of k rows.
+    """
+    if not settings.MATCH_TABLE_ENABLED or jd.matches_computed_at is None or top_k > settings.MATCH_TABLE_TOP_N:
+        return None
+    result = await db.execute(
+        select(*columns, CVJDMatch.score.label("similarity_score"))
+        .join(CVJDMatch, CVJDMatch.cv_id == CV.id)
+        .where(CVJDMatch.jd_id == jd.id)
+        .order_by(CVJDMatch.score.desc(), CV.id)
+        .limit(top_k)
+    )
+    return [(row, float(row["similarity_score"])) for row in result.mappings()]
+
+
+async def rebuild(db: AsyncSession, jd_ids: list[uuid.UUID] | None = None) -> int:
+    """Recompute the lists of all (or the given) active JDs"""
+    query = select(JD).where(JD.is_active == True).where(JD.embedding.is_not(None))
+    if jd_ids:
+        query = query.where(JD.id.in_(jd_ids))
+    jds = (await db.execute(query.order_by(JD.created_at))).scalars().all()
+    for jd in jds:
+        await compute_for_jd(db, jd)
+    return len(jds)
+
+
+async def check_consistency(db: AsyncSession, jd_ids: list[uuid.UUID] | None = None, limit: int | None = None) -> list[dict]:
+    """
+    Compare stored lists with an exact brute-force ranking, the same one
+    they are computed with. Reports per JD the CVs missing from and unexpectedly
+    present in the stored top-N, and the largest score drift.
+    """
+    top_n = settings.MATCH_TABLE_TOP_N
+    query = (
+        select(JD.id)
+        .where(JD.is_active == True)
+        .where(JD.matches_computed_at.is_not(None))
+        .order_by(JD.created_at.desc())
+    )
+    if jd_ids:
+        query = query.where(JD.id.in_(jd_ids))
+    if limit:
+        query = query.limit(limit)
+    checked_ids = (await db.execute(query)).scalars().all()
+
+    report = []
+    for jd_id in checked_ids:
+        exact = dict(await _exact_top_n(db, jd_id, top_n))
+        stored = dict((await db.execute(
+            select(CVJDMatch.cv_id, CVJDMatch.score)
+            .where(CVJDMatch.jd_id == jd_id)
+            .order_by(CVJDMatch.score.desc(), CVJDMatch.cv_id)
+            .limit(top_n)
+        )).all())
+        await db.rollback()
+
+        missing = [str(cv_id) for cv_id in exact if cv_id not in stored]
+        unexpected = [str(cv_id) for cv_id in stored if cv_id not in exact]
+        drift = max((abs(stored[cv_id] - exact[cv_id]) for cv_id in stored if cv_id in exact), default=0.0)
+        report.append({
+            "jd_id": str(jd_id),
+            "stored": len(stored),
+            "expected": len(exact),
+            "missing": missing,
+            "unexpected": unexpected,
+            "max_score_drift": drift,
+            "consistent": not missing and not unexpected and drift < 1e-4,
+        })
+    return report
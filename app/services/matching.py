@@ -0,0 +1,291 @@
+import logging
+import uuid
+from pgvector.sqlalchemy import Vector
+from sqlalchemy import Float, Select, cast, func, literal, select, text
+from sqlalchemy.dialects.postgresql import BIT
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql.elements import ClauseElement
+from sqlalchemy.types import UserDefinedType
+
+from app.core.config import settings
+from app.models.cv import CV
+from app.models.jd import JD
+from app.services.vector_index import apply_search_settings, quantized_distance_sql
+from app.services.vector_store import vector_store
+
+logger = logging.getLogger(__name__)
+
+# Columns returned for matched CVs (exactly what CVSummary needs, no embedding)
+CV_SUMMARY_COLUMNS = (
+    CV.id, CV.candidate_name, CV.email, CV.phone, CV.text_truncated, CV.summary,
+    CV.skills, CV.experience, CV.education, CV.file_name, CV.file_type, CV.extraction_engine,
+    CV.embedding_generated, CV.created_at, CV.updated_at,
+)
+# ...and for CVResponse, adding the full text
+CV_MATCH_COLUMNS = CV_SUMMARY_COLUMNS + (CV.raw_text,)
+
+CV_VIEW_COLUMNS = {"summary": CV_SUMMARY_COLUMNS, "full": CV_MATCH_COLUMNS}
+
+# Columns returned for matched JDs (everything JDResponse needs, no embedding)
+JD_MATCH_COLUMNS = (
+    JD.id, JD.title, JD.company, JD.department, JD.location, JD.description, JD.requirements,
+    JD.responsibilities, JD.required_skills, JD.preferred_skills, JD.benefits, JD.employment_type,
+    JD.experience_level, JD.salary_range, JD.is_active, JD.embedding_generated, JD.created_at, JD.updated_at,
+)
+
+
+class HalfVec(UserDefinedType):
+    """pgvector ``halfvec``, for casts only (pgvector-python 0.2 has no type for it)"""
+    cache_ok = True
+
+    def __init__(self, dimension: int):
+        self.dimension = dimension
+
+    def get_col_spec(self, **kw):
+        return f"halfvec({self.dimension})"
+
+
+def _quantized_distance(query, quantization: str):
+    """Distance in the space of the quantized index, matching its expression"""
+    if quantization == "halfvec":
+        return cast(CV.embedding, HalfVec(384)).op("<=>", return_type=Float)(cast(query, HalfVec(384)))
+    if quantization == "binary":
+        return cast(func.binary_quantize(CV.embedding), BIT(384)).op("<~>", return_type=Float)(
+            cast(func.binary_quantize(query), BIT(384))
+        )
+    return CV.embedding.cosine_distance(query)
+
+
+def ann_candidates(top_k: int, quantization: str | None = None, candidates: int | None = None) -> int:
+    """Rows the ANN index must produce: top_k, or the rerank pool when quantized"""
+    quantization = quantization or settings.VECTOR_QUANTIZATION
+    if quantization == "none":
+        return top_k
+    return max(top_k, candidates or settings.VECTOR_RERANK_CANDIDATES)
+
+
+def cv_ranking_query(
+    columns,
+    query,
+    top_k: int,
+    must_have: list[str] | None = None,
+    quantization: str | None = None,
+    candidates: int | None = None
+) -> Select:
+    """
+    Top-k CVs by cosine similarity to ``query`` (an embedding or a vector
+    SQL expression), with a ``similarity_score`` column.
+
+    With VECTOR_QUANTIZATION set, candidates come from the compact
+    ``halfvec``/``binary`` index and only that pool (VECTOR_RERANK_CANDIDATES
+    rows) is reranked against the full-precision ``embedding`` column.
+    """
+    quantization = quantization or settings.VECTOR_QUANTIZATION
+    if not isinstance(query, ClauseElement):
+        # Explicit cast: binary_quantize() is overloaded for vector and halfvec
+        query = cast(literal(query, Vector(384)), Vector(384))
+    distance = CV.embedding.cosine_distance(query)
+    ranked = select(*columns, (1 - distance).label("similarity_score"))
+    filters = [CV.embedding.is_not(None)]
+    if must_have:
+        filters.append(CV.skill_keys.contains(must_have))
+
+    if quantization == "none":
+        return ranked.where(*filters).order_by(distance).limit(top_k)
+    candidate_ids = (
+        select(CV.id)
+        .where(*filters)
+        .order_by(_quantized_distance(query, quantization))
+        .limit(ann_candidates(top_k, quantization, candidates))
+    )
+    return ranked.where(CV.id.in_(candidate_ids)).order_by(distance).limit(top_k)
+
+
+def normalize_skills(skills) -> list[str]:
+    """Lowercased, whitespace-collapsed, de-duplicated skill keys"""
+    keys = []
+    for skill in skills or []:
+        if not isinstance(skill, str):
+            continue
+        key = " ".join(skill.lower().split())
+        if key and key not in keys:
+            keys.append(key)
+    return keys
+
+
+def skill_overlap(skills, wanted: list[str]) -> float:
+    """Fraction of the ``wanted`` skill keys a CV lists"""
+    if not wanted:
+        return 0.0
+    have = set(normalize_skills(skills))
+    return sum(1 for key in wanted if key in have) / len(wanted)
+
+
+def blend_scores(results: list[tuple[dict, float]], wanted: list[str], top_k: int) -> list[tuple[dict, float]]:
+    """
+    Re-rank (row, similarity) pairs by vector similarity blended with skill
+    overlap, weighted by SKILL_SCORE_WEIGHT. Without ``wanted`` skills the
+    ranking is unchanged.
+    """
+    weight = settings.SKILL_SCORE_WEIGHT
+    if not wanted or not weight:
+        return results[:top_k]
+    blended = [
+        (row, (1 - weight) * score + weight * skill_overlap(row["skills"], wanted))
+        for row, score in results
+    ]
+    blended.sort(key=lambda pair: pair[1], reverse=True)
+    return blended[:top_k]
+
+
+async def _load_rows(db: AsyncSession, cv_ids, columns=CV_MATCH_COLUMNS) -> dict:
+    cv_ids = list(set(cv_ids))
+    if not cv_ids:
+        return {}
+    result = await db.execute(select(*columns).where(CV.id.in_(cv_ids)))
+    return {row["id"]: row for row in result.mappings()}
+
+
+async def hydrate_cvs(
+    db: AsyncSession,
+    scored: list[tuple[uuid.UUID, float]],
+    columns=CV_MATCH_COLUMNS
+) -> list[tuple[dict, float]]:
+    """Load matched CV rows by id, keeping the ranking order"""
+    return (await hydrate_cv_groups(db, [scored], columns))[0]
+
+
+async def hydrate_cv_groups(
+    db: AsyncSession,
+    groups: list[list[tuple[uuid.UUID, float]]],
+    columns=CV_MATCH_COLUMNS
+) -> list[list[tuple[dict, float]]]:
+    """Hydrate several ranked id lists with a single query"""
+    rows = await _load_rows(db, [cv_id for scored in groups for cv_id, _ in scored], columns)
+    # A CV deleted since the store was built simply drops out
+    return [[(rows[cv_id], score) for cv_id, score in scored if cv_id in rows] for scored in groups]
+
+
+async def search_cvs(
+    db: AsyncSession,
+    embedding,
+    top_k: int,
+    ef_search: int | None = None,
+    probes: int | None = None,
+    columns=CV_MATCH_COLUMNS,
+    must_have: list[str] | None = None
+) -> list[tuple[dict, float]]:
+    """
+    Top-k CVs by cosine similarity to ``embedding``, as (row, score) pairs.
+
+    With VECTOR_STORE_ENABLED the scan runs exactly in-process over the
+    memory-mapped store and Postgres only hydrates the winners; otherwise
+    the pgvector ANN index is used with the given search knobs. Rows carry
+    only ``columns`` (see ``CV_VIEW_COLUMNS``).
+
+    ``must_have`` skill keys are applied inside the query as a containment
+    filter on the GIN-indexed ``skill_keys``: selective filters are planned
+    as a bitmap scan plus exact sort, broad ones as an iterative ANN scan.
+    Filtered searches always run on pgvector, which holds the skills.
+    """
+    if settings.VECTOR_STORE_ENABLED and vector_store.exists() and not must_have:
+        scored = await vector_store.asearch(embedding, top_k)
+        return await hydrate_cvs(db, scored, columns)
+
+    await apply_search_settings(db, ann_candidates(top_k), ef_search=ef_search, probes=probes, filtered=bool(must_have))
+    result = await db.execute(cv_ranking_query(columns, embedding, top_k, must_have=must_have))
+    # Iterative scans in relaxed order may return rows slightly out of order
+    return sorted(
+        ((row, float(row["similarity_score"])) for row in result.mappings()),
+        key=lambda pair: pair[1],
+        reverse=True
+    )
+
+
+async def search_cvs_batch(
+    db: AsyncSession,
+    queries: list[tuple[uuid.UUID, list[float], int]],
+    ef_search: int | None = None,
+    probes: int | None = None,
+    columns=CV_MATCH_COLUMNS
+) -> list[list[tuple[dict, float]]]:
+    """
+    Top-k CVs for many JDs at once; ``queries`` are (jd_id, embedding, top_k).
+
+    The in-process store scores all JDs in one matrix product. On pgvector,
+    a single LATERAL query runs one index scan per JD against the stored
+    ``jd.embedding``, so no vectors are sent over the wire. Either way the
+    matched CVs are hydrated with one query, keeping latency roughly flat
+    in the number of JDs.
+    """
+    if not queries:
+        return []
+
+    if settings.VECTOR_STORE_ENABLED and vector_store.exists():
+        groups = await vector_store.asearch_many(
+            [embedding for _, embedding, _ in queries], [top_k for _, _, top_k in queries]
+        )
+        return await hydrate_cv_groups(db, groups, columns)
+
+    max_top_k = max(top_k for _, _, top_k in queries)
+    await apply_search_settings(db, ann_candidates(max_top_k), ef_search=ef_search, probes=probes)
+    candidates = "cv.embedding IS NOT NULL"
+    if settings.VECTOR_QUANTIZATION != "none":
+        # Rerank each JD's pool from the quantized index at full precision
+        candidates = f"""cv.id IN (
+                    SELECT cv.id FROM cv
+                    WHERE cv.embedding IS NOT NULL
+                    ORDER BY {quantized_distance_sql("cv.embedding", "jd.embedding", settings.VECTOR_QUANTIZATION)}
+                    LIMIT GREATEST(q.top_k, :candidates)
+                )"""
+    result = await db.execute(
+        text(f"""
+            SELECT q.ord, m.id, m.similarity_score
+            FROM unnest(CAST(:jd_ids AS uuid[]), CAST(:top_ks AS int[])) WITH ORDINALITY AS q(jd_id, top_k, ord)
+            JOIN jd ON jd.id = q.jd_id
+            CROSS JOIN LATERAL (
+                SELECT cv.id, 1 - (cv.embedding <=> jd.embedding) AS similarity_score
+                FROM cv
+                WHERE {candidates}
+                ORDER BY cv.embedding <=> jd.embedding
+                LIMIT q.top_k
+            ) m
+            ORDER BY q.ord, m.similarity_score DESC
+        """),
+        {
+            "jd_ids": [jd_id for jd_id, _, _ in queries],
+            "top_ks": [top_k for _, _, top_k in queries],
+            "candidates": settings.VECTOR_RERANK_CANDIDATES,
+        }
+    )
+    groups = [[] for _ in queries]
+    for ord_, cv_id, score in result.all():
+        groups[ord_ - 1].append((cv_id, float(score)))
+    return await hydrate_cv_groups(db, groups, columns)
+
+
+async def search_jds(
+    db: AsyncSession,
+    embedding,
+    top_k: int,
+    ef_search: int | None = None,
+    probes: int | None = None
+) -> list[tuple[dict, float]]:
+    """
+    Top-k active JDs by cosine similarity to a CV ``embedding``.
+
+    Mirrors ``search_cvs`` (same ``1 - cosine distance`` score). The
+    ``is_active`` filter matches the predicate of the partial
+    ``idx_jd_embedding`` index, so this is a single index scan over active
+    JDs only.
+    """
+    await apply_search_settings(db, top_k, ef_search=ef_search, probes=probes)
+    distance = JD.embedding.cosine_distance(embedding)
+    result = await db.execute(
+        select(*JD_MATCH_COLUMNS, (1 - distance).label("similarity_score"))
+        .where(JD.is_active == True)
+        .where(JD.embedding.is_not(None))
+        .order_by(distance)
+        .limit(top_k)
+    )
+    return [(row, float(row["similarity_score"])) for row in result.mappings()]
@@ -0,0 +1,121 @@
+import hashlib
+import logging
+import time
+from datetime import timedelta
+from sqlalchemy import select, update, delete, func
+from sqlalchemy.dialects.postgresql import insert
+
+from app.core.config import settings
+from app.db.session import AsyncSessionLocal
+from app.models.parse_cache import ParseCacheEntry
+
+logger = logging.getLogger(__name__)
+
+
+def parse_cache_key(model_name: str, prompt_version: str, prompt_text: str) -> str:
+    payload = f"{model_name}\n{prompt_version}\n{prompt_text}"
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ParseCache:
+    """
+    Persistent cache of structured LLM parse results.
+
+    Parsing prompts are deterministic (``temperature=0``), so a result keyed
+    by model, prompt version and the exact text sent can be replayed instead of
+    paying for another round-trip. Entries expire after ``ttl_seconds`` and the
+    table is trimmed to ``max_entries`` by least-recent use.
+    """
+
+    def __init__(self, enabled: bool, ttl_seconds: int, max_entries: int, prune_interval: float = 300.0):
+        self.enabled = enabled
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.prune_interval = prune_interval
+        self._last_prune = 0.0
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    async def get(self, key: str) -> dict | None:
+        if not self.enabled:
+            return None
+        try:
+            async with AsyncSessionLocal() as session:
+                result = await session.execute(
+                    select(ParseCacheEntry.result)
+                    .where(ParseCacheEntry.key == key)
+                    .where(ParseCacheEntry.created_at > func.now() - timedelta(seconds=self.ttl_seconds))
+                )
+                cached = result.scalar_one_or_none()
+                if cached is not None:
+                    await session.execute(
+                        update(ParseCacheEntry)
+                        .where(ParseCacheEntry.key == key)
+                        .values(last_used_at=func.now())
+                    )
+                    await session.commit()
+        except Exception as e:
+            logger.warning(f"Parse cache lookup failed: {e}")
+            cached = None
+
+        if cached is None:
+            self._misses += 1
+        else:
+            self._hits += 1
+        return cached
+
+    async def put(self, key: str, model_name: str, prompt_version: str, parsed: dict):
+        if not self.enabled:
+            return
+        try:
+            async with AsyncSessionLocal() as session:
+                stmt = insert(ParseCacheEntry).values(
+                    key=key, model_name=model_name, prompt_version=prompt_version, result=parsed
+                )
+                await session.execute(
+                    stmt.on_conflict_do_update(
+                        index_elements=["key"],
+                        set_={"result": stmt.excluded.result, "created_at": func.now(), "last_used_at": func.now()},
+                    )
+                )
+                await session.commit()
+                if time.monotonic() - self._last_prune > self.prune_interval:
+                    self._last_prune = time.monotonic()
+                    await self._prune(session)
+        except Exception as e:
+            logger.warning(f"Parse cache write failed: {e}")
+
+    async def _prune(self, session):
+        expired = await session.execute(
+            delete(ParseCacheEntry)
+            .where(ParseCacheEntry.created_at <= func.now() - timedelta(seconds=self.ttl_seconds))
+        )
+        keep = (
+            select(ParseCacheEntry.key)
+            .order_by(ParseCacheEntry.last_used_at.desc())
+            .limit(self.max_entries)
+        )
+        overflow = await session.execute(
+            delete(ParseCacheEntry).where(ParseCacheEntry.key.not_in(keep))
+        )
+        await session.commit()
+        evicted = (expired.rowcount or 0) + (overflow.rowcount or 0)
+        self._evictions += evicted
+        if evicted:
+            logger.info(f"Evicted {evicted} parse cache entries")
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "hits": self._hits,
+            "misses": self._misses,
+            "evictions": self._evictions,
+        }
+
+
+parse_cache = ParseCache(
+    enabled=settings.PARSE_CACHE_ENABLED,
+    ttl_seconds=settings.PARSE_CACHE_TTL_SECONDS,
+    max_entries=settings.PARSE_CACHE_MAX_ENTRIES,
+)
@@ -0,0 +1,226 @@
+import asyncio
+import logging
+import time
+import uuid
+from collections import OrderedDict
+
+import asyncpg
+from sqlalchemy.engine import make_url
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Notified by triggers on cv, jd and cv_jd_match (see migration 017). The
+# payload says what changed: "cv" for the CV pool, "jd:<id>,<id>" for the
+# lists of those JDs, and "*" (or nothing) for anything else
+GENERATION_CHANNEL = "match_generation"
+LISTENER_KEEPALIVE_SECONDS = 30.0
+LISTENER_RETRY_SECONDS = 5.0
+
+
+class MatchResultCache:
+    """
+    In-process cache of ranked match results (CV ids and scores).
+
+    Entries are tagged with a local generation counter read *before* the
+    result was computed, and with what they depend on: the JD they were
+    ranked for and, when they came from a live search rather than the JD's
+    materialized list, the whole CV pool. Every invalidation advances the
+    counter and records it against its scope, so an entry is served only
+    while nothing it depends on has changed since; the TTL is just a
+    backstop. A new CV therefore only invalidates the JDs whose lists it
+    entered, plus live-search results.
+
+    Writers in this process invalidate synchronously after they commit, so
+    a worker never serves its own stale results. Writes from other
+    processes arrive as ``match_generation`` notifications, sent by
+    triggers when the writing transaction commits, on a listener
+    connection. While the listener is not connected the cache is bypassed;
+    every (re)connect invalidates everything, since writes may have been
+    missed. Entries are evicted least-recently-used.
+
+    Concurrent misses for the same key and generation are coalesced: the
+    first request computes, the others await its result.
+    """
+
+    def __init__(self, enabled: bool, max_entries: int, ttl_seconds: float):
+        self.enabled = enabled
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: OrderedDict[tuple, tuple[int, float, uuid.UUID, bool, list[tuple[uuid.UUID, float]]]] = OrderedDict()
+        self._inflight: dict[tuple, asyncio.Future] = {}
+        self._generation = 0
+        # Generation of the latest invalidation of everything, of the CV
+        # pool, and of each JD's list
+        self._all_invalidated = 0
+        self._pool_invalidated = 0
+        self._jd_invalidated: dict[uuid.UUID, int] = {}
+        self._listening = False
+        self._listener: asyncio.Task | None = None
+        self._hits = 0
+        self._misses = 0
+        self._coalesced = 0
+        self._stale = 0
+
+    def current_generation(self) -> int | None:
+        """The generation to tag lookups with, or None to bypass the cache"""
+        if not self.enabled or not self._listening:
+            return None
+        return self._generation
+
+    def invalidate_all(self):
+        self._generation += 1
+        self._all_invalidated = self._generation
+        self._jd_invalidated.clear()
+
+    def invalidate_pool(self):
+        """The CV pool changed: live-search results may be stale"""
+        self._generation += 1
+        self._pool_invalidated = self._generation
+
+    def invalidate_jds(self, jd_ids):
+        """These JDs' materialized lists changed"""
+        self._generation += 1
+        for jd_id in jd_ids:
+            self._jd_invalidated[jd_id] = self._generation
+
+    def _on_notify(self, connection, pid, channel, payload: str):
+        if payload == "cv":
+            self.invalidate_pool()
+        elif payload.startswith("jd:"):
+            try:
+                self.invalidate_jds([uuid.UUID(jd_id) for jd_id in payload[3:].split(",")])
+            except ValueError:
+                self.invalidate_all()
+        else:
+            self.invalidate_all()
+
+    def start(self):
+        if self.enabled and self._listener is None:
+            self._listener = asyncio.get_running_loop().create_task(self._listen())
+
+    async def stop(self):
+        if self._listener is not None:
+            self._listener.cancel()
+            try:
+                await self._listener
+            except asyncio.CancelledError:
+                pass
+            self._listener = None
+
+    async def _listen(self):
+        dsn = make_url(settings.DATABASE_URL).set(drivername="postgresql").render_as_string(hide_password=False)
+        while True:
+            try:
+                connection = await asyncpg.connect(dsn)
+            except Exception as e:
+                logger.warning(f"Result cache listener could not connect, cache bypassed: {e}")
+                await asyncio.sleep(LISTENER_RETRY_SECONDS)
+                continue
+            closed = asyncio.Event()
+            connection.add_termination_listener(lambda _: closed.set())
+            try:
+                await connection.add_listener(GENERATION_CHANNEL, self._on_notify)
+                # Writes may have committed while nobody was listening
+                self.invalidate_all()
+                self._listening = True
+                while not closed.is_set():
+                    try:
+                        await asyncio.wait_for(closed.wait(), LISTENER_KEEPALIVE_SECONDS)
+                    except asyncio.TimeoutError:
+                        # Detects a silently dropped connection
+                        await connection.fetchval("SELECT 1")
+                logger.warning("Result cache listener connection closed, reconnecting")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Result cache listener failed, reconnecting: {e}")
+                await asyncio.sleep(LISTENER_RETRY_SECONDS)
+            finally:
+                self._listening = False
+                if not connection.is_closed():
+                    connection.terminate()
+
+    def _is_current(self, generation: int, jd_id: uuid.UUID, pool: bool) -> bool:
+        if generation < self._all_invalidated or (pool and generation < self._pool_invalidated):
+            return False
+        return generation >= self._jd_invalidated.get(jd_id, 0)
+
+    def get(self, key: tuple) -> list[tuple[uuid.UUID, float]] | None:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        generation, stored_at, jd_id, pool, ranked = entry
+        if not self._is_current(generation, jd_id, pool) or time.monotonic() - stored_at > self.ttl_seconds:
+            del self._entries[key]
+            self._stale += 1
+            return None
+        self._entries.move_to_end(key)
+        self._hits += 1
+        return ranked
+
+    def put(self, key: tuple, generation: int, jd_id: uuid.UUID, pool: bool, ranked: list[tuple[uuid.UUID, float]]):
+        """
+        Store ``ranked``, computed at ``generation`` for ``jd_id``; ``pool``
+        marks a live search, which any CV change can alter
+        """
+        if not self._is_current(generation, jd_id, pool):
+            # Invalidated while it was being computed
+            return
+        self._entries[key] = (generation, time.monotonic(), jd_id, pool, ranked)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def compute(self, key: tuple, generation: int, compute):
+        """
+        Run ``compute()`` once per key and generation, caching the ranked
+        ids; concurrent callers share it. ``compute`` returns
+        ``([(row, score)], jd_id, pool)`` (see ``put``).
+        """
+        flight_key = (key, generation)
+        inflight = self._inflight.get(flight_key)
+        if inflight is not None:
+            self._coalesced += 1
+            return await asyncio.shield(inflight)
+
+        self._misses += 1
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[flight_key] = future
+        try:
+            results, jd_id, pool = await compute()
+        except Exception as e:
+            future.set_exception(e)
+            # Mark retrieved so a failure with no waiters is not logged as unhandled
+            future.exception()
+            raise
+        else:
+            future.set_result(results)
+            self.put(key, generation, jd_id, pool, [(row["id"], score) for row, score in results])
+            return results
+        finally:
+            if not future.done():
+                future.cancel()
+            del self._inflight[flight_key]
+
+    def stats(self) -> dict:
+        lookups = self._hits + self._misses + self._coalesced
+        return {
+            "enabled": self.enabled,
+            "listening": self._listening,
+            "generation": self._generation,
+            "entries": len(self._entries),
+            "hits": self._hits,
+            "misses": self._misses,
+            "coalesced": self._coalesced,
+            "stale": self._stale,
+            "hit_rate": round(self._hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+result_cache = MatchResultCache(
+    enabled=settings.RESULT_CACHE_ENABLED,
+    max_entries=settings.RESULT_CACHE_MAX_ENTRIES,
+    ttl_seconds=settings.RESULT_CACHE_TTL_SECONDS,
+)
@@ -0,0 +1,127 @@
+import hashlib
+import os
+import tempfile
+from io import BytesIO
+from fastapi import HTTPException, Request
+
+from app.core.config import settings
+
+PDF_MAGIC = b"%PDF"
+ZIP_MAGIC = b"PK\x03\x04"  # DOCX and ZIP archives
+
+
+def sniff_file_type(head: bytes) -> str | None:
+    """Identify a document from its first bytes"""
+    if head.startswith(PDF_MAGIC):
+        return "pdf"
+    if head.startswith(ZIP_MAGIC):
+        return "zip"
+    return None
+
+
+class SpooledUpload:
+    """
+    Request body spooled to memory, rolling over to a named temp file.
+
+    Small uploads stay in a ``BytesIO``; once ``max_memory`` is exceeded the
+    data moves to a temp file on disk so extraction workers can open (and
+    memory-map) it by path instead of receiving another copy of the bytes.
+    The SHA-256 and leading bytes are computed as chunks arrive.
+    """
+
+    def __init__(self, max_memory: int):
+        self.max_memory = max_memory
+        self.size = 0
+        self.head = b""
+        self.path: str | None = None
+        self._buffer: BytesIO | None = BytesIO()
+        self._file = None
+        self._hash = hashlib.sha256()
+
+    def write(self, chunk: bytes):
+        if len(self.head) < 8:
+            self.head += chunk[:8 - len(self.head)]
+        self._hash.update(chunk)
+        self.size += len(chunk)
+        if self._file is None and self.size > self.max_memory:
+            self._rollover()
+        (self._file or self._buffer).write(chunk)
+
+    def _rollover(self):
+        fd, self.path = tempfile.mkstemp(prefix="cv_upload_", dir=settings.UPLOAD_TEMP_DIR)
+        self._file = os.fdopen(fd, "wb")
+        self._file.write(self._buffer.getbuffer())
+        self._buffer = None
+
+    @property
+    def content_hash(self) -> str:
+        return self._hash.hexdigest()
+
+    @property
+    def file_type(self) -> str | None:
+        return sniff_file_type(self.head)
+
+    def source(self) -> bytes | str:
+        """Bytes for in-memory uploads, otherwise the temp file path"""
+        if self._file is not None:
+            self._file.flush()
+            return self.path
+        return self._buffer.getvalue()
+
+    def iter_chunks(self, size: int):
+        """Yield the upload in pieces of at most ``size`` bytes"""
+        source = self.source()
+        if isinstance(source, str):
+            with open(source, "rb") as f:
+                yield from iter(lambda: f.read(size), b"")
+        else:
+            for start in range(0, len(source), size):
+                yield source[start:start + size]
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        if self.path and os.path.exists(self.path):
+            os.unlink(self.path)
+        self._buffer = None
+
+
+async def receive_upload(
+    request: Request,
+    max_bytes: int,
+    allowed_types: tuple[str, ...] = ("pdf", "zip"),
+    description: str = "PDF and DOCX files"
+) -> SpooledUpload:
+    """
+    Stream the request body into a ``SpooledUpload``.
+
+    Rejects oversized bodies (413) from the Content-Length header or as soon
+    as the limit is crossed, and unknown formats (400) from the first chunk,
+    without buffering the rest of the body.
+    """
+    content_length = request.headers.get("content-length")
+    if content_length and content_length.isdigit() and int(content_length) > max_bytes:
+        raise HTTPException(status_code=413, detail=f"File too large. Maximum size is {max_bytes} bytes")
+
+    upload = SpooledUpload(max_memory=settings.UPLOAD_SPOOL_MAX_MEMORY)
+    try:
+        async for chunk in request.stream():
+            if not chunk:
+                continue
+            upload.write(chunk)
+            if upload.size > max_bytes:
+                raise HTTPException(status_code=413, detail=f"File too large. Maximum size is {max_bytes} bytes")
+            if len(upload.head) >= 4 and upload.file_type not in allowed_types:
+                raise HTTPException(status_code=400, detail=f"Unsupported file format. Only {description} are supported")
+    except Exception:
+        upload.close()
+        raise
+
+    if upload.size == 0:
+        upload.close()
+        raise HTTPException(status_code=400, detail="No file content provided")
+    if upload.file_type not in allowed_types:
+        upload.close()
+        raise HTTPException(status_code=400, detail=f"Unsupported file format. Only {description} are supported")
+    return upload
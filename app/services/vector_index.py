@@ -0,0 +1,257 @@
+import logging
+import math
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncSession
+
+from app.core.config import settings
+from app.db.session import engine
+
+logger = logging.getLogger(__name__)
+
+# Embedding index per table; rebuilds swap a new index in under the same name
+VECTOR_INDEXES = {"cv": "idx_cv_embedding", "jd": "idx_jd_embedding"}
+# Partial index predicates; queries must repeat them to use the index
+VECTOR_INDEX_PREDICATES = {"jd": "is_active = true"}
+# Indexed vector columns and their index name suffix; a model cutover swaps
+# embedding_next (and its index) in for embedding
+EMBEDDING_COLUMNS = {"embedding": "", "embedding_next": "_next"}
+METHODS = ("hnsw", "ivfflat")
+# Indexed expression, operator class and distance operator per quantization.
+# Quantized indexes hold the compact copy; the float32 column stays for rerank.
+QUANTIZATIONS = {
+    "none": ("{column}", "vector_cosine_ops", "<=>"),
+    "halfvec": ("({column}::halfvec(384))", "halfvec_cosine_ops", "<=>"),
+    "binary": ("(binary_quantize({column})::bit(384))", "bit_hamming_ops", "<~>"),
+}
+# Only CV search reranks; JD indexes always stay full precision
+QUANTIZED_TABLES = ("cv",)
+# halfvec and binary_quantize() arrived in pgvector 0.7
+QUANTIZATION_MIN_VERSION = {"none": (0,), "halfvec": (0, 7), "binary": (0, 7)}
+# pgvector rejects larger hnsw.ef_search values
+MAX_EF_SEARCH = 1000
+# First pgvector release with hnsw/ivfflat.iterative_scan
+ITERATIVE_SCAN_MIN_VERSION = (0, 8)
+
+# Installed pgvector version, read once per process
+_pgvector_version: tuple[int, ...] | None = None
+
+
+async def pgvector_version(db: AsyncSession | AsyncConnection) -> tuple[int, ...]:
+    """The installed pgvector extension version, e.g. ``(0, 8, 0)``"""
+    global _pgvector_version
+    if _pgvector_version is None:
+        version = (await db.execute(
+            text("SELECT extversion FROM pg_extension WHERE extname = 'vector'")
+        )).scalar() or "0"
+        _pgvector_version = tuple(int(part) for part in version.split(".") if part.isdigit())
+    return _pgvector_version
+
+
+def ivfflat_lists(rows: int) -> int:
+    """pgvector's guidance: rows / 1000 up to 1M rows, sqrt(rows) beyond"""
+    if rows <= 1_000_000:
+        return max(1, rows // 1000)
+    return int(math.sqrt(rows))
+
+
+def quantized_distance_sql(column: str, query: str, quantization: str) -> str:
+    """SQL distance between two vector expressions in a quantization's space"""
+    expression, _, operator = QUANTIZATIONS[quantization]
+    return f"{expression.format(column=column)} {operator} {expression.format(column=query)}"
+
+
+def index_sql(
+    table: str,
+    name: str,
+    method: str,
+    m: int = None,
+    ef_construction: int = None,
+    lists: int = None,
+    quantization: str = "none",
+    column: str = "embedding"
+) -> str:
+    if method == "hnsw":
+        options = f"m = {int(m)}, ef_construction = {int(ef_construction)}"
+    else:
+        options = f"lists = {int(lists)}"
+    expression, opclass, _ = QUANTIZATIONS[quantization]
+    sql = (
+        f"CREATE INDEX CONCURRENTLY {name} ON {table} "
+        f"USING {method} ({expression.format(column=column)} {opclass}) WITH ({options})"
+    )
+    if table in VECTOR_INDEX_PREDICATES:
+        sql += f" WHERE {VECTOR_INDEX_PREDICATES[table]}"
+    return sql
+
+
+async def rebuild_index(
+    table: str,
+    method: str | None = None,
+    m: int | None = None,
+    ef_construction: int | None = None,
+    lists: int | None = None,
+    quantization: str | None = None,
+    column: str = "embedding"
+) -> dict:
+    """
+    Rebuild a table's embedding index without blocking reads or writes.
+
+    The new index is built with ``CREATE INDEX CONCURRENTLY`` under a
+    temporary name, then swapped in for the old one, so searches keep using
+    the old index until the new one is valid. IVFFlat ``lists`` default to a
+    value derived from the current row count, since centroids are only as
+    good as the data present at build time.
+
+    A ``halfvec`` or ``binary`` quantization indexes a compact expression of
+    the embedding instead; VECTOR_QUANTIZATION must match for searches to
+    use it. ``column="embedding_next"`` builds the ``_next`` index that a
+    model cutover swaps in.
+    """
+    if table not in VECTOR_INDEXES:
+        raise ValueError(f"No vector index is managed for table '{table}'")
+    method = method or settings.VECTOR_INDEX_METHOD
+    if method not in METHODS:
+        raise ValueError(f"Unknown index method '{method}', expected one of {METHODS}")
+    if quantization is None:
+        quantization = settings.VECTOR_QUANTIZATION if table in QUANTIZED_TABLES else "none"
+    if quantization not in QUANTIZATIONS:
+        raise ValueError(f"Unknown quantization '{quantization}', expected one of {tuple(QUANTIZATIONS)}")
+    if quantization != "none" and table not in QUANTIZED_TABLES:
+        raise ValueError(f"Quantized indexes are only supported on {QUANTIZED_TABLES}")
+    if column not in EMBEDDING_COLUMNS:
+        raise ValueError(f"Unknown embedding column '{column}', expected one of {tuple(EMBEDDING_COLUMNS)}")
+
+    name = VECTOR_INDEXES[table] + EMBEDDING_COLUMNS[column]
+    temp_name = f"{name}_new"
+
+    # Concurrent index builds cannot run inside a transaction
+    async with engine.connect() as conn:
+        conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+        if await pgvector_version(conn) < QUANTIZATION_MIN_VERSION[quantization]:
+            raise ValueError(f"Quantization '{quantization}' needs pgvector 0.7 or newer")
+
+        predicate = VECTOR_INDEX_PREDICATES.get(table, "true")
+        rows = (await conn.execute(
+            text(f"SELECT count(*) FROM {table} WHERE {column} IS NOT NULL AND {predicate}")
+        )).scalar()
+        if method == "ivfflat" and lists is None:
+            lists = ivfflat_lists(rows)
+        m = m or settings.VECTOR_HNSW_M
+        ef_construction = ef_construction or settings.VECTOR_HNSW_EF_CONSTRUCTION
+
+        await conn.execute(
+            text("SELECT set_config('maintenance_work_mem', :memory, false)"),
+            {"memory": settings.VECTOR_INDEX_BUILD_MEMORY}
+        )
+        # An interrupted build leaves an invalid index behind
+        await conn.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {temp_name}"))
+
+        logger.info(f"Building {method} index {temp_name} on {table} ({rows} rows, quantization {quantization})")
+        await conn.execute(text(index_sql(table, temp_name, method, m, ef_construction, lists, quantization, column)))
+        await conn.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {name}"))
+        await conn.execute(text(f"ALTER INDEX {temp_name} RENAME TO {name}"))
+        logger.info(f"Swapped in {method} index {name} on {table}")
+
+    result = {"table": table, "index_name": name, "method": method, "quantization": quantization, "rows": rows}
+    if method == "hnsw":
+        result.update(m=m, ef_construction=ef_construction)
+    else:
+        result.update(lists=lists)
+    return result
+
+
+async def describe_indexes(db: AsyncSession) -> list[dict]:
+    """Type, size, options and build state of every pgvector index"""
+    result = await db.execute(text("""
+        SELECT
+            c.relname AS index_name,
+            t.relname AS table_name,
+            am.amname AS method,
+            pg_relation_size(c.oid) AS size_bytes,
+            c.reloptions AS options,
+            pg_get_indexdef(c.oid) AS definition,
+            t.reltuples::bigint AS table_rows_estimate,
+            i.indisvalid AS is_valid,
+            p.phase AS build_phase,
+            p.blocks_done,
+            p.blocks_total,
+            p.tuples_done,
+            p.tuples_total
+        FROM pg_index i
+        JOIN pg_class c ON c.oid = i.indexrelid
+        JOIN pg_class t ON t.oid = i.indrelid
+        JOIN pg_am am ON am.oid = c.relam
+        LEFT JOIN pg_stat_progress_create_index p ON p.index_relid = c.oid
+        WHERE am.amname IN ('hnsw', 'ivfflat')
+        ORDER BY t.relname, c.relname
+    """))
+
+    indexes = []
+    for row in result.mappings():
+        if row["build_phase"] is not None:
+            state = "building"
+        elif not row["is_valid"]:
+            # A failed or interrupted CONCURRENTLY build; safe to drop
+            state = "invalid"
+        else:
+            state = "ready"
+        if "binary_quantize" in row["definition"]:
+            quantization = "binary"
+        elif "halfvec" in row["definition"]:
+            quantization = "halfvec"
+        else:
+            quantization = "none"
+        indexes.append({
+            "index_name": row["index_name"],
+            "table_name": row["table_name"],
+            "method": row["method"],
+            "quantization": quantization,
+            "size_bytes": row["size_bytes"],
+            "options": dict(option.split("=", 1) for option in row["options"] or []),
+            "table_rows_estimate": max(row["table_rows_estimate"], 0),
+            "state": state,
+            "build_phase": row["build_phase"],
+            "blocks_done": row["blocks_done"],
+            "blocks_total": row["blocks_total"],
+            "tuples_done": row["tuples_done"],
+            "tuples_total": row["tuples_total"],
+        })
+    return indexes
+
+
+async def apply_search_settings(
+    db: AsyncSession,
+    top_k: int,
+    ef_search: int | None = None,
+    probes: int | None = None,
+    filtered: bool = False
+):
+    """
+    Set ANN search knobs for the current transaction only (``SET LOCAL``).
+
+    ``hnsw.ef_search`` bounds the HNSW candidate list and must be at least
+    ``top_k`` to return that many rows; ``ivfflat.probes`` is the number of
+    IVFFlat lists scanned. Higher values trade latency for recall.
+
+    For ``filtered`` queries, iterative index scans are switched on so a
+    WHERE clause that rejects most candidates still yields ``top_k`` rows
+    instead of an under-filled result. pgvector before 0.8 has no iterative
+    scans; there the ANN index is disabled for the query instead, so the
+    filtered rows are ranked exactly.
+    """
+    ef_search = min(max(ef_search or settings.VECTOR_HNSW_EF_SEARCH, top_k), MAX_EF_SEARCH)
+    probes = probes or settings.VECTOR_IVFFLAT_PROBES
+    await db.execute(
+        text("SELECT set_config('hnsw.ef_search', :ef_search, true), set_config('ivfflat.probes', :probes, true)"),
+        {"ef_search": str(ef_search), "probes": str(probes)}
+    )
+    if not filtered:
+        return
+    if settings.VECTOR_ITERATIVE_SCAN != "off" and await pgvector_version(db) >= ITERATIVE_SCAN_MIN_VERSION:
+        await db.execute(
+            text("SELECT set_config('hnsw.iterative_scan', :mode, true), set_config('ivfflat.iterative_scan', :mode, true)"),
+            {"mode": settings.VECTOR_ITERATIVE_SCAN}
+        )
+    else:
+        # Bitmap scans (the GIN filter) stay on; only the ANN index scan is off
+        await db.execute(text("SELECT set_config('enable_indexscan', 'off', true)"))
@@ -0,0 +1,301 @@
+import asyncio
+import fcntl
+import json
+import logging
+import os
+import uuid
+from contextlib import contextmanager
+from datetime import timedelta
+
+import numpy as np
+from sqlalchemy import select, func
+
+from app.core.config import settings
+from app.db.session import AsyncSessionLocal
+from app.models.cv import CV
+from app.models.embedding_model_state import EmbeddingModelState
+
+logger = logging.getLogger(__name__)
+
+DTYPES = {"float32": np.float32, "float16": np.float16}
+ID_BYTES = 16
+# Rows scored per block; bounds search memory to block x queries scores
+SCORE_BLOCK_ROWS = 4096
+# Catch-up window after a rebuild, covering transactions that started before
+# the snapshot but committed after it
+REBUILD_CATCH_UP = timedelta(minutes=5)
+
+
+class CVVectorStore:
+    """
+    Exact in-process index of CV embeddings, memory-mapped from local files.
+
+    ``vectors.bin`` is a contiguous row-major matrix of L2-normalised
+    embeddings and ``ids.bin`` the matching CV UUIDs (16 bytes each), so
+    cosine similarity for every CV is one matrix-vector product. Both files
+    are mapped read-only, which lets every uvicorn worker on the host share
+    one copy through the page cache.
+
+    Inserts append rows under an exclusive ``flock``; readers notice the
+    files grew (or were replaced by a rebuild) from ``os.stat`` and remap.
+    A row only becomes visible once its id is written, after its vector.
+    """
+
+    def __init__(self, path: str, dtype: str, dimension: int = 384):
+        if dtype not in DTYPES:
+            raise ValueError(f"Unsupported vector store dtype '{dtype}', expected one of {sorted(DTYPES)}")
+        self.path = path
+        self.dtype = np.dtype(DTYPES[dtype])
+        self.dimension = dimension
+        self._vectors_path = os.path.join(path, "vectors.bin")
+        self._ids_path = os.path.join(path, "ids.bin")
+        self._meta_path = os.path.join(path, "meta.json")
+        self._lock_path = os.path.join(path, ".lock")
+        self._rebuild_lock_path = os.path.join(path, ".rebuild.lock")
+        self._meta: dict | None = None
+        self._meta_key = None
+        self._matrix: np.ndarray | None = None
+        self._ids: np.ndarray | None = None
+        self._file_key = None
+        self._searches = 0
+        self._appended = 0
+
+    @property
+    def row_bytes(self) -> int:
+        return self.dimension * self.dtype.itemsize
+
+    def _read_meta(self) -> dict | None:
+        """Parsed ``meta.json``, re-read only when the file was replaced or changed"""
+        try:
+            meta_stat = os.stat(self._meta_path)
+        except FileNotFoundError:
+            self._meta, self._meta_key = None, None
+            return None
+        meta_key = (meta_stat.st_ino, meta_stat.st_mtime_ns)
+        if meta_key != self._meta_key:
+            with open(self._meta_path) as f:
+                self._meta = json.load(f)
+            self._meta_key = meta_key
+            if self._meta.get("dtype") != self.dtype.name or self._meta.get("dimension") != self.dimension:
+                logger.warning(f"Vector store at {self.path} was built as {self._meta}, needs a rebuild")
+        return self._meta
+
+    def exists(self) -> bool:
+        meta = self._read_meta()
+        return meta is not None and meta.get("dtype") == self.dtype.name and meta.get("dimension") == self.dimension
+
+    @contextmanager
+    def _locked(self, lock_path: str | None = None):
+        os.makedirs(self.path, exist_ok=True)
+        with open(lock_path or self._lock_path, "a") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def _encode(self, embeddings) -> np.ndarray:
+        matrix = np.asarray(embeddings, dtype=np.float32).reshape(-1, self.dimension)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return (matrix / norms).astype(self.dtype)
+
+    def _write_rows(self, vectors_file, ids_file, rows: list[tuple[uuid.UUID, list[float]]]):
+        vectors_file.write(self._encode([embedding for _, embedding in rows]).tobytes())
+        vectors_file.flush()
+        ids_file.write(b"".join(cv_id.bytes for cv_id, _ in rows))
+        ids_file.flush()
+
+    def append(self, rows: list[tuple[uuid.UUID, list[float]]]):
+        """Add freshly inserted CVs; a no-op until the store has been built"""
+        rows = [(cv_id, embedding) for cv_id, embedding in rows if embedding is not None]
+        if not rows or not settings.VECTOR_STORE_ENABLED or not self.exists():
+            return
+        with self._locked():
+            with open(self._vectors_path, "ab") as vectors_file, open(self._ids_path, "ab") as ids_file:
+                # Drop a partial row left by a writer that died mid-append
+                count = min(os.fstat(vectors_file.fileno()).st_size // self.row_bytes,
+                            os.fstat(ids_file.fileno()).st_size // ID_BYTES)
+                vectors_file.truncate(count * self.row_bytes)
+                ids_file.truncate(count * ID_BYTES)
+                self._write_rows(vectors_file, ids_file, rows)
+        self._appended += len(rows)
+
+    def _refresh(self):
+        """(Re)map the files if they were replaced or grew since the last search"""
+        try:
+            vectors_stat = os.stat(self._vectors_path)
+            ids_stat = os.stat(self._ids_path)
+        except FileNotFoundError:
+            self._matrix, self._ids, self._file_key = None, None, None
+            return
+        file_key = (vectors_stat.st_ino, vectors_stat.st_size, ids_stat.st_ino, ids_stat.st_size)
+        if file_key == self._file_key:
+            return
+
+        count = min(vectors_stat.st_size // self.row_bytes, ids_stat.st_size // ID_BYTES)
+        if count == 0:
+            self._matrix = np.empty((0, self.dimension), dtype=self.dtype)
+            self._ids = np.empty((0, ID_BYTES), dtype=np.uint8)
+        else:
+            # Plain ndarray views over the maps; memmap subclass dispatch slows matmul
+            self._matrix = np.asarray(np.memmap(self._vectors_path, dtype=self.dtype, mode="r", shape=(count, self.dimension)))
+            self._ids = np.asarray(np.memmap(self._ids_path, dtype=np.uint8, mode="r", shape=(count, ID_BYTES)))
+        self._file_key = file_key
+
+    def _block_top_k(self, matrix: np.ndarray, queries: np.ndarray, k: int) -> tuple[np.ndarray, np.ndarray]:
+        """
+        The ``k`` best (scores, rows) per query, each ``(k x queries)``.
+
+        The matrix is scored SCORE_BLOCK_ROWS rows at a time and each block's
+        best rows are merged into the running top-k, so memory stays at one
+        block x queries however many CVs there are.
+        """
+        best_scores = np.empty((0, len(queries)), dtype=np.float32)
+        best_rows = np.empty((0, len(queries)), dtype=np.int64)
+        for start in range(0, len(matrix), SCORE_BLOCK_ROWS):
+            # NumPy has no BLAS path for float16, so blocks are upcast
+            block = matrix[start:start + SCORE_BLOCK_ROWS].astype(np.float32, copy=False)
+            scores = np.concatenate([best_scores, block @ queries.T])
+            rows = np.concatenate([
+                best_rows,
+                np.broadcast_to(np.arange(start, start + len(block))[:, None], (len(block), len(queries))),
+            ])
+            if len(scores) > k:
+                keep = np.argpartition(-scores, k - 1, axis=0)[:k]
+                scores = np.take_along_axis(scores, keep, axis=0)
+                rows = np.take_along_axis(rows, keep, axis=0)
+            best_scores, best_rows = scores, rows
+        return best_scores, best_rows
+
+    def _top_k(self, scores: np.ndarray, rows: np.ndarray, ids: np.ndarray, top_k: int) -> list[tuple[uuid.UUID, float]]:
+        results, seen = [], set()
+        for i in np.argsort(-scores):
+            cv_id = uuid.UUID(bytes=ids[rows[i]].tobytes())
+            if cv_id in seen:
+                continue
+            seen.add(cv_id)
+            results.append((cv_id, float(scores[i])))
+            if len(results) == top_k:
+                break
+        return results
+
+    def search_many(self, embeddings: list, top_ks: list[int]) -> list[list[tuple[uuid.UUID, float]]]:
+        """
+        Exact top-k CVs for several query embeddings, best first.
+
+        All queries are scored together block by block, so a batch costs
+        about as much as a single search: the CV matrix is read once.
+        """
+        self._refresh()
+        matrix, ids = self._matrix, self._ids
+        self._searches += len(embeddings)
+        if matrix is None or len(matrix) == 0 or not embeddings:
+            return [[] for _ in embeddings]
+
+        queries = self._encode(embeddings).astype(np.float32)
+        # Leave slack for ids appended twice around a rebuild
+        k = min(max(top_ks) * 2, len(matrix))
+        if k <= 0:
+            return [[] for _ in embeddings]
+        scores, rows = self._block_top_k(matrix, queries, k)
+        return [
+            self._top_k(scores[:, j], rows[:, j], ids, top_k) if top_k > 0 else []
+            for j, top_k in enumerate(top_ks)
+        ]
+
+    def search(self, embedding, top_k: int) -> list[tuple[uuid.UUID, float]]:
+        """Exact top-k CVs by cosine similarity, best first"""
+        return self.search_many([embedding], [top_k])[0]
+
+    async def asearch(self, embedding, top_k: int) -> list[tuple[uuid.UUID, float]]:
+        # The matmul releases the GIL; keep large scans off the event loop
+        return await asyncio.to_thread(self.search, embedding, top_k)
+
+    async def asearch_many(self, embeddings: list, top_ks: list[int]) -> list[list[tuple[uuid.UUID, float]]]:
+        return await asyncio.to_thread(self.search_many, embeddings, top_ks)
+
+    async def ensure_built(self) -> bool:
+        """
+        Build the store if it does not exist yet; returns whether it built.
+
+        Every worker calls this at startup. The first one to take the
+        rebuild lock builds; the others wait for it and then find the store.
+        """
+        if self.exists():
+            return False
+        os.makedirs(self.path, exist_ok=True)
+        with open(self._rebuild_lock_path, "a") as lock:
+            await asyncio.to_thread(fcntl.flock, lock, fcntl.LOCK_EX)
+            try:
+                if self.exists():
+                    return False
+                await self.rebuild()
+                return True
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    async def rebuild(self, batch_size: int = 5000) -> int:
+        """
+        Write a fresh store from Postgres and swap it in atomically.
+
+        Rows are streamed into temp files which replace the live ones by
+        rename under the append lock; CVs inserted while the snapshot ran are
+        then appended again, so nothing committed during a rebuild is lost.
+        """
+        os.makedirs(self.path, exist_ok=True)
+        count = 0
+        suffix = f".{os.getpid()}.tmp"
+        vectors_tmp, ids_tmp = self._vectors_path + suffix, self._ids_path + suffix
+
+        async with AsyncSessionLocal() as db:
+            # Database clock, comparable with cv.created_at
+            started_at = (await db.execute(select(func.localtimestamp()))).scalar()
+            model = (await db.execute(
+                select(EmbeddingModelState.active_model).where(EmbeddingModelState.id == 1)
+            )).scalar() or settings.EMBEDDING_MODEL_NAME
+            with open(vectors_tmp, "wb") as vectors_file, open(ids_tmp, "wb") as ids_file:
+                result = await db.stream(
+                    select(CV.id, CV.embedding)
+                    .where(CV.embedding.is_not(None))
+                    .execution_options(yield_per=batch_size)
+                )
+                async for partition in result.partitions():
+                    self._write_rows(vectors_file, ids_file, [(row.id, row.embedding) for row in partition])
+                    count += len(partition)
+
+            with self._locked():
+                os.replace(vectors_tmp, self._vectors_path)
+                os.replace(ids_tmp, self._ids_path)
+                with open(self._meta_path + suffix, "w") as f:
+                    json.dump({
+                        "dtype": self.dtype.name,
+                        "dimension": self.dimension,
+                        "model": model,
+                        "built_at": started_at.isoformat(),
+                    }, f)
+                os.replace(self._meta_path + suffix, self._meta_path)
+
+            recent = await db.execute(
+                select(CV.id, CV.embedding)
+                .where(CV.embedding.is_not(None))
+                .where(CV.created_at >= started_at - REBUILD_CATCH_UP)
+            )
+            self.append([(row.id, row.embedding) for row in recent])
+
+        logger.info(f"Vector store rebuilt at {self.path} with {count} CVs")
+        return count
+
+    def stats(self) -> dict:
+        self._refresh()
+        return {
+            "enabled": settings.VECTOR_STORE_ENABLED,
+            "path": self.path,
+            "dtype": self.dtype.name,
+            "rows": 0 if self._matrix is None else len(self._matrix),
+            "searches": self._searches,
+            "appended": self._appended,
+        }
+
+
+vector_store = CVVectorStore(path=settings.VECTOR_STORE_PATH, dtype=settings.VECTOR_STORE_DTYPE)
@@ -1,19 +1,65 @@
+import logging
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, Depends
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.openapi.utils import get_openapi
-from app.api.endpoints import cv, jd
+from app.api.endpoints import cv, jd, admin
 from app.core.config import settings
 from app.core.auth import verify_secret_key
+from app.services.extraction import extraction_executor
+from app.db.session import AsyncSessionLocal
+from app.services.embedding import embedding_service
+from app.services.embedding_models import model_state
+from app.services.llm import llm_client
+from app.services.cv_processor import CVProcessor
+from app.services.parse_cache import parse_cache
+from app.services.job_queue import ingestion_queue
+from app.services.vector_store import vector_store
+from app.services.result_cache import result_cache
+from app.services.pagination import NEXT_CURSOR_HEADER
+
+logger = logging.getLogger(__name__)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    try:
+        # Keep both models' vectors while a model swap is in progress
+        async with AsyncSessionLocal() as db:
+            models = [model for model in await model_state(db) if model]
+        await embedding_service.cache.purge_other_models(*models)
+    except Exception as e:
+        logger.warning(f"Could not purge stale embedding cache entries: {e}")
+    if embedding_service.client is not None:
+        try:
+            await embedding_service.client.stats()
+        except Exception as e:
+            logger.warning(f"Embedding server not available yet, embedding requests will fail until it is: {e}")
+    if settings.VECTOR_STORE_ENABLED:
+        try:
+            await vector_store.ensure_built()
+        except Exception as e:
+            logger.warning(f"Could not build vector store, falling back to pgvector search: {e}")
+    ingestion_queue.start()
+    result_cache.start()
+    yield
+    await result_cache.stop()
+    await ingestion_queue.stop()
+    extraction_executor.shutdown()
+    await llm_client.aclose()
+
 
 app = FastAPI(
     title=settings.APP_NAME,
     version=settings.APP_VERSION,
-    description="CV Processing Backend with vector similarity matching"
+    description="CV Processing Backend with vector similarity matching",
+    lifespan=lifespan
 )
 
 # Include routers
 app.include_router(cv.router, prefix="/api/cv", tags=["CV"])
 app.include_router(jd.router, prefix="/api/jd", tags=["JD"])
+app.include_router(admin.router, prefix="/api/admin", tags=["Admin"])
 
 
 # Custom OpenAPI schema to fix CV upload endpoint
@@ -67,6 +113,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER],
 )
 
 
@@ -81,3 +128,22 @@ async def health():
         "service": settings.APP_NAME,
         "version": settings.APP_VERSION
     }
+
+
+@app.get("/stats", dependencies=[Depends(verify_secret_key)])
+async def stats():
+    """
+    Runtime statistics for capacity planning
+    Requires: X-Secret-Key header
+    """
+    return {
+        "extraction": extraction_executor.stats(),
+        "embedding": await embedding_service.stats(),
+        "embedding_cache": embedding_service.cache.stats(),
+        "llm": llm_client.stats(),
+        "parsing": CVProcessor.stats(),
+        "parse_cache": parse_cache.stats(),
+        "ingestion_queue": ingestion_queue.stats(),
+        "vector_store": vector_store.stats(),
+        "result_cache": result_cache.stats()
+    }
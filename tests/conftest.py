@@ -0,0 +1,8 @@
+import os
+import sys
+
+# Settings require these; tests never talk to a real database or OpenAI
+os.environ.setdefault("SECRET_KEY", "test-secret-key")
+os.environ.setdefault("OPENAI_API_KEY", "test-openai-key")
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
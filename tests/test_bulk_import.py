@@ -0,0 +1,57 @@
+import asyncio
+import io
+import threading
+import zipfile
+
+import pytest
+
+from app.core.config import settings
+from app.services import bulk_import as bulk_import_module
+from app.services.bulk_import import bulk_import, iter_zip
+
+
+def make_zip(members: dict[str, bytes]) -> bytes:
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as zf:
+        for name, content in members.items():
+            zf.writestr(name, content)
+    return buffer.getvalue()
+
+
+def test_iter_zip_yields_supported_members(monkeypatch):
+    monkeypatch.setattr(settings, "BULK_IMPORT_MAX_FILE_BYTES", 100)
+    archive = make_zip({
+        "cvs/a.pdf": b"%PDF-a",
+        "cvs/b.DOCX": b"PK-b",
+        "cvs/big.pdf": b"%PDF" + b"x" * 200,
+        "cvs/notes.txt": b"skip",
+        "cvs/.hidden.pdf": b"skip",
+        "__MACOSX/cvs/._a.pdf": b"skip",
+        "cvs/~$lock.docx": b"skip",
+    })
+    assert list(iter_zip(archive)) == [("cvs/a.pdf", b"%PDF-a"), ("cvs/b.DOCX", b"PK-b"), ("cvs/big.pdf", b"")]
+
+
+def test_iter_zip_rejects_other_data():
+    with pytest.raises(zipfile.BadZipFile):
+        list(iter_zip(b"not a zip"))
+
+
+def test_files_are_read_off_the_event_loop(monkeypatch):
+    readers = set()
+    imported = []
+
+    def entries():
+        for i in range(5):
+            readers.add(threading.current_thread())
+            yield f"{i}.pdf", b"%PDF"
+
+    async def import_chunk(db, chunk):
+        imported.append([name for name, _ in chunk])
+        return [{"file": name, "status": "created"} for name, _ in chunk]
+
+    monkeypatch.setattr(bulk_import_module, "_import_chunk", import_chunk)
+    report = asyncio.run(bulk_import(None, entries(), chunk_size=2))
+    assert threading.main_thread() not in readers
+    assert imported == [["0.pdf", "1.pdf"], ["2.pdf", "3.pdf"], ["4.pdf"]]
+    assert (report["total"], report["created"]) == (5, 5)
@@ -0,0 +1,83 @@
+import asyncio
+import threading
+
+import pytest
+
+from app.services.embedding import EmbeddingBatcher
+
+
+class Encoder:
+    def __init__(self, fail: bool = False):
+        self.batches = []
+        self.threads = set()
+        self.fail = fail
+
+    def __call__(self, texts):
+        self.batches.append(list(texts))
+        self.threads.add(threading.current_thread().name)
+        if self.fail:
+            raise RuntimeError("model exploded")
+        return [[float(len(text))] for text in texts]
+
+
+def test_concurrent_requests_share_batches():
+    encoder = Encoder()
+    batcher = EmbeddingBatcher(encoder, max_batch_size=4, max_wait_ms=50)
+
+    async def run():
+        return await asyncio.gather(*[batcher.submit("x" * n) for n in range(1, 11)])
+
+    results = asyncio.run(run())
+    assert results == [[float(n)] for n in range(1, 11)]
+    assert [len(batch) for batch in encoder.batches] == [4, 4, 2]
+    assert all(name.startswith("embedding") for name in encoder.threads)
+    stats = batcher.stats()
+    assert (stats["batches"], stats["items"], stats["avg_batch_size"]) == (3, 10, 3.33)
+
+
+def test_lone_request_waits_at_most_max_wait():
+    encoder = Encoder()
+    batcher = EmbeddingBatcher(encoder, max_batch_size=64, max_wait_ms=20)
+
+    async def run():
+        return await asyncio.wait_for(batcher.submit("abc"), timeout=1)
+
+    assert asyncio.run(run()) == [3.0]
+    assert encoder.batches == [["abc"]]
+
+
+def test_failure_reaches_every_caller_and_the_batcher_recovers():
+    encoder = Encoder(fail=True)
+    batcher = EmbeddingBatcher(encoder, max_batch_size=8, max_wait_ms=20)
+
+    async def run():
+        results = await asyncio.gather(*[batcher.submit("a"), batcher.submit("b")], return_exceptions=True)
+        encoder.fail = False
+        return results, await batcher.submit("cc")
+
+    results, recovered = asyncio.run(run())
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert recovered == [2.0]
+
+
+def test_cancelled_callers_are_not_encoded():
+    encoder = Encoder()
+    batcher = EmbeddingBatcher(encoder, max_batch_size=8, max_wait_ms=100)
+
+    async def run():
+        gone = asyncio.create_task(batcher.submit("gone"))
+        kept = asyncio.create_task(batcher.submit("kept"))
+        await asyncio.sleep(0.02)
+        gone.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await gone
+        return await kept
+
+    assert asyncio.run(run()) == [4.0]
+    assert encoder.batches == [["kept"]]
+
+
+def test_works_across_event_loops():
+    batcher = EmbeddingBatcher(Encoder(), max_batch_size=4, max_wait_ms=10)
+    assert asyncio.run(batcher.submit("a")) == [1.0]
+    assert asyncio.run(batcher.submit("bb")) == [2.0]
@@ -0,0 +1,129 @@
+import asyncio
+
+import numpy as np
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from app.services import embedding_cache as cache_module
+from app.services.embedding_cache import EmbeddingCache, cache_key, normalize_text
+
+
+class FakeTable:
+    """The embedding_cache table, behind a session that understands the cache's three statements"""
+
+    def __init__(self):
+        self.rows: dict[str, tuple[str, list[float]]] = {}
+        self.fail = False
+
+    def session(self):
+        return FakeSession(self)
+
+
+class FakeResult:
+    def __init__(self, value=None, rowcount=0):
+        self.value, self.rowcount = value, rowcount
+
+    def scalar_one_or_none(self):
+        return self.value
+
+
+class FakeSession:
+    def __init__(self, table: FakeTable):
+        self.table = table
+
+    async def __aenter__(self):
+        if self.table.fail:
+            raise ConnectionError("database down")
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def commit(self):
+        pass
+
+    async def execute(self, statement):
+        params = statement.compile(dialect=postgresql.dialect()).params
+        if statement.is_select:
+            row = self.table.rows.get(next(iter(params.values())))
+            return FakeResult(np.asarray(row[1], dtype=np.float32) if row else None)
+        if statement.is_insert:
+            self.table.rows.setdefault(params["key"], (params["model_name"], params["embedding"]))
+            return FakeResult()
+        keep = next(iter(params.values()))
+        stale = [key for key, (model, _) in self.table.rows.items() if model not in keep]
+        for key in stale:
+            del self.table.rows[key]
+        return FakeResult(rowcount=len(stale))
+
+
+@pytest.fixture
+def table(monkeypatch):
+    table = FakeTable()
+    monkeypatch.setattr(cache_module, "AsyncSessionLocal", table.session)
+    return table
+
+
+def test_keys_are_content_addressed():
+    assert normalize_text("  Senior\n\tPython   dev ") == "Senior Python dev"
+    assert cache_key("model-a", "text") == cache_key("model-a", "text")
+    assert cache_key("model-a", "text") != cache_key("model-b", "text")
+    assert cache_key("model-a", "text", "torch") != cache_key("model-a", "text", "onnx-int8")
+
+
+def test_memory_tier_is_a_bounded_lru():
+    cache = EmbeddingCache(max_entries=2, persistent=False)
+    cache.put_memory("a", [1.0])
+    cache.put_memory("b", [2.0])
+    assert cache.get_memory("a") == [1.0]
+    cache.put_memory("c", [3.0])
+    assert cache.get_memory("b") is None
+    assert cache.get_memory("a") == [1.0]
+    assert cache.get_memory("c") == [3.0]
+    stats = cache.stats()
+    assert (stats["memory_entries"], stats["evictions"], stats["memory_hits"]) == (2, 1, 3)
+
+
+def test_memory_tier_can_be_disabled():
+    cache = EmbeddingCache(max_entries=0, persistent=False)
+    asyncio.run(cache.put("a", "model", [1.0]))
+    assert asyncio.run(cache.get("a")) is None
+    assert cache.stats()["misses"] == 1
+
+
+def test_persistent_tier_survives_a_restart(table):
+    asyncio.run(EmbeddingCache(max_entries=10, persistent=True).put("k", "model", [0.5, 0.25]))
+    assert "k" in table.rows
+
+    restarted = EmbeddingCache(max_entries=10, persistent=True)
+    assert asyncio.run(restarted.get("k")) == [0.5, 0.25]
+    assert asyncio.run(restarted.get("k")) == [0.5, 0.25]
+    assert asyncio.run(restarted.get("missing")) is None
+    stats = restarted.stats()
+    assert (stats["db_hits"], stats["memory_hits"], stats["misses"]) == (1, 1, 1)
+
+
+def test_database_errors_degrade_to_misses(table):
+    table.fail = True
+    cache = EmbeddingCache(max_entries=10, persistent=True)
+    asyncio.run(cache.put("k", "model", [1.0]))
+    assert cache.get_memory("k") == [1.0]
+    assert asyncio.run(cache.get("other")) is None
+
+
+def test_purge_keeps_only_current_models(table):
+    cache = EmbeddingCache(max_entries=10, persistent=True)
+    for key, model in [("a", "old"), ("b", "active"), ("c", "next")]:
+        asyncio.run(cache.put(key, model, [1.0]))
+    assert asyncio.run(cache.purge_other_models("active", "next")) == 1
+    assert sorted(table.rows) == ["b", "c"]
+
+
+def test_purge_drops_vectors_from_another_backend(table, monkeypatch):
+    cache = EmbeddingCache(max_entries=10, persistent=True)
+    monkeypatch.setattr(cache_module.settings, "EMBEDDING_BACKEND", "torch")
+    asyncio.run(cache.put("a", "active", [1.0]))
+    monkeypatch.setattr(cache_module.settings, "EMBEDDING_BACKEND", "onnx-int8")
+    asyncio.run(cache.put("b", "active", [1.0]))
+    assert asyncio.run(cache.purge_other_models("active")) == 1
+    assert sorted(table.rows) == ["b"]
@@ -0,0 +1,92 @@
+import asyncio
+import json
+import os
+import tempfile
+
+import numpy as np
+import pytest
+
+from app.services.embedding_server import _FRAME, EmbeddingClient, EmbeddingServer, _pack, _unpack_embeddings
+
+
+class FakeService:
+    """Stands in for EmbeddingService: the first component is the text length"""
+
+    dimension = 4
+
+    def __init__(self):
+        self.batches = []
+
+    def _encode_batch(self, texts, model_name=None, batch_size=None):
+        self.batches.append(len(texts))
+        return [[float(len(text)), 0.0, 0.0, 1.0] for text in texts]
+
+    def batcher_for(self, model_name):
+        service = self
+
+        class Batcher:
+            async def submit(self, text):
+                return service._encode_batch([text], model_name)[0]
+
+        return Batcher()
+
+    def loaded_models(self):
+        return {}
+
+    def batcher_stats(self):
+        return {}
+
+
+def test_frame_layout():
+    frame = _pack({"op": "stats"}, b"\x01\x02")
+    header_length, payload_length = _FRAME.unpack(frame[:_FRAME.size])
+    assert payload_length == 2
+    assert json.loads(frame[_FRAME.size:_FRAME.size + header_length]) == {"op": "stats"}
+    assert frame[_FRAME.size + header_length:] == b"\x01\x02"
+
+
+def test_embeddings_payload_round_trip():
+    matrix = np.arange(6, dtype=np.float32).reshape(2, 3)
+    assert _unpack_embeddings({"count": 2, "dimension": 3}, matrix.tobytes()) == matrix.tolist()
+    with pytest.raises(RuntimeError, match="boom"):
+        _unpack_embeddings({"error": "boom"}, b"")
+
+
+@pytest.fixture
+def socket_path():
+    with tempfile.TemporaryDirectory() as directory:
+        yield os.path.join(directory, "embedding.sock")
+
+
+def test_client_server_round_trip(socket_path):
+    service = FakeService()
+    client = EmbeddingClient(socket_path, timeout=5)
+
+    async def run():
+        server = asyncio.create_task(EmbeddingServer(service, socket_path).serve_forever())
+        while not os.path.exists(socket_path):
+            await asyncio.sleep(0.01)
+        try:
+            single = await asyncio.gather(*[client.encode(["x" * n], "model") for n in range(1, 4)])
+            bulk = await client.encode(["a", "bb"], "model", batch_size=8, bulk=True)
+            blocking = await asyncio.to_thread(client.encode_sync, ["ccc"], "model")
+            stats = await client.stats()
+            return single, bulk, blocking, stats
+        finally:
+            server.cancel()
+
+    single, bulk, blocking, stats = asyncio.run(run())
+    assert [vectors[0][0] for vectors in single] == [1.0, 2.0, 3.0]
+    assert [vector[0] for vector in bulk] == [1.0, 2.0]
+    assert blocking == [[3.0, 0.0, 0.0, 1.0]]
+    assert stats["requests"] == 6
+    # The bulk request was encoded as one batch
+    assert 2 in service.batches
+
+
+def test_unreachable_server(socket_path):
+    client = EmbeddingClient(socket_path, timeout=1)
+    with pytest.raises(ConnectionError):
+        asyncio.run(client.encode(["x"], "model"))
+    with pytest.raises(ConnectionError):
+        client.encode_sync(["x"], "model")
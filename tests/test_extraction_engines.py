@@ -0,0 +1,36 @@
+from app.services.extraction_engines import collect_text
+
+
+def test_collects_everything_under_budget():
+    assert collect_text(iter(["a" * 9]), 10) == ("a" * 9, False)
+    assert collect_text(iter(["aaaa", "bbbbb"]), 10) == ("aaaa\nbbbbb", False)
+
+
+def test_no_budget():
+    assert collect_text(["one", "two"], None) == ("one\ntwo", False)
+
+
+def test_exactly_at_budget_is_not_truncated():
+    assert collect_text(iter(["a" * 10]), 10) == ("a" * 10, False)
+    assert collect_text(iter(["a" * 10, "", "  "]), 10) == ("a" * 10, False)
+
+
+def test_cut_text_is_truncated():
+    assert collect_text(iter(["a" * 11]), 10) == ("a" * 10, True)
+    assert collect_text(iter(["aaaa", "bbbbbb"]), 10) == ("aaaa\nbbbbb", True)
+
+
+def test_remaining_text_is_truncated():
+    assert collect_text(iter(["a" * 10, "b"]), 10) == ("a" * 10, True)
+
+
+def test_stops_pulling_once_budget_is_met():
+    pulled = []
+
+    def pages():
+        for page in ["a" * 20, "b", "c"]:
+            pulled.append(page)
+            yield page
+
+    collect_text(pages(), 10)
+    assert pulled == ["a" * 20]
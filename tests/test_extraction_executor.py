@@ -0,0 +1,57 @@
+import asyncio
+import os
+import time
+
+import pytest
+
+from app.services.extraction import ExtractionError, ExtractionExecutor, ExtractionTimeout
+
+
+@pytest.fixture
+def executor():
+    executor = ExtractionExecutor(workers=2, task_timeout=2, max_tasks_per_child=0)
+    yield executor
+    executor.shutdown()
+
+
+def test_runs_in_the_pool(executor):
+    assert asyncio.run(executor.run(os.getpid)) != os.getpid()
+    assert executor.stats()["completed"] == 1
+
+
+def test_timeout_recycles_the_pool(executor):
+    executor.task_timeout = 0.5
+
+    async def run():
+        with pytest.raises(ExtractionTimeout):
+            await executor.run(time.sleep, 30)
+        executor.task_timeout = 5
+        return await executor.run(abs, -3)
+
+    assert asyncio.run(run()) == 3
+    stats = executor.stats()
+    assert (stats["timed_out"], stats["pool_restarts"], stats["completed"]) == (1, 1, 1)
+
+
+def test_tasks_killed_by_another_timeout_are_retried(executor):
+    async def run():
+        innocent = asyncio.create_task(executor.run(time.sleep, 1))
+        while not executor._in_flight or executor._pool is None:
+            await asyncio.sleep(0.01)
+        await asyncio.sleep(0.5)
+        # What a timing-out neighbour does to the shared pool
+        pool = executor._pool
+        executor._timed_out_pools.add(pool)
+        executor._recycle_pool(pool)
+        await innocent
+
+    asyncio.run(run())
+    stats = executor.stats()
+    assert (stats["retried"], stats["completed"], stats["failed"]) == (1, 1, 0)
+
+
+def test_crashed_worker_is_not_retried(executor):
+    with pytest.raises(ExtractionError, match="crashed"):
+        asyncio.run(executor.run(os._exit, 1))
+    stats = executor.stats()
+    assert (stats["retried"], stats["failed"], stats["pool_restarts"]) == (0, 1, 1)
@@ -0,0 +1,41 @@
+import asyncio
+import uuid
+
+import pytest
+
+from app.services.ingestion import PipelineTrace
+from app.services.job_queue import IngestionQueue
+
+
+@pytest.fixture
+def queue(monkeypatch):
+    queue = IngestionQueue(workers=0, poll_interval=1, lease_seconds=60, max_attempts=3, retry_backoff=10)
+    queue.saved, queue.finished = [], []
+
+    async def save(job_id, **values):
+        queue.saved.append(values)
+
+    async def finish(job_id, **values):
+        queue.finished.append(values)
+
+    monkeypatch.setattr(queue, "_save", save)
+    monkeypatch.setattr(queue, "_finish", finish)
+    return queue
+
+
+def test_transient_failure_is_requeued(queue):
+    asyncio.run(queue._retry_or_fail(uuid.uuid4(), 2, "connection reset", 500, PipelineTrace()))
+    assert queue.finished == []
+    (values,) = queue.saved
+    assert (values["status"], values["error"], values["locked_at"]) == ("queued", "connection reset", None)
+    # Backoff doubles per attempt: 10s after the first, 20s after the second
+    assert values["retry_at"].right.value.total_seconds() == 20
+    assert queue.stats()["retried"] == 1
+
+
+def test_last_attempt_fails_the_job(queue):
+    asyncio.run(queue._retry_or_fail(uuid.uuid4(), 3, "connection reset", 500, PipelineTrace()))
+    assert queue.saved == []
+    (values,) = queue.finished
+    assert (values["status"], values["error_status_code"]) == ("failed", 500)
+    assert queue.stats()["failed"] == 1
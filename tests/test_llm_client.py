@@ -0,0 +1,148 @@
+"""LLMClient against a local mock of the OpenAI chat completions endpoint"""
+import asyncio
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from openai import APITimeoutError, AuthenticationError, InternalServerError
+
+from app.core.config import settings
+from app.services import llm
+from app.services.llm import LLMClient, LLMDeadlineExceeded
+
+
+def completion(content: str) -> dict:
+    return {
+        "id": "chatcmpl-test",
+        "object": "chat.completion",
+        "created": 0,
+        "model": "test-model",
+        "choices": [{
+            "index": 0,
+            "message": {"role": "assistant", "content": content},
+            "finish_reason": "stop",
+        }],
+        "usage": {"prompt_tokens": 1, "completion_tokens": 1, "total_tokens": 2},
+    }
+
+
+class MockOpenAI:
+    """
+    Serves scripted responses to POST /v1/chat/completions, one per request:
+    ``(status, body)`` pairs, or ``("sleep", seconds)`` to stall the request.
+    The last entry repeats once the script runs out.
+    """
+
+    def __init__(self, script: list):
+        self.script = script
+        self.requests = 0
+        mock = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                step = mock.script[min(mock.requests, len(mock.script) - 1)]
+                mock.requests += 1
+                status, body = step
+                if status == "sleep":
+                    time.sleep(body)
+                    status, body = 200, completion("too late")
+                payload = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.server.daemon_threads = True
+        self.thread = threading.Thread(target=self.server.serve_forever, args=(0.05,), daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.server.server_address[1]}/v1"
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+ERROR = {"error": {"message": "boom", "type": "server_error"}}
+
+
+@pytest.fixture(autouse=True)
+def fast_backoff(monkeypatch):
+    # Keep retry backoff in the milliseconds
+    monkeypatch.setattr(llm.random, "uniform", lambda low, high: 0.01)
+
+
+def run_chat(mock: MockOpenAI, monkeypatch, deadline_in: float | None = None, max_attempts: int = 3, timeout: float = 5.0):
+    monkeypatch.setattr(settings, "OPENAI_BASE_URL", mock.base_url)
+    client = LLMClient(max_concurrency=2, max_attempts=max_attempts, timeout=timeout)
+
+    async def call():
+        deadline = None if deadline_in is None else time.monotonic() + deadline_in
+        try:
+            return await client.chat([{"role": "user", "content": "hi"}], model="test-model", deadline=deadline)
+        finally:
+            await client.aclose()
+
+    return client, asyncio.run(call())
+
+
+def test_returns_message_content(monkeypatch):
+    with MockOpenAI([(200, completion("hello"))]) as mock:
+        client, content = run_chat(mock, monkeypatch)
+    assert content == "hello"
+    assert mock.requests == 1
+    assert client.stats()["retries"] == 0
+
+
+def test_retries_retryable_errors(monkeypatch):
+    with MockOpenAI([(503, ERROR), (429, ERROR), (200, completion("ok"))]) as mock:
+        client, content = run_chat(mock, monkeypatch)
+    assert content == "ok"
+    assert mock.requests == 3
+    assert client.stats()["retries"] == 2
+
+
+def test_gives_up_after_max_attempts(monkeypatch):
+    with MockOpenAI([(500, ERROR)]) as mock:
+        with pytest.raises(InternalServerError):
+            run_chat(mock, monkeypatch, max_attempts=2)
+    assert mock.requests == 2
+
+
+def test_does_not_retry_client_errors(monkeypatch):
+    with MockOpenAI([(401, {"error": {"message": "bad key", "type": "invalid_request_error"}})]) as mock:
+        with pytest.raises(AuthenticationError):
+            run_chat(mock, monkeypatch)
+    assert mock.requests == 1
+
+
+def test_expired_deadline_makes_no_request(monkeypatch):
+    with MockOpenAI([(200, completion("unused"))]) as mock:
+        with pytest.raises(LLMDeadlineExceeded):
+            run_chat(mock, monkeypatch, deadline_in=-1)
+    assert mock.requests == 0
+
+
+def test_deadline_bounds_a_slow_response(monkeypatch):
+    with MockOpenAI([("sleep", 1.5)]) as mock:
+        started = time.monotonic()
+        with pytest.raises(APITimeoutError):
+            run_chat(mock, monkeypatch, deadline_in=0.3)
+        elapsed = time.monotonic() - started
+    # One attempt, cut off at the deadline rather than the 5s client timeout,
+    # and no retry once the deadline has passed
+    assert elapsed < 1.2
+    assert mock.requests == 1
@@ -0,0 +1,75 @@
+import pytest
+
+from app.core.config import settings
+from app.services.local_parser import parse, segment
+
+CV = """Jane Doe
+jane.doe@example.com | +44 20 7946 0958
+
+Professional Summary
+Backend engineer with eight years of experience building Python services and data pipelines.
+
+Skills: Python, PostgreSQL, Docker, Kubernetes
+
+Experience
+Acme Ltd, 2018-2024
+"""
+
+
+def test_segment_splits_header_and_sections():
+    header, sections = segment(CV)
+    assert header == ["Jane Doe", "jane.doe@example.com | +44 20 7946 0958"]
+    assert sections["skills"] == ["Python, PostgreSQL, Docker, Kubernetes"]
+    assert sections["experience"] == ["Acme Ltd, 2018-2024"]
+
+
+def test_parses_every_field_of_a_clean_cv():
+    info, confidence = parse(CV)
+    assert info["name"] == "Jane Doe"
+    assert info["email"] == "jane.doe@example.com"
+    assert info["phone"] == "+44 20 7946 0958"
+    assert info["skills"] == ["Python", "PostgreSQL", "Docker", "Kubernetes"]
+    assert info["summary"].startswith("Backend engineer")
+    assert all(confidence[field] >= settings.PARSE_FIELD_THRESHOLDS.get(field, settings.PARSE_CONFIDENCE_THRESHOLD)
+               for field in confidence)
+
+
+@pytest.mark.parametrize("title", ["Curriculum Vitae", "Resume", "Software Engineer", "Personal Details"])
+def test_titles_are_not_names(title):
+    info, confidence = parse(f"{title}\nJane Doe\njane.doe@example.com")
+    assert info["name"] == "Jane Doe"
+    assert confidence["name"] == 0.9
+
+
+@pytest.mark.parametrize("text", [
+    "Professional Summary\nBuilds things.",
+    "Curriculum Vitae\n\nExperience\nAcme Ltd",
+    "Senior Data Engineer\nEducation\nMIT",
+])
+def test_headings_alone_give_no_name(text):
+    info, confidence = parse(text)
+    assert info["name"] is None
+    assert confidence["name"] == 0.0
+
+
+def test_layout_guess_is_left_for_the_llm_to_confirm():
+    info, confidence = parse("Jane Doe\ncontact@example.com\n")
+    assert info["name"] == "Jane Doe"
+    assert confidence["name"] < settings.PARSE_CONFIDENCE_THRESHOLD
+
+
+@pytest.mark.parametrize("email", ["jane.doe@example.com", "jdoe@example.com", "doe.jane@example.com"])
+def test_email_corroborates_the_name(email):
+    _, confidence = parse(f"Jane Doe\n{email}")
+    assert confidence["name"] >= settings.PARSE_CONFIDENCE_THRESHOLD
+
+
+def test_labelled_name():
+    info, confidence = parse("Curriculum Vitae\nName: Jane Doe\nhello@example.com")
+    assert (info["name"], confidence["name"]) == ("Jane Doe", 0.95)
+
+
+def test_missing_fields_score_zero():
+    info, confidence = parse("")
+    assert info == {"email": None, "phone": None, "name": None, "skills": [], "summary": None}
+    assert set(confidence.values()) == {0.0}
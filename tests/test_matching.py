@@ -0,0 +1,37 @@
+import pytest
+
+from app.core.config import settings
+from app.services.matching import blend_scores, normalize_skills, skill_overlap
+
+
+def test_normalize_skills():
+    assert normalize_skills(["Python", " python ", "Machine   Learning", None, 3, ""]) == ["python", "machine learning"]
+    assert normalize_skills(None) == []
+
+
+def test_skill_overlap():
+    assert skill_overlap(["Python", "SQL"], ["python", "go"]) == 0.5
+    assert skill_overlap(["Python"], []) == 0.0
+    assert skill_overlap(None, ["python"]) == 0.0
+
+
+@pytest.fixture
+def weight(monkeypatch):
+    monkeypatch.setattr(settings, "SKILL_SCORE_WEIGHT", 0.5)
+    return 0.5
+
+
+def test_blend_reranks_by_skills(weight):
+    results = [
+        ({"id": 1, "skills": []}, 0.9),
+        ({"id": 2, "skills": ["Python", "Go"]}, 0.7),
+        ({"id": 3, "skills": ["python"]}, 0.6),
+    ]
+    blended = blend_scores(results, ["python", "go"], top_k=2)
+    assert [row["id"] for row, _ in blended] == [2, 3]
+    assert blended[0][1] == pytest.approx(0.5 * 0.7 + 0.5 * 1.0)
+
+
+def test_blend_without_skills_keeps_order(weight):
+    results = [({"id": 1, "skills": []}, 0.9), ({"id": 2, "skills": ["python"]}, 0.7)]
+    assert blend_scores(results, [], top_k=1) == results[:1]
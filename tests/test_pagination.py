@@ -0,0 +1,35 @@
+import base64
+import json
+import uuid
+from datetime import datetime
+
+import pytest
+from fastapi import HTTPException
+
+from app.services.pagination import decode_cursor, encode_cursor
+
+
+def raw_cursor(payload) -> str:
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode().rstrip("=")
+
+
+def test_round_trip():
+    created_at, row_id = datetime(2024, 5, 1, 12, 30, 15, 123456), uuid.uuid4()
+    cursor = encode_cursor(created_at, row_id)
+    assert "=" not in cursor
+    assert decode_cursor(cursor) == (created_at, row_id)
+
+
+@pytest.mark.parametrize("cursor", [
+    "not base64!",
+    raw_cursor(["2024-01-01T00:00:00", 5]),
+    raw_cursor(["2024-01-01T00:00:00", "not-a-uuid"]),
+    raw_cursor(["yesterday", str(uuid.uuid4())]),
+    raw_cursor({"created_at": "2024-01-01T00:00:00"}),
+    raw_cursor(["2024-01-01T00:00:00"]),
+    raw_cursor(None),
+])
+def test_invalid_cursor_is_400(cursor):
+    with pytest.raises(HTTPException) as error:
+        decode_cursor(cursor)
+    assert error.value.status_code == 400
@@ -0,0 +1,120 @@
+import asyncio
+import uuid
+
+import pytest
+
+from app.services.result_cache import MatchResultCache
+
+JD_A, JD_B = uuid.uuid4(), uuid.uuid4()
+
+
+def make_cache() -> MatchResultCache:
+    cache = MatchResultCache(enabled=True, max_entries=2, ttl_seconds=60)
+    cache._listening = True
+    return cache
+
+
+def test_concurrent_misses_share_one_computation():
+    cache = make_cache()
+    calls = 0
+    row_id = uuid.uuid4()
+
+    async def compute():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return [({"id": row_id}, 0.5)], JD_A, False
+
+    async def run():
+        return await asyncio.gather(*[cache.compute(("key",), 0, compute) for _ in range(5)])
+
+    results = asyncio.run(run())
+    assert calls == 1
+    assert all(result == [({"id": row_id}, 0.5)] for result in results)
+    assert cache.get(("key",)) == [(row_id, 0.5)]
+    stats = cache.stats()
+    assert (stats["misses"], stats["coalesced"], stats["hits"]) == (1, 4, 1)
+
+
+def test_failure_reaches_every_waiter_and_is_not_cached():
+    cache = make_cache()
+
+    async def compute():
+        await asyncio.sleep(0.01)
+        raise RuntimeError("search failed")
+
+    async def run():
+        return await asyncio.gather(*[cache.compute(("key",), 0, compute) for _ in range(3)], return_exceptions=True)
+
+    results = asyncio.run(run())
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert cache.get(("key",)) is None
+
+
+def test_jd_invalidation_is_scoped():
+    cache = make_cache()
+    cache.put(("a",), cache.current_generation(), JD_A, False, [])
+    cache.put(("b",), cache.current_generation(), JD_B, False, [])
+    cache.invalidate_jds([JD_A])
+    assert cache.get(("a",)) is None
+    assert cache.get(("b",)) == []
+
+
+def test_new_cvs_only_invalidate_live_searches():
+    cache = make_cache()
+    cache.put(("list",), cache.current_generation(), JD_A, False, [])
+    cache.put(("live",), cache.current_generation(), JD_A, True, [])
+    cache.invalidate_pool()
+    assert cache.get(("list",)) == []
+    assert cache.get(("live",)) is None
+
+
+def test_invalidate_all():
+    cache = make_cache()
+    cache.put(("a",), cache.current_generation(), JD_A, False, [])
+    cache.invalidate_all()
+    assert cache.get(("a",)) is None
+
+
+def test_result_computed_across_an_invalidation_is_not_cached():
+    cache = make_cache()
+    generation = cache.current_generation()
+    cache.invalidate_jds([JD_A])
+    cache.put(("a",), generation, JD_A, False, [])
+    assert cache.get(("a",)) is None
+    # Computed after the invalidation: current
+    cache.put(("a",), cache.current_generation(), JD_A, False, [])
+    assert cache.get(("a",)) == []
+
+
+@pytest.mark.parametrize("payload, stale", [
+    ("cv", {"live"}),
+    (f"jd:{JD_A},{uuid.uuid4()}", {"list", "live"}),
+    (f"jd:{JD_B}", set()),
+    ("*", {"list", "live"}),
+    ("", {"list", "live"}),
+    ("jd:garbage", {"list", "live"}),
+])
+def test_notifications(payload, stale):
+    cache = MatchResultCache(enabled=True, max_entries=4, ttl_seconds=60)
+    cache._listening = True
+    cache.put(("list",), cache.current_generation(), JD_A, False, [])
+    cache.put(("live",), cache.current_generation(), JD_A, True, [])
+    cache._on_notify(None, 1, "match_generation", payload)
+    assert {name for name in ("list", "live") if cache.get((name,)) is None} == stale
+
+
+def test_least_recently_used_is_evicted():
+    cache = make_cache()
+    cache.put(("a",), 0, JD_A, False, [])
+    cache.put(("b",), 0, JD_A, False, [])
+    cache.get(("a",))
+    cache.put(("c",), 0, JD_A, False, [])
+    assert cache.get(("b",)) is None
+    assert cache.get(("a",)) == []
+
+
+@pytest.mark.parametrize("enabled", [True, False])
+def test_generation_unknown_until_listening(enabled):
+    cache = MatchResultCache(enabled=enabled, max_entries=2, ttl_seconds=60)
+    assert cache.current_generation() is None
@@ -0,0 +1,107 @@
+import asyncio
+import hashlib
+import os
+
+import pytest
+from fastapi import HTTPException
+
+from app.core.config import settings
+from app.services.upload import SpooledUpload, receive_upload, sniff_file_type
+
+PDF = b"%PDF-1.7\n" + bytes(range(256)) * 40
+
+
+class FakeRequest:
+    def __init__(self, body: bytes, chunk_size: int = 1000, content_length: bool = True):
+        self.chunks = [body[i:i + chunk_size] for i in range(0, len(body), chunk_size)]
+        self.headers = {"content-length": str(len(body))} if content_length else {}
+        self.consumed = 0
+
+    async def stream(self):
+        for chunk in self.chunks:
+            self.consumed += 1
+            yield chunk
+
+
+@pytest.fixture(autouse=True)
+def temp_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "UPLOAD_TEMP_DIR", str(tmp_path))
+    return tmp_path
+
+
+def receive(request, max_bytes=len(PDF), **kwargs):
+    return asyncio.run(receive_upload(request, max_bytes, **kwargs))
+
+
+def test_sniff_file_type():
+    assert sniff_file_type(b"%PDF-1.4") == "pdf"
+    assert sniff_file_type(b"PK\x03\x04rest") == "zip"
+    assert sniff_file_type(b"GIF89a") is None
+
+
+def test_small_upload_stays_in_memory(monkeypatch, temp_dir):
+    monkeypatch.setattr(settings, "UPLOAD_SPOOL_MAX_MEMORY", len(PDF))
+    upload = receive(FakeRequest(PDF))
+    assert upload.path is None
+    assert upload.source() == PDF
+    assert (upload.size, upload.file_type) == (len(PDF), "pdf")
+    assert upload.content_hash == hashlib.sha256(PDF).hexdigest()
+    assert list(temp_dir.iterdir()) == []
+
+
+def test_large_upload_spills_to_disk(monkeypatch, temp_dir):
+    monkeypatch.setattr(settings, "UPLOAD_SPOOL_MAX_MEMORY", 2500)
+    upload = receive(FakeRequest(PDF))
+    assert upload.path is not None and os.path.dirname(upload.path) == str(temp_dir)
+    with open(upload.source(), "rb") as f:
+        assert f.read() == PDF
+    assert b"".join(upload.iter_chunks(3000)) == PDF
+    assert [len(chunk) for chunk in upload.iter_chunks(4000)] == [4000, 4000, len(PDF) - 8000]
+    assert upload.content_hash == hashlib.sha256(PDF).hexdigest()
+    upload.close()
+    assert not os.path.exists(upload.path)
+
+
+def test_declared_oversize_is_rejected_before_reading():
+    request = FakeRequest(PDF)
+    with pytest.raises(HTTPException) as error:
+        receive(request, max_bytes=len(PDF) - 1)
+    assert error.value.status_code == 413
+    assert request.consumed == 0
+
+
+def test_streamed_oversize_is_rejected_early(monkeypatch, temp_dir):
+    monkeypatch.setattr(settings, "UPLOAD_SPOOL_MAX_MEMORY", 1000)
+    request = FakeRequest(PDF, content_length=False)
+    with pytest.raises(HTTPException) as error:
+        receive(request, max_bytes=3000)
+    assert error.value.status_code == 413
+    assert request.consumed == 4
+    # The partly written spool file is removed
+    assert list(temp_dir.iterdir()) == []
+
+
+def test_unknown_format_is_rejected_from_the_first_chunk():
+    request = FakeRequest(b"GIF89a" + b"x" * 5000)
+    with pytest.raises(HTTPException) as error:
+        receive(request, max_bytes=10000)
+    assert error.value.status_code == 400
+    assert request.consumed == 1
+
+
+def test_allowed_types_are_respected():
+    with pytest.raises(HTTPException):
+        receive(FakeRequest(PDF), allowed_types=("zip",), description="ZIP archives")
+
+
+def test_empty_body_is_rejected():
+    with pytest.raises(HTTPException) as error:
+        receive(FakeRequest(b""))
+    assert error.value.detail == "No file content provided"
+
+
+def test_head_spans_chunks():
+    upload = SpooledUpload(max_memory=100)
+    for byte in PDF[:6]:
+        upload.write(bytes([byte]))
+    assert upload.head == PDF[:6] and upload.file_type == "pdf"